@@ -0,0 +1,194 @@
+"""
+Performance regression gate for load(), prepare_output_stream() and the text lookup.
+
+    python -m benchmarks.gate record [--profile NAME]
+    python -m benchmarks.gate check [--profile NAME] [--threshold 0.1]
+
+Baselines are stored in benchmarks/baselines/<profile>.json, one file per machine profile.
+Every benchmark is repeated several times, and it is only reported as a regression when its median is slower
+than the baseline median by more than the threshold and by more than the spread (IQR) of both runs.
+The check exits with a non-zero status when a regression is found, or when it would run at another scale than the
+baseline (the timings could not be compared).
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import re
+import statistics
+import sys
+
+from . import load_save
+
+BASELINE_FORMAT_VERSION = 1
+BASELINES_DIR = os.path.join(os.path.dirname(__file__), 'baselines')
+GATED_STAGES = ('load', 'pack', 'text')
+
+DEFAULT_SCALE = 10
+DEFAULT_REPEAT = 15
+DEFAULT_THRESHOLD = 0.1
+
+EXIT_REGRESSION = 1
+EXIT_NO_BASELINE = 2
+EXIT_MISMATCH = 3
+
+
+def default_profile():
+    name = f'{platform.node()}-{platform.machine()}-py{platform.python_version()}'
+    return re.sub(r'[^A-Za-z0-9_.-]+', '_', name)
+
+
+def baseline_path(profile):
+    return os.path.join(BASELINES_DIR, f'{profile}.json')
+
+
+def summarize(timings):
+    if len(timings) > 1:
+        q1, _, q3 = statistics.quantiles(timings, n=4)
+    else:
+        q1 = q3 = timings[0]
+    return {
+        'median': statistics.median(timings),
+        'iqr': q3 - q1,
+        'samples': timings,
+    }
+
+
+def collect(scale, repeat, seed=0):
+    results = load_save.run(scale=scale, repeat=repeat, seed=seed, stages=GATED_STAGES)
+    return {f'{result["filename"]}:{result["stage"]}': summarize(result['timings']) for result in results}
+
+
+def record(profile, scale, repeat, thresholds=None):
+    baseline = {
+        'version': BASELINE_FORMAT_VERSION,
+        'profile': profile,
+        'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'config': {'scale': scale, 'repeat': repeat},
+        'thresholds': thresholds or {},
+        'results': collect(scale, repeat),
+    }
+    os.makedirs(BASELINES_DIR, exist_ok=True)
+    with open(baseline_path(profile), "w") as file_obj:
+        json.dump(baseline, file_obj, indent=2, sort_keys=True)
+    return baseline
+
+
+def load_baseline(profile):
+    with open(baseline_path(profile)) as file_obj:
+        baseline = json.load(file_obj)
+    if baseline.get('version') != BASELINE_FORMAT_VERSION:
+        raise ValueError(
+            f'Baseline {baseline_path(profile)} uses format version {baseline.get("version")}, '
+            f'expected {BASELINE_FORMAT_VERSION}. Record it again.'
+        )
+    return baseline
+
+
+def get_threshold(baseline, key, threshold=None):
+    """
+    Returns the threshold of the benchmark ``key``: ``threshold`` when given (from the command line), else the one
+    recorded in the baseline for the benchmark, for its stage or by default, else DEFAULT_THRESHOLD.
+    """
+    if threshold is not None:
+        return threshold
+    thresholds = baseline.get('thresholds', {})
+    stage = key.split(':')[-1]
+    return thresholds.get(key, thresholds.get(stage, thresholds.get('default', DEFAULT_THRESHOLD)))
+
+
+def missing_benchmarks(baseline, current):
+    """
+    Returns the benchmarks of the baseline that did not run and those that ran without a baseline.
+    """
+    return sorted(set(baseline['results']) - set(current)), sorted(set(current) - set(baseline['results']))
+
+
+def compare(baseline, current, threshold=None):
+    """
+    Returns a list of (key, baseline median, current median, ratio, is regression) tuples for the benchmarks that
+    are in both, see missing_benchmarks for the others.
+    """
+    comparison = []
+    for key, expected in sorted(baseline['results'].items()):
+        if key not in current:
+            continue
+        actual = current[key]
+        ratio = actual['median'] / expected['median'] if expected['median'] else 1
+        slower_by = actual['median'] - expected['median']
+        is_regression = (
+            ratio > 1 + get_threshold(baseline, key, threshold)
+            and slower_by > expected['iqr'] + actual['iqr']
+        )
+        comparison.append((key, expected['median'], actual['median'], ratio, is_regression))
+    return comparison
+
+
+def format_comparison(comparison):
+    lines = [f'{"benchmark":<24}{"baseline ms":>14}{"current ms":>14}{"ratio":>8}']
+    for key, expected, actual, ratio, is_regression in comparison:
+        lines.append(
+            f'{key:<24}{expected * 1000:>14.3f}{actual * 1000:>14.3f}{ratio:>8.2f}'
+            f'{"  REGRESSION" if is_regression else ""}'
+        )
+    return os.linesep.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('command', choices=('record', 'check'))
+    parser.add_argument('--profile', default=default_profile())
+    parser.add_argument('--scale', type=float, default=None)
+    parser.add_argument('--repeat', type=int, default=None)
+    parser.add_argument(
+        '--threshold', type=float, default=None,
+        help=f'Allowed slowdown as a fraction of the baseline median (default {DEFAULT_THRESHOLD})'
+    )
+    args = parser.parse_args(argv)
+
+    if args.command == 'record':
+        baseline = record(
+            args.profile, args.scale or DEFAULT_SCALE, args.repeat or DEFAULT_REPEAT,
+            thresholds={'default': args.threshold} if args.threshold is not None else None,
+        )
+        print(f'Recorded {len(baseline["results"])} benchmarks in {baseline_path(args.profile)}')
+        return 0
+
+    if not os.path.exists(baseline_path(args.profile)):
+        print(f'No baseline for profile {args.profile}, run "record" first', file=sys.stderr)
+        return EXIT_NO_BASELINE
+
+    baseline = load_baseline(args.profile)
+    config = baseline['config']
+    if args.scale is not None and args.scale != config['scale']:
+        print(
+            f'The baseline of profile {args.profile} was recorded at scale {config["scale"]}, not {args.scale}',
+            file=sys.stderr,
+        )
+        return EXIT_MISMATCH
+    current = collect(config['scale'], args.repeat or config['repeat'])
+    comparison = compare(baseline, current, threshold=args.threshold)
+    print(format_comparison(comparison))
+    not_run, not_recorded = missing_benchmarks(baseline, current)
+    if not_run:
+        print(
+            f'Warning: {len(not_run)} benchmark(s) of the baseline did not run: {", ".join(not_run)}',
+            file=sys.stderr,
+        )
+    if not_recorded:
+        print(
+            f'Warning: {len(not_recorded)} benchmark(s) have no baseline, record it again: {", ".join(not_recorded)}',
+            file=sys.stderr,
+        )
+
+    regressions = [key for key, *_, is_regression in comparison if is_regression]
+    if regressions:
+        print(f'{len(regressions)} benchmark(s) regressed: {", ".join(regressions)}', file=sys.stderr)
+        return EXIT_REGRESSION
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
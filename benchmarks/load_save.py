@@ -0,0 +1,135 @@
+"""
+Times the stages of loading and saving every manager over a synthetic installation.
+
+    python -m benchmarks.load_save --scale 100 --repeat 5 [--json results.json]
+
+Stages:
+- load: a full ``manager.load()`` from a fresh manager instance
+- decode: unpacking the rows of the file with ``data_struct.iter_unpack``
+- text: resolving the name of every row against TEXTSTRA.DLL (including opening the library)
+- pack: ``manager.prepare_output_stream()``
+- save: ``manager.save_stream_to_file()`` of an already packed stream, to a temporary file rather than to the
+  installation
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+
+from swr_ed import ALL_MANAGERS, MANAGERS_BY_FILE
+from swr_ed.base import SWRDataManager
+from swr_ed.dll_wrappers import TextStraWrapper
+from swr_ed.synthetic import generate_installation
+
+STAGES = ('load', 'decode', 'text', 'pack', 'save')
+
+
+def time_call(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def get_stages(manager_cls, data_path, output_dir):
+    manager = manager_cls(data_path)
+    manager.load()
+    with open(manager.file_path, "rb") as file_obj:
+        payload = file_obj.read()[manager.header_struct.size:]
+    stream = manager.prepare_output_stream()
+    # Saved elsewhere, so that the installation (maybe a real one, see --data-path) is left as it is
+    output = manager_cls(data_path)
+    output.file_path = os.path.join(output_dir, manager_cls.filename)
+
+    def resolve_texts():
+        text_stra = TextStraWrapper(data_path)
+        for row in manager.data:
+            text_stra.get_text(row['name_id_1'])
+
+    stages = {
+        'load': lambda: manager_cls(data_path).load(),
+        'decode': lambda: list(manager.data_struct.iter_unpack(payload)),
+        'text': resolve_texts,
+        'pack': manager.prepare_output_stream,
+        'save': lambda: output.save_stream_to_file(stream),
+    }
+    if not issubclass(manager_cls, SWRDataManager) or 'name_id_1' not in manager.fields:
+        del stages['text']
+    return manager, len(payload) + manager.header_struct.size, stages
+
+
+def bench_manager(manager_cls, data_path, repeat=5, stages=STAGES):
+    with tempfile.TemporaryDirectory() as output_dir:
+        return _bench_manager(manager_cls, data_path, repeat, stages, output_dir)
+
+
+def _bench_manager(manager_cls, data_path, repeat, stages, output_dir):
+    manager, size, stage_funcs = get_stages(manager_cls, data_path, output_dir)
+    rows = len(manager.data)
+    results = []
+    for stage in stages:
+        if stage not in stage_funcs:
+            continue
+        timings = time_call(stage_funcs[stage], repeat)
+        seconds = statistics.median(timings)
+        results.append({
+            'manager': manager_cls.__name__,
+            'filename': manager_cls.filename,
+            'stage': stage,
+            'rows': rows,
+            'bytes': size,
+            'seconds': seconds,
+            'rows_per_second': rows / seconds if seconds else None,
+            'bytes_per_second': size / seconds if seconds else None,
+            'timings': timings,
+        })
+    return results
+
+
+def run(scale=1, repeat=5, filenames=None, data_path=None, seed=0, stages=STAGES):
+    manager_classes = [MANAGERS_BY_FILE[filename] for filename in filenames] if filenames else list(ALL_MANAGERS)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        if data_path is None:
+            data_path = generate_installation(temp_dir, scale=scale, seed=seed, manager_classes=manager_classes)
+        results = []
+        for manager_cls in manager_classes:
+            results.extend(bench_manager(manager_cls, data_path, repeat=repeat, stages=stages))
+    return results
+
+
+def format_results(results):
+    lines = [f'{"file":<14}{"stage":<8}{"rows":>10}{"bytes":>12}{"ms":>10}{"rows/s":>14}{"MB/s":>10}']
+    for result in results:
+        lines.append(
+            f'{result["filename"]:<14}{result["stage"]:<8}{result["rows"]:>10}{result["bytes"]:>12}'
+            f'{result["seconds"] * 1000:>10.3f}{result["rows_per_second"] or 0:>14.0f}'
+            f'{(result["bytes_per_second"] or 0) / 2 ** 20:>10.1f}'
+        )
+    return os.linesep.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('--scale', type=float, default=1, help='Multiplier for the row counts of the stock files')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--file', dest='filenames', action='append', help='Only benchmark this data file')
+    parser.add_argument('--data-path', help='Benchmark an existing installation instead of a synthetic one')
+    parser.add_argument('--json', help='Write the raw results to this file')
+    args = parser.parse_args(argv)
+
+    results = run(
+        scale=args.scale, repeat=args.repeat, filenames=args.filenames, data_path=args.data_path, seed=args.seed
+    )
+    print(format_results(results))
+    if args.json:
+        with open(args.json, "w") as file_obj:
+            json.dump(results, file_obj, indent=2)
+
+
+if __name__ == '__main__':
+    main()
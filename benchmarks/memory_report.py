@@ -0,0 +1,194 @@
+"""
+Reports how much memory the loaded data of every manager takes, in several representations.
+
+    python -m benchmarks.memory_report [--scale 10] [--data-path PATH] [--json report.json]
+
+For every manager the total is split into the raw bytes of the file, the record objects and the text strings,
+measured with a deep sizeof. The retained size reported by tracemalloc while building each representation is
+included as a cross check.
+
+Representations:
+- ordereddict: one OrderedDict per row, what SWRDataManager holds in ``manager.data``
+- list: one list per row, what SimpleSWRManager holds
+- tuple: one tuple per row, as returned by ``iter_unpack``
+- columns: one ``array.array`` per field
+- raw: only the bytes of the file, rows are unpacked on demand
+
+The representation a manager holds is measured on a manager loaded while tracemalloc runs, and includes the copy of
+the rows of the file that it keeps in ``loaded_rows`` to check the READ_ONLY fields before saving.
+"""
+import argparse
+import array
+import gc
+import json
+import os
+import sys
+import tempfile
+import tracemalloc
+from collections import OrderedDict
+
+from swr_ed import ALL_MANAGERS, MANAGERS_BY_FILE
+from swr_ed.base import SWRDataManager
+from swr_ed.synthetic import generate_installation
+
+REPRESENTATIONS = ('ordereddict', 'list', 'tuple', 'columns', 'raw')
+
+
+def deep_sizeof(obj, seen=None):
+    """
+    Returns a dict with the size of ``obj`` and everything it references split in 'raw', 'records' and 'text'.
+    Objects referenced more than once are counted once.
+    """
+    sizes = {'raw': 0, 'records': 0, 'text': 0}
+    seen = set() if seen is None else seen
+    # The keys of the records are field names, they are counted as part of the records rather than as text
+    pending = [(obj, False)]
+    while pending:
+        current, is_key = pending.pop()
+        if id(current) in seen:
+            continue
+        seen.add(id(current))
+        size = sys.getsizeof(current)
+        if isinstance(current, str) and not is_key:
+            sizes['text'] += size
+        elif isinstance(current, (bytes, bytearray, memoryview)):
+            sizes['raw'] += size
+        else:
+            sizes['records'] += size
+            if isinstance(current, dict):
+                pending.extend((key, True) for key in current.keys())
+                pending.extend((value, False) for value in current.values())
+            elif isinstance(current, (list, tuple, set, frozenset)):
+                pending.extend((item, False) for item in current)
+    return sizes
+
+
+def held_representation(manager):
+    return 'ordereddict' if isinstance(manager, SWRDataManager) else 'list'
+
+
+def build_representation(representation, manager, payload, data_tuples):
+    if representation == held_representation(manager):
+        loaded = type(manager)(manager.data_path)
+        loaded.load()
+        return loaded.data, loaded.loaded_rows
+    if representation == 'ordereddict':
+        return [OrderedDict(enumerate(row)) for row in data_tuples]
+    if representation == 'list':
+        return [list(row) for row in data_tuples]
+    if representation == 'tuple':
+        return list(manager.data_struct.iter_unpack(payload))
+    if representation == 'columns':
+        codes = manager.data_struct.format.lstrip('<>=!@')
+        columns = [array.array(code) for code in codes]
+        for row in data_tuples:
+            for column, value in zip(columns, row):
+                column.append(value)
+        return columns
+    if representation == 'raw':
+        return bytearray(payload)
+    raise ValueError(f'Unknown representation {representation}')
+
+
+def measure(representation, manager, payload, data_tuples):
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        built = build_representation(representation, manager, payload, data_tuples)
+        gc.collect()
+        after = tracemalloc.take_snapshot()
+        retained = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+    finally:
+        tracemalloc.stop()
+
+    sizes = deep_sizeof(built)
+    if representation == 'columns':
+        # arrays do not expose their items, getsizeof already includes their buffer
+        sizes['raw'], sizes['records'] = sizes['records'], 0
+    return dict(sizes, total=sum(sizes.values()), tracemalloc=retained)
+
+
+def report_manager(manager_cls, data_path, representations=REPRESENTATIONS):
+    manager = manager_cls(data_path)
+    manager.load()
+    with open(manager.file_path, "rb") as file_obj:
+        payload = file_obj.read()[manager.header_struct.size:]
+    data_tuples = list(manager.data_struct.iter_unpack(payload))
+
+    results = []
+    for representation in representations:
+        results.append(dict(
+            filename=manager_cls.filename,
+            representation=representation,
+            rows=len(data_tuples),
+            file_bytes=len(payload) + manager.header_struct.size,
+            **measure(representation, manager, payload, data_tuples),
+        ))
+    return results
+
+
+def run(scale=1, data_path=None, filenames=None, seed=0, representations=REPRESENTATIONS):
+    manager_classes = [MANAGERS_BY_FILE[filename] for filename in filenames] if filenames else list(ALL_MANAGERS)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        if data_path is None:
+            data_path = generate_installation(temp_dir, scale=scale, seed=seed, manager_classes=manager_classes)
+        results = []
+        for manager_cls in manager_classes:
+            results.extend(report_manager(manager_cls, data_path, representations))
+    return results
+
+
+def totals(results):
+    summary = OrderedDict()
+    for result in results:
+        total = summary.setdefault(result['representation'], dict(
+            filename='TOTAL', representation=result['representation'], rows=0, file_bytes=0,
+            raw=0, records=0, text=0, total=0, tracemalloc=0,
+        ))
+        for key in ('rows', 'file_bytes', 'raw', 'records', 'text', 'total'):
+            total[key] += result[key]
+        if result['tracemalloc'] is None or total['tracemalloc'] is None:
+            total['tracemalloc'] = None
+        else:
+            total['tracemalloc'] += result['tracemalloc']
+    return list(summary.values())
+
+
+def format_results(results):
+    lines = [
+        f'{"file":<14}{"representation":<16}{"rows":>9}{"file":>11}{"raw":>11}{"records":>12}'
+        f'{"text":>11}{"total":>12}{"tracemalloc":>13}'
+    ]
+    for result in results:
+        tracemalloc_size = '-' if result['tracemalloc'] is None else result['tracemalloc']
+        lines.append(
+            f'{result["filename"]:<14}{result["representation"]:<16}{result["rows"]:>9}{result["file_bytes"]:>11}'
+            f'{result["raw"]:>11}{result["records"]:>12}{result["text"]:>11}{result["total"]:>12}'
+            f'{tracemalloc_size:>13}'
+        )
+    return os.linesep.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('--scale', type=float, default=1, help='Multiplier for the row counts of the stock files')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--data-path', help='Measure an existing installation instead of a synthetic one')
+    parser.add_argument('--file', dest='filenames', action='append', help='Only measure this data file')
+    parser.add_argument('--representation', dest='representations', action='append', choices=REPRESENTATIONS)
+    parser.add_argument('--json', help='Write the raw results to this file')
+    args = parser.parse_args(argv)
+
+    results = run(
+        scale=args.scale, data_path=args.data_path, filenames=args.filenames, seed=args.seed,
+        representations=args.representations or REPRESENTATIONS,
+    )
+    print(format_results(results + totals(results)))
+    if args.json:
+        with open(args.json, "w") as file_obj:
+            json.dump({'results': results, 'totals': totals(results)}, file_obj, indent=2)
+
+
+if __name__ == '__main__':
+    main()
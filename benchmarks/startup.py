@@ -0,0 +1,151 @@
+"""
+Measures cold start latency in fresh python processes.
+
+    python -m benchmarks.startup [--repeat 10] [--file CAPSHPSD.DAT] [--data-path PATH] [--json startup.json]
+
+Phases, measured inside each child process:
+- import: ``import swr_ed``
+- lookup: ``MANAGERS_BY_FILE[filename]``, which imports and builds the manager classes
+- instance: creating the manager
+- text: the first text resolution (opening TEXTSTRA.DLL)
+- load: the first ``manager.load()``
+
+The total is measured by the parent and includes starting the interpreter.
+The per-module import breakdown comes from parsing the output of ``python -X importtime``.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from swr_ed.synthetic import generate_installation
+
+PHASES = ('import', 'lookup', 'instance', 'text', 'load')
+
+CHILD_SCRIPT = '''
+import json, sys, time
+timings = {}
+start = time.perf_counter()
+import swr_ed
+timings['import'] = time.perf_counter() - start
+start = time.perf_counter()
+manager_cls = swr_ed.MANAGERS_BY_FILE[sys.argv[2]]
+timings['lookup'] = time.perf_counter() - start
+start = time.perf_counter()
+manager = manager_cls(sys.argv[1])
+timings['instance'] = time.perf_counter() - start
+start = time.perf_counter()
+if hasattr(manager, 'get_text'):
+    manager.get_text(0)
+timings['text'] = time.perf_counter() - start
+start = time.perf_counter()
+manager.load()
+timings['load'] = time.perf_counter() - start
+print(json.dumps(timings))
+'''
+
+
+def child_env():
+    env = dict(os.environ)
+    src_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [src_path, env.get('PYTHONPATH')]))
+    return env
+
+
+def run_child(data_path, filename):
+    start = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, '-c', CHILD_SCRIPT, data_path, filename],
+        capture_output=True, text=True, check=True, env=child_env(),
+    )
+    timings = json.loads(completed.stdout)
+    timings['total'] = time.perf_counter() - start
+    return timings
+
+
+def parse_importtime(output):
+    """
+    Parses the ``-X importtime`` report into a list of (module, self microseconds, cumulative microseconds).
+    """
+    modules = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules.append((name.strip(), int(self_us), int(cumulative_us)))
+    return modules
+
+
+def import_breakdown(filename, repeat=5):
+    # Looking up a manager is included so that the import of the managers module shows up as well
+    statement = f'import swr_ed; swr_ed.MANAGERS_BY_FILE[{filename!r}]'
+    runs = []
+    for _ in range(repeat):
+        completed = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', statement],
+            capture_output=True, text=True, check=True, env=child_env(),
+        )
+        runs.append(parse_importtime(completed.stderr))
+
+    breakdown = {}
+    for modules in runs:
+        for name, self_us, cumulative_us in modules:
+            breakdown.setdefault(name, ([], []))
+            breakdown[name][0].append(self_us)
+            breakdown[name][1].append(cumulative_us)
+    return sorted(
+        ((name, statistics.median(self_us), statistics.median(cumulative_us))
+         for name, (self_us, cumulative_us) in breakdown.items()),
+        key=lambda entry: entry[2], reverse=True,
+    )
+
+
+def run(repeat=10, filename='CAPSHPSD.DAT', data_path=None):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        if data_path is None:
+            data_path = generate_installation(temp_dir)
+        runs = [run_child(data_path, filename) for _ in range(repeat)]
+    phases = {phase: statistics.median(r[phase] for r in runs) for phase in PHASES + ('total',)}
+    return {
+        'filename': filename,
+        'repeat': repeat,
+        'phases': phases,
+        'imports': import_breakdown(filename, repeat=min(repeat, 5)),
+        'runs': runs,
+    }
+
+
+def format_results(results, top=15):
+    lines = [f'Cold start for {results["filename"]} (median of {results["repeat"]} processes)']
+    for phase, seconds in results['phases'].items():
+        lines.append(f'  {phase:<10}{seconds * 1000:>10.2f} ms')
+    lines.append('')
+    lines.append(f'{"module":<40}{"self ms":>10}{"cumulative ms":>16}')
+    project_modules = [entry for entry in results['imports'] if entry[0].startswith('swr_ed')]
+    other_modules = [entry for entry in results['imports'] if not entry[0].startswith('swr_ed')][:top]
+    for name, self_us, cumulative_us in project_modules + other_modules:
+        lines.append(f'{name:<40}{self_us / 1000:>10.2f}{cumulative_us / 1000:>16.2f}')
+    return os.linesep.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--file', dest='filename', default='CAPSHPSD.DAT')
+    parser.add_argument('--data-path', help='Use an existing installation instead of a synthetic one')
+    parser.add_argument('--json', help='Write the raw results to this file')
+    args = parser.parse_args(argv)
+
+    results = run(repeat=args.repeat, filename=args.filename, data_path=args.data_path)
+    print(format_results(results))
+    if args.json:
+        with open(args.json, "w") as file_obj:
+            json.dump(results, file_obj, indent=2)
+
+
+if __name__ == '__main__':
+    main()
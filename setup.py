@@ -8,6 +8,9 @@ setup(
     name='SWRebellionEditor',
     version='0.0.1',
     install_requires=requirements,
+    extras_require={
+        'dataframe': ['numpy', 'pandas'],
+    },
     author='Luis Visintini',
     author_email='lvisintini@gmail.com',
     packages=find_packages("src"),
@@ -1,5 +1 @@
-ALL_MANAGERS = []
-MANAGERS_BY_FILE = {}
-
-from . import managers
-
+from .registry import ALL_MANAGERS, MANAGERS_BY_FILE
@@ -4,22 +4,43 @@ import os
 import logging
 import struct
 from collections import OrderedDict
-from functools import cached_property
+from functools import reduce
 from io import BytesIO
-
-from . import ALL_MANAGERS, MANAGERS_BY_FILE
-from .exceptions import SWRebellionEditorDataFileHeaderMismatchError
+from itertools import compress, count, starmap
+from operator import itemgetter, ne
+from time import perf_counter
+
+from .registry import ALL_MANAGERS, MANAGERS_BY_FILE, register_manager
+from .exceptions import (
+    SWRebellionEditorDataFileHeaderMismatchError, SWRebellionEditorReadOnlyError, SWRebellionEditorSchemaMismatchError,
+    SWRebellionEditorValidationError,
+)
 from .constants import FieldType
-from .dll_wrappers import TextStraWrapper
+from .dll_wrappers import TextStraWrapper, get_text_stra
+from .cache import get_data_cache
+from .instrumentation import NULL_SPAN, span, stage_timer, record_timer
+from .schema import Schema
+from .validation import check_data_tuples, key_field, match_loaded_rows, read_only_fields
 
 log = logging.getLogger(__name__)
 
 
+def _new_manager(cls, data_path):
+    return cls(data_path)
+
+
 class FieldDef:
-    def __init__(self, struct_format, field_type, help_text=None):
+    """
+    A field of the rows of a data file. A DENORMALIZED field can name the fields it is derived from in ``sources``,
+    it is then recomputed with ``formula`` (called with the tuple of their values) when the rows are saved.
+    """
+
+    def __init__(self, struct_format, field_type, help_text=None, sources=None, formula=sum):
         self.format = struct_format
         self.type = field_type
         self.help_text = help_text
+        self.sources = tuple(sources) if sources else None
+        self.formula = formula
 
 
 class SWRBaseManager(ABC):
@@ -35,6 +56,19 @@ class SWRBaseManager(ABC):
     expected_md5_checksum = None
     byte_order = '<'  # we assume little-endian https://docs.python.org/3/library/struct.html#struct-alignment
 
+    # Compiled once per class, see compile_structs
+    header_struct = None
+    schema = None
+
+    # Managers over data that is shared with other processes (see swr_ed.shared) can not write their file
+    read_only = False
+
+    # The packed rows of an unpickled manager, decoded into ``data`` on first access
+    _pending_rows = None
+
+    # The values of some fields of ``loaded_rows``, see get_loaded_values
+    _loaded_values = (None, None)
+
     @property
     @abstractmethod
     def data_struct(self) -> struct.Struct:
@@ -43,96 +77,461 @@ class SWRBaseManager(ABC):
     def __init__(self, data_path: str = None):
         self.data_path = data_path
         self.file_path = os.path.join(self.data_path, self.file_location, self.filename)
-        self.header_struct = struct.Struct(self.byte_order + self.header_struct_format)
         self.header_count = None
         self.data = None
         self.md5_checksum = None
+        self.text_timer = None
+        # The packed rows as last read from (or written to) the data file, the READ_ONLY fields are checked
+        # against them before saving
+        self.loaded_rows = None
+
+    @property
+    def data(self):
+        if self._pending_rows is not None:
+            payload, self._pending_rows = self._pending_rows, None
+            self._data = [self.upgrade_data(data_tuple) for data_tuple in self.data_struct.iter_unpack(payload)]
+        return self._data
+
+    @data.setter
+    def data(self, value):
+        self._pending_rows = None
+        self._data = value
+
+    def __reduce__(self):
+        # Only the packed rows are sent, see __setstate__
+        return _new_manager, (type(self), self.data_path), self.get_state()
+
+    def get_state(self):
+        """
+        A compact picklable state: the rows packed as in the data file and the fingerprint of the schema they
+        were packed with, instead of the decoded rows.
+        """
+        rows = self.get_packed_rows()
+        loaded_rows = self.loaded_rows
+        if loaded_rows is not None and loaded_rows == rows:
+            # Pickled once, as a reference to ``rows``
+            loaded_rows = rows
+        return {
+            'file_path': self.file_path,
+            'schema': self.schema.fingerprint,
+            'rows': rows,
+            'loaded_rows': loaded_rows,
+            'header_count': self.header_count,
+            'md5_checksum': self.md5_checksum,
+            'read_only': self.read_only,
+        }
+
+    def __setstate__(self, state):
+        if state['schema'] != self.schema.fingerprint:
+            raise SWRebellionEditorSchemaMismatchError(
+                f'Manager {self.__class__.__name__} has schema {self.schema.fingerprint}, '
+                f'but the rows were packed with schema {state["schema"]}.'
+            )
+        self.file_path = state['file_path']
+        self.header_count = state['header_count']
+        self.md5_checksum = state['md5_checksum']
+        if state['read_only']:
+            self.read_only = True
+        self.loaded_rows = state.get('loaded_rows')
+        self.set_packed_rows(state['rows'])
+
+    def set_packed_rows(self, rows):
+        """
+        Replaces the data with rows packed as in the data file, which are decoded on first access to ``data``.
+        """
+        self.data = None
+        self._pending_rows = rows
 
     def __init_subclass__(cls, **kwargs):
         super().__init_subclass__(**kwargs)
+        cls.compile_structs()
         if cls.filename:
-            ALL_MANAGERS.append(cls)
-            ALL_MANAGERS.sort(key=lambda m: m.filename)
-            MANAGERS_BY_FILE[cls.filename] = cls
+            register_manager(cls)
 
-    def load_stream_from_file(self):
-        file_stream = BytesIO()
-        with open(self.file_path, "rb") as file_obj:
-            file_stream.write(file_obj.read())
-        file_stream.seek(0)
-        self.md5_checksum = hashlib.md5(file_stream.read()).hexdigest()
-        file_stream.seek(0)
-        return file_stream
-
-    def load(self):
-        header_stream = BytesIO()
-        data_stream = BytesIO()
-
-        file_stream = self.load_stream_from_file()
+    @classmethod
+    def compile_structs(cls):
+        """
+        Compiles the header and data structs when the class is created, so that creating instances is cheap.
+        """
+        if cls.header_struct_format:
+            cls.header_struct = struct.Struct(cls.byte_order + cls.header_struct_format)
+        cls.schema = cls.build_schema()
+        if cls.schema is not None:
+            cls.data_struct = cls.schema.struct
 
-        loaded_md5_checksum = hashlib.md5(file_stream.read()).hexdigest()
-        file_stream.seek(0)
+    @classmethod
+    def build_schema(cls):
+        return None
 
-        header_stream.write(file_stream.read(self.header_struct.size))
-        data_stream.write(file_stream.read())
-        header_stream.seek(0)
-        data_stream.seek(0)
+    def load_stream_from_file(self):
+        with span('read', self) as read_span:
+            with open(self.file_path, "rb") as file_obj:
+                content = file_obj.read()
+            read_span.set_tag('bytes', len(content))
 
-        header = self.header_struct.unpack(header_stream.read())
+        with span('hash', self, bytes=len(content)):
+            self.md5_checksum = hashlib.md5(content).hexdigest()
+        return BytesIO(content)
 
-        if loaded_md5_checksum != self.expected_md5_checksum:
-            if header != self.expected_header:
-                raise SWRebellionEditorDataFileHeaderMismatchError(
-                    f'Manager {self.__class__.__name__} expected header '
-                    f'{self.expected_header} for data file , but got {header} instead.'
-                )
-        else:
+    def check_header(self, header, md5_checksum):
+        if md5_checksum != self.expected_md5_checksum:
             # if the checksums for the original files do not match, then ignore the second value.
             # Invariably, that value is an integer that corresponds with the number items/groups in the file
 
             expected = [v if i != 1 else 'XXX' for i, v in enumerate(self.expected_header)]
             actual = [v if i != 1 else 'XXX' for i, v in enumerate(header)]
 
-            if header != self.expected_header:
+            if actual != expected:
                 raise SWRebellionEditorDataFileHeaderMismatchError(
                     f'Manager {self.__class__.__name__} expected header '
                     f'{expected} for data file , but got {actual} instead.'
                 )
+        else:
+            if header != self.expected_header:
+                raise SWRebellionEditorDataFileHeaderMismatchError(
+                    f'Manager {self.__class__.__name__} expected header '
+                    f'{self.expected_header} for data file , but got {header} instead.'
+                )
+
+    def load(self):
+        cache = get_data_cache()
+        if cache is not None:
+            with span('cache', self) as cache_span:
+                hit = cache.load(self)
+                cache_span.set_tag('hit', hit)
+            if hit:
+                return
+
+        with span('load', self) as load_span:
+            file_stream = self.load_stream_from_file()
+            with file_stream.getbuffer() as content:
+                self.load_buffer(content, load_span)
+
+        if cache is not None:
+            cache.store(self)
+
+    def load_buffer(self, content, load_span=NULL_SPAN):
+        """
+        Parses the whole content of a data file from a bytes-like object, ``self.md5_checksum`` must already be set.
+        The content is not copied, so it can be a view over a mapped file or shared memory.
+        """
+        with span('header', self, bytes=self.header_struct.size):
+            header = self.header_struct.unpack_from(content)
+            self.check_header(header, self.md5_checksum)
 
         self.header_count = header[1]
 
-        self.data = []
-        for data_tuple in self.data_struct.iter_unpack(data_stream.read()):
-            data = self.upgrade_data(data_tuple)
-            self.data.append(data)
+        with span('unpack', self) as unpack_span:
+            with memoryview(content)[self.header_struct.size:] as payload:
+                data_tuples = list(self.data_struct.iter_unpack(payload))
+                unpack_span.set_tag('bytes', len(payload))
+                if not self.read_only:
+                    self.loaded_rows = bytes(payload)
+        load_span.set_tag('bytes', len(content))
+
+        with span('upgrade', self, rows=len(data_tuples)):
+            self.text_timer = stage_timer()
+            self.data = []
+            for data_tuple in data_tuples:
+                data = self.upgrade_data(data_tuple)
+                self.data.append(data)
+            record_timer('text', self, self.text_timer)
+            self.text_timer = None
+
+    def iter_records(self, upgrade=True, chunk_rows=4096):
+        """
+        Yields the rows of the data file one at a time without ever holding the whole file in memory.
+        The file is read in chunks of ``chunk_rows`` rows.
+
+        The header is validated before any row is yielded. Since the checksum is not known at that point,
+        the row count in the header is not checked. The checksum is computed while streaming and is available
+        in ``self.md5_checksum`` once all rows have been consumed.
+        """
+        md5 = hashlib.md5()
+        record_size = self.data_struct.size
+        with open(self.file_path, "rb") as file_obj:
+            header_bytes = file_obj.read(self.header_struct.size)
+            md5.update(header_bytes)
+            header = self.header_struct.unpack(header_bytes)
+            self.check_header(header, None)
+            self.header_count = header[1]
+
+            pending = b''
+            while True:
+                chunk = file_obj.read(record_size * chunk_rows)
+                if not chunk:
+                    break
+                md5.update(chunk)
+                if pending:
+                    chunk = pending + chunk
+                usable = len(chunk) - len(chunk) % record_size
+                pending = chunk[usable:]
+                for data_tuple in self.data_struct.iter_unpack(memoryview(chunk)[:usable]):
+                    yield self.upgrade_data(data_tuple) if upgrade else data_tuple
+
+            if pending:
+                raise struct.error(
+                    f'{self.file_path} ends with {len(pending)} bytes that are not a full {record_size} bytes row'
+                )
+        self.md5_checksum = md5.hexdigest()
 
-    def prepare_output_stream(self):
-        stream = BytesIO()
-        new_header = [self.expected_header[0], self.get_count()] + list(self.expected_header[2:])
+    def check_data(self, data_tuples=None, allow_read_only=False):
+        """
+        Checks the rows before they are packed: every value must fit the struct code of its field and, unless
+        ``allow_read_only``, the READ_ONLY fields must still have the values they were loaded with.
+        ``data_tuples`` are the downgraded rows, they are taken from ``data`` when not given.
+        Returns the list of issues (see swr_ed.validation), the line of an issue is the index of the row.
+        """
+        if data_tuples is None:
+            data_tuples = [tuple(self.downgrade_data(entry)) for entry in self.data]
+        loaded_tuples = None
+        if self.loaded_rows is not None and not allow_read_only:
+            loaded_tuples = list(self.data_struct.iter_unpack(self.loaded_rows))
+        with span('check', self, rows=len(data_tuples)):
+            return check_data_tuples(self.schema, data_tuples, loaded_tuples, self.filename)
+
+    def get_loaded_values(self, indexes):
+        """
+        Returns the values of the fields at ``indexes`` (as returned by ``itemgetter(*indexes)``) of every loaded row.
+        They are unpacked once per load (or save), rather than on every save.
+        """
+        loaded_rows, values = self._loaded_values
+        if loaded_rows is not self.loaded_rows:
+            values = {}
+            self._loaded_values = (self.loaded_rows, values)
+        if indexes not in values:
+            values[indexes] = list(map(itemgetter(*indexes), self.data_struct.iter_unpack(self.loaded_rows)))
+        return values[indexes]
+
+    def read_only_changed(self, data_tuples, allow_read_only=False):
+        """
+        Tells whether the READ_ONLY fields of ``data_tuples`` may differ from the loaded rows. This is a quick
+        comparison by position: rows that were deleted or moved, and added rows with the key of a loaded row, make
+        it True, check_data then matches the rows by their key to tell.
+        """
+        if allow_read_only or self.loaded_rows is None:
+            return False
+        indexes = tuple(field.index for field in read_only_fields(self.schema))
+        if not indexes:
+            return False
+        loaded = self.get_loaded_values(indexes)
+        rows = min(len(loaded), len(data_tuples))
+        if list(map(itemgetter(*indexes), data_tuples[:rows])) != loaded[:rows]:
+            return True
+        key = key_field(self.schema)
+        if key is None or len(data_tuples) == rows:
+            return False
+        loaded_keys = set(self.get_loaded_values((key.index,)))
+        return any(data_tuple[key.index] in loaded_keys for data_tuple in data_tuples[rows:])
+
+    def loaded_matches(self, data_tuples):
+        """
+        Returns, for every row of ``data_tuples``, the index of the loaded row it matches (see match_loaded_rows),
+        or None when the rows are still in their loaded positions.
+        """
+        key = key_field(self.schema)
+        if key is None:
+            return None
+        keys = [data_tuple[key.index] for data_tuple in data_tuples]
+        loaded_keys = self.get_loaded_values((key.index,))
+        if keys[:len(loaded_keys)] == loaded_keys and len(keys) <= len(loaded_keys):
+            return None
+        return match_loaded_rows(keys, loaded_keys)
+
+    def changed_rows(self, data_tuples, indexes):
+        """
+        Returns the indexes of the rows of ``data_tuples`` whose fields at ``indexes`` differ from the loaded rows
+        they match (see loaded_matches). The added rows (all of them when nothing was loaded) are included.
+        """
+        if self.loaded_rows is None:
+            return list(range(len(data_tuples)))
+        loaded = self.get_loaded_values(indexes)
+        matches = self.loaded_matches(data_tuples)
+        if matches is None:
+            changed = compress(count(), map(ne, map(itemgetter(*indexes), data_tuples), loaded))
+            return list(changed) + list(range(len(loaded), len(data_tuples)))
+        current = list(map(itemgetter(*indexes), data_tuples))
+        return [index for index, match in enumerate(matches) if match is None or current[index] != loaded[match]]
+
+    def update_derived_fields(self, data_tuples, entries=None):
+        """
+        Recomputes the derived fields (see FieldDef) of the rows of ``data_tuples`` whose sources changed since they
+        were loaded, one derived field at a time over all of those rows. Rows whose sources did not change are left
+        as they are, so the rows of a stock file are saved as they were loaded.
 
-        stream.write(self.header_struct.pack(*new_header))
+        ``data_tuples`` is updated in place, and so are ``entries`` (the rows of ``data``) when given.
+        Returns the indexes of the rows recomputed.
+        """
+        derived = self.schema.derived
+        if not derived:
+            return []
+        derived_indexes = {item.field.index for item in derived}
+        sources = tuple(sorted({
+            index for item in derived for index in item.sources if index not in derived_indexes
+        }))
+        dirty = self.changed_rows(data_tuples, sources)
+        if not dirty:
+            return dirty
+
+        rows = [list(data_tuples[index]) for index in dirty]
+        for field, source_indexes, formula in derived:
+            getter = itemgetter(*source_indexes)
+            values = map(getter, rows) if len(source_indexes) > 1 else ((value,) for value in map(getter, rows))
+            for row, value in zip(rows, map(formula, values)):
+                row[field.index] = value
+
+        for index, row in zip(dirty, rows):
+            data_tuples[index] = tuple(row)
+            if entries is not None:
+                for item in derived:
+                    entries[index][item.field.name] = row[item.field.index]
+        return dirty
+
+    def pack_data_tuples(self, data_tuples, allow_read_only=False):
+        """
+        Packs the rows of a data file after checking them (see check_data). A SWRebellionEditorValidationError with
+        every issue found is raised instead of packing any bad value.
+        """
+        with span('pack', self, rows=len(data_tuples)):
+            try:
+                # struct checks the type and range of every value in C, the rows are only checked one
+                # column at a time (to report every bad value) when it fails
+                payload = b''.join(starmap(self.data_struct.pack, data_tuples))
+            except struct.error:
+                payload = None
+        changed = payload != self.loaded_rows
+        if payload is None or (changed and self.read_only_changed(data_tuples, allow_read_only)):
+            issues = self.check_data(data_tuples, allow_read_only)
+            if issues:
+                raise SWRebellionEditorValidationError(issues)
+            # A value that the checks let through, struct raises its own error
+            payload = b''.join(starmap(self.data_struct.pack, data_tuples))
+        return payload
+
+    def pack_rows_from(self, data_tuples, loaded_rows, allow_read_only=False):
+        """
+        Packs rows that were computed from ``loaded_rows`` (the packed rows they were read from, None for new rows)
+        as save does: the derived fields of the rows whose sources changed are recomputed, and the rows are checked
+        against ``loaded_rows`` (see pack_data_tuples). This is for the writers that do not go through ``data``,
+        like the importer or streaming.transform. ``data_tuples`` is updated in place.
+        """
+        self.loaded_rows = loaded_rows
+        self.update_derived_fields(data_tuples)
+        return self.pack_data_tuples(data_tuples, allow_read_only)
 
+    def prepare_output_stream(self, allow_read_only=False):
+        """
+        Returns a stream with the content of the data file. The derived fields of the rows that changed are
+        recomputed and the rows are checked (see check_data), a SWRebellionEditorValidationError with every
+        issue found is raised instead of writing any bad value.
+        """
+        if self._pending_rows is not None:
+            # The rows were never decoded. Being packed, they fit their fields, so they are written as they are
+            # unless they changed since they were loaded.
+            if self._pending_rows != self.loaded_rows:
+                data_tuples = list(self.data_struct.iter_unpack(self._pending_rows))
+                if self.update_derived_fields(data_tuples):
+                    self._pending_rows = self.pack_data_tuples(data_tuples, allow_read_only)
+                elif self.read_only_changed(data_tuples, allow_read_only):
+                    issues = self.check_data(data_tuples, allow_read_only)
+                    if issues:
+                        raise SWRebellionEditorValidationError(issues)
+            with span('prepare_output_stream', self, bytes=len(self._pending_rows)):
+                rows = reduce(self.count_row, self.data_struct.iter_unpack(self._pending_rows), 0)
+                new_header = [self.expected_header[0], rows] + list(self.expected_header[2:])
+                return BytesIO(self.header_struct.pack(*new_header) + self._pending_rows)
+
+        with span('prepare_output_stream', self) as output_span:
+            data_tuples = [tuple(self.downgrade_data(entry)) for entry in self.data]
+            payload = self.pack_data_tuples(data_tuples, allow_read_only)
+            # Rows that are saved as they were loaded have nothing to recompute
+            if payload != self.loaded_rows and self.update_derived_fields(data_tuples, self.data):
+                payload = self.pack_data_tuples(data_tuples, allow_read_only)
+
+            stream = BytesIO()
+            new_header = [self.expected_header[0], self.get_count()] + list(self.expected_header[2:])
+
+            stream.write(self.header_struct.pack(*new_header))
+            stream.write(payload)
+
+            output_span.set_tag('bytes', stream.tell())
+            stream.seek(0)
+            return stream
+
+    def pack_rows(self):
+        output = bytearray()
         for entry in self.data:
-            data_tuple = self.downgrade_data(entry)
-            stream.write(self.data_struct.pack(*data_tuple))
+            output += self.data_struct.pack(*self.downgrade_data(entry))
+        return bytes(output)
 
-        stream.seek(0)
-        return stream
+    def get_packed_rows(self):
+        """
+        Returns the rows packed as in the data file, without decoding them if they were not decoded yet,
+        or None when nothing is loaded.
+        """
+        if self._pending_rows is not None:
+            return self._pending_rows
+        if self._data is not None:
+            return self.pack_rows()
+        return None
 
-    def save(self):
-        stream = self.prepare_output_stream()
+    def to_dataframe(self, texts=True):
+        """
+        Returns the rows as a pandas DataFrame, see swr_ed.dataframe.
+        """
+        from .dataframe import to_dataframe
+        return to_dataframe(self, texts)
+
+    def from_dataframe(self, dataframe):
+        """
+        Replaces the rows with those of a pandas DataFrame, see swr_ed.dataframe.
+        """
+        from .dataframe import from_dataframe
+        from_dataframe(self, dataframe)
+
+    def save(self, allow_read_only=False):
+        """
+        Writes the data file. With ``allow_read_only``, changes to the READ_ONLY fields are written too.
+        """
+        self.check_writable()
+        stream = self.prepare_output_stream(allow_read_only)
         self.save_stream_to_file(stream)
 
+    def check_writable(self):
+        if self.read_only:
+            raise SWRebellionEditorReadOnlyError(
+                f'Manager {self.__class__.__name__} is read-only and can not write {self.file_path}.'
+            )
+
     def save_stream_to_file(self, stream):
-        stream.seek(0)
-        with open(self.file_path, "wb") as file_obj:
-            file_obj.write(stream.read())
-        stream.seek(0)
-        self.md5_checksum = hashlib.md5(stream.read()).hexdigest()
+        self.check_writable()
+        with span('save_stream_to_file', self) as save_span:
+            stream.seek(0)
+            content = stream.read()
+            save_span.set_tag('bytes', len(content))
+            with span('write', self, bytes=len(content)):
+                with open(self.file_path, "wb") as file_obj:
+                    file_obj.write(content)
+            with span('hash', self, bytes=len(content)):
+                self.md5_checksum = hashlib.md5(content).hexdigest()
+            self.loaded_rows = content[self.header_struct.size:]
+            stream.seek(0)
 
     def get_count(self):
         return len(self.data)
 
+    def count_row(self, count, data_tuple):
+        """
+        The streaming counterpart of get_count, returns the header count after ``data_tuple`` is written.
+        """
+        return count + 1
+
+    def merge_counts(self, counts):
+        """
+        Merges the counts of rows written separately (see ``count_row``) into the count of the whole file.
+        """
+        return sum(counts)
+
     def upgrade_data(self, data_tuple):
         """
         A method to enhance each data row after it has been unpacked from the file.
@@ -154,9 +553,11 @@ class SimpleSWRManager(SWRBaseManager):
     data_struct_format = None
     data_struct = None
 
-    def __init__(self, data_path=None):
-        super().__init__(data_path=data_path)
-        self.data_struct = struct.Struct(self.byte_order + self.data_struct_format)
+    @classmethod
+    def build_schema(cls):
+        if cls.data_struct_format:
+            return Schema.from_format(cls.byte_order, cls.data_struct_format, cls.header_struct_format)
+        return None
 
 
 class FieldsMeta(type):
@@ -186,29 +587,37 @@ class SWRDataManager(SWRBaseManager, metaclass=SWRBaseFieldManagerIntermediateMe
     header_struct_format = "IIII"
 
     fields = None
+    data_struct = None
 
-    @cached_property
-    def data_struct(self):
-        return struct.Struct(
-            self.byte_order + ''.join([field.format for field in self.fields.values()])
-        )
+    @classmethod
+    def build_schema(cls):
+        if cls.fields:
+            return Schema.from_fields(cls.byte_order, cls.fields, cls.header_struct_format)
+        return None
 
     def __init__(self, data_path=None):
         super().__init__(data_path=data_path)
-
-        self.header_struct = struct.Struct(
-            self.byte_order + self.header_struct_format
-        )
         self.text_stra = TextStraWrapper(self.data_path)
 
+    def get_state(self):
+        state = super().get_state()
+        state['text_fingerprint'] = getattr(self.text_stra, 'fingerprint', None)
+        return state
+
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        if state['text_fingerprint'] is not None:
+            # Managers unpickled in the same process share the string table instead of opening the DLL each
+            self.text_stra = get_text_stra(self.data_path, state['text_fingerprint'])
+
     def upgrade_data(self, data_tuple):
-        data_dict = OrderedDict(zip(list(self.fields.keys()), data_tuple))
+        data_dict = OrderedDict(zip(self.schema.names, data_tuple))
         if 'name_id_1' in data_dict:
             data_dict.update(self.get_texts(name=data_dict['name_id_1']))
         return data_dict
 
     def downgrade_data(self, data):
-        return (data[attr] for attr in list(self.fields.keys()))
+        return (data[attr] for attr in self.schema.names)
 
     def get_texts(self, **kwargs):
         res = {}
@@ -217,7 +626,13 @@ class SWRDataManager(SWRBaseManager, metaclass=SWRBaseFieldManagerIntermediateMe
         return res
 
     def get_text(self, text_id):
-        return self.text_stra.get_text(text_id)
+        if self.text_timer is None:
+            return self.text_stra.get_text(text_id)
+        start = perf_counter()
+        try:
+            return self.text_stra.get_text(text_id)
+        finally:
+            self.text_timer.add(perf_counter() - start)
 
 
 class TableDataManager(SWRDataManager):
@@ -242,3 +657,9 @@ class GroupedTableManager(SimpleSWRManager):
 
     def get_count(self):
         return max([entry[0] for entry in self.data])
+
+    def count_row(self, count, data_tuple):
+        return max(count, data_tuple[0])
+
+    def merge_counts(self, counts):
+        return max(counts, default=0)
@@ -0,0 +1,170 @@
+"""
+An opt-in cache of the decoded rows of data files.
+
+Nothing is cached until a cache is installed with ``set_data_cache``. Afterwards ``manager.load()`` returns the rows
+from the cache, without decoding them, when the content of the data file did not change since it was cached.
+
+    from swr_ed.cache import DataCache, set_data_cache
+
+    set_data_cache(DataCache('~/.cache/swr_ed', max_bytes=256 * 1024 * 1024))
+
+Entries are keyed by the manager class, the fingerprint of its schema and the md5 checksum of the content of the
+data file. Changing the fields of a manager or the content of the file makes the old entries unreachable; they are
+evicted, least recently used first, when the cache grows over ``max_bytes``. The checksum of a file is kept in a
+DigestCache (see swr_ed.scan) and only computed again when the stat of the file changes.
+"""
+import hashlib
+import os
+import pickle
+import threading
+import time
+
+from .scan import DigestCache, file_md5
+
+CACHE_FORMAT_VERSION = 3
+
+# A file whose timestamps are this recent may still change without them changing (their granularity is as coarse as
+# 2 seconds on FAT), so its checksum is not kept
+RACY_WINDOW_NS = 2 * 10 ** 9
+
+_cache = None
+
+
+def set_data_cache(cache):
+    """
+    Installs ``cache`` for all the managers, ``None`` disables caching. Returns the cache previously installed.
+    """
+    global _cache
+    previous, _cache = _cache, cache
+    return previous
+
+
+def get_data_cache():
+    return _cache
+
+
+class DataCache:
+    suffix = '.pickle'
+
+    def __init__(self, directory, max_bytes=256 * 1024 * 1024):
+        self.directory = os.path.abspath(os.path.expanduser(directory))
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.digests = DigestCache()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def content_digest(self, file_path):
+        """
+        Returns the md5 checksum of the content of ``file_path``, read again only when its stat changed.
+        """
+        stat = os.stat(file_path)
+        md5_checksum = self.digests.get(file_path, stat)
+        if md5_checksum is None:
+            md5_checksum = file_md5(file_path)
+            if time.time_ns() - max(stat.st_mtime_ns, stat.st_ctime_ns) > RACY_WINDOW_NS:
+                self.digests.put(file_path, stat, md5_checksum)
+        return md5_checksum
+
+    def key(self, manager):
+        """
+        Returns the key of the entry for the file of ``manager``, or None if the file does not exist.
+        """
+        file_path = os.path.abspath(manager.file_path)
+        try:
+            digest = self.content_digest(file_path)
+        except OSError:
+            return None
+        manager_cls = type(manager)
+        # The decoded rows hold texts of TEXTSTRA.DLL, so they are only valid for the same DLL
+        text_stra = getattr(manager, 'text_stra', None)
+        signature = repr((
+            CACHE_FORMAT_VERSION, manager_cls.__module__, manager_cls.__qualname__, manager_cls.schema.fingerprint,
+            digest, getattr(text_stra, 'fingerprint', None),
+        ))
+        return hashlib.md5(signature.encode()).hexdigest()
+
+    def entry_path(self, key):
+        return os.path.join(self.directory, key + self.suffix)
+
+    def load(self, manager):
+        """
+        Fills ``manager`` from the cache. Returns False, leaving the manager untouched, when there is no entry.
+        """
+        key = self.key(manager)
+        if key is None:
+            return False
+        path = self.entry_path(key)
+        try:
+            with open(path, "rb") as file_obj:
+                md5_checksum, header_count, data, loaded_rows = pickle.loads(file_obj.read())
+        except FileNotFoundError:
+            return False
+        except Exception:
+            # A truncated or otherwise unreadable entry is dropped and treated as a miss
+            self.remove(path)
+            return False
+
+        try:
+            # The modification time orders the entries for eviction
+            os.utime(path)
+        except OSError:
+            pass
+        manager.md5_checksum = md5_checksum
+        manager.header_count = header_count
+        manager.data = data
+        manager.loaded_rows = loaded_rows
+        return True
+
+    def store(self, manager):
+        key = self.key(manager)
+        if key is None:
+            return
+        content = pickle.dumps(
+            (manager.md5_checksum, manager.header_count, manager.data, manager.loaded_rows),
+            protocol=pickle.HIGHEST_PROTOCOL,
+        )
+        path = self.entry_path(key)
+        temp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(temp_path, "wb") as file_obj:
+            file_obj.write(content)
+        os.replace(temp_path, path)
+        self.evict()
+
+    def entries(self):
+        """
+        Returns a list of (modification time, size, path) of the entries, least recently used first.
+        """
+        entries = []
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith(self.suffix):
+                continue
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        return sorted(entries)
+
+    def size(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self):
+        with self.lock:
+            entries = self.entries()
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                self.remove(path)
+                total -= size
+
+    def clear(self):
+        for _, _, path in self.entries():
+            self.remove(path)
+
+    @staticmethod
+    def remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -33,3 +33,14 @@ class Families(Enum):
     SECTORS = 128
     CORE_SYSTEMS = 144
     OUTER_RIM_SYSTEMS = 146
+
+
+# Family of the facilities that produce the rows of each data file
+PRODUCING_FACILITY_FAMILIES = {
+    'FIGHTSD.DAT': Families.ORBITAL_SHIPYARDS.value,
+    'CAPSHPSD.DAT': Families.ORBITAL_SHIPYARDS.value,
+    'TROOPSD.DAT': Families.TRAINING_FACILITIES.value,
+    'DEFFACSD.DAT': Families.CONSTRUCTION_YARDS.value,
+    'MANFACSD.DAT': Families.CONSTRUCTION_YARDS.value,
+    'PROFACSD.DAT': Families.CONSTRUCTION_YARDS.value,
+}
@@ -0,0 +1,148 @@
+"""
+Conversion of the rows of a manager to and from pandas DataFrames (``pip install SWRebellionEditor[dataframe]``).
+
+The rows go through a numpy structured array whose dtype is derived from the schema, with the exact types of the
+struct codes (uint32, uint16, int8, fixed size bytes, etc). The array is a view over a copy of the packed rows, so no
+dict or list is built per row.
+"""
+from .exceptions import SWRebellionEditorValidationError
+from .importer import current_rows
+from .schema import INTEGER_CODES
+from .validation import ValidationIssue
+
+INSTALL_HINT = 'install it with: pip install SWRebellionEditor[dataframe]'
+
+
+def _import_numpy():
+    try:
+        import numpy
+    except ImportError as error:
+        raise ImportError(f'numpy is needed for this, {INSTALL_HINT}') from error
+    return numpy
+
+
+def _import_pandas():
+    try:
+        import pandas
+    except ImportError as error:
+        raise ImportError(f'pandas is needed for this, {INSTALL_HINT}') from error
+    return pandas
+
+
+def structured_dtype(schema):
+    """
+    Returns the numpy dtype of a row of ``schema``, with the same offsets and size as its struct.
+    """
+    numpy = _import_numpy()
+    byte_order = '<' if schema.byte_order in '<@=' else '>'
+    formats = []
+    for field in schema.fields:
+        if field.format in INTEGER_CODES:
+            formats.append(f'{byte_order}{"i" if field.signed else "u"}{field.size}')
+        elif field.format.endswith('s'):
+            formats.append(f'S{field.size}')
+        elif field.format in 'efd':
+            formats.append(f'{byte_order}f{field.size}')
+        else:
+            formats.append(f'V{field.size}')
+    return numpy.dtype({
+        'names': list(schema.names),
+        'formats': formats,
+        'offsets': [field.offset for field in schema.fields],
+        'itemsize': schema.size,
+    })
+
+
+def packed_rows(manager):
+    """
+    Returns the rows of ``manager`` packed as in its data file: from ``data`` when it is loaded, otherwise straight
+    from the file.
+    """
+    rows = manager.get_packed_rows()
+    if rows is not None:
+        return rows
+    with open(manager.file_path, "rb") as file_obj:
+        content = file_obj.read()
+    header = manager.header_struct.unpack_from(content)
+    manager.check_header(header, None)
+    return content[manager.header_struct.size:]
+
+
+def to_records(manager):
+    """
+    Returns the rows of ``manager`` as a numpy structured array, a view over a (writable) copy of the packed rows.
+    """
+    numpy = _import_numpy()
+    return numpy.frombuffer(bytearray(packed_rows(manager)), dtype=structured_dtype(manager.schema))
+
+
+def to_dataframe(manager, texts=True):
+    """
+    Returns a DataFrame with a column per field. With ``texts``, a ``name`` column is added for the managers
+    with names in TEXTSTRA.DLL, resolved once per distinct ``name_id_1``.
+    """
+    pandas = _import_pandas()
+    records = to_records(manager)
+    dataframe = pandas.DataFrame({name: records[name] for name in manager.schema.names}, copy=False)
+    if texts and 'name_id_1' in manager.schema.names and hasattr(manager, 'get_text'):
+        names = {text_id: manager.get_text(int(text_id)) for text_id in pandas.unique(dataframe['name_id_1'])}
+        dataframe['name'] = dataframe['name_id_1'].map(names)
+    return dataframe
+
+
+def check_dataframe(schema, dataframe, source=None):
+    """
+    Checks that every field of ``schema`` has a column in ``dataframe`` with values that fit its struct code.
+    Returns the list of issues, the line of an issue is the index label of the row.
+    """
+    numpy = _import_numpy()
+    issues = []
+    for field in schema.fields:
+        if field.name not in dataframe.columns:
+            issues.append(ValidationIssue(source, None, field.name, None, 'is missing'))
+            continue
+        values = dataframe[field.name].to_numpy()
+        if field.format in INTEGER_CODES:
+            if values.dtype.kind not in 'iu':
+                issues.append(ValidationIssue(
+                    source, None, field.name, str(values.dtype), f'is not an integer column ({field.format})'
+                ))
+                continue
+            if not len(values) or (values.min() >= field.min and values.max() <= field.max):
+                continue
+            bad = numpy.flatnonzero((values < field.min) | (values > field.max))
+            issues.extend(
+                ValidationIssue(
+                    source, dataframe.index[index], field.name, values[index].item(),
+                    f'is out of the range [{field.min}, {field.max}] of {field.format}',
+                )
+                for index in bad
+            )
+        elif field.format.endswith('s'):
+            for index, value in enumerate(values):
+                if not isinstance(value, bytes) or len(value) > field.size:
+                    issues.append(ValidationIssue(
+                        source, dataframe.index[index], field.name, value, f'is not at most {field.size} bytes'
+                    ))
+    return issues
+
+
+def from_dataframe(manager, dataframe):
+    """
+    Replaces the rows of ``manager`` with those of ``dataframe``, after checking them. Columns that are not fields
+    are ignored. Raises a SWRebellionEditorValidationError with all the values that do not fit.
+
+    When ``manager`` was not loaded, the rows of its data file are taken as the loaded rows, so that ``save()``
+    still checks the READ_ONLY fields against them.
+    """
+    numpy = _import_numpy()
+    issues = check_dataframe(manager.schema, dataframe, manager.filename)
+    if issues:
+        raise SWRebellionEditorValidationError(issues)
+
+    records = numpy.empty(len(dataframe), dtype=structured_dtype(manager.schema))
+    for name in manager.schema.names:
+        records[name] = dataframe[name].to_numpy()
+    if manager.loaded_rows is None:
+        manager.loaded_rows = current_rows(manager)
+    manager.set_packed_rows(records.tobytes())
@@ -1 +1 @@
-from .textstra import TextStraWrapper
+from .textstra import TextStraWrapper, get_text_stra
@@ -0,0 +1,200 @@
+"""
+A pure python reader (and writer) for the string tables stored in the resources of a PE (Windows DLL/EXE) file.
+
+This allows reading TEXTSTRA.DLL on platforms where the Windows API is not available.
+String tables are stored in blocks of 16 strings. Block N holds the strings with ids (N - 1) * 16 to N * 16 - 1,
+each one stored as a 16 bits length followed by that many UTF-16 code units.
+"""
+import struct
+
+RT_STRING = 6
+LANG_EN_US = 0x0409
+
+DOS_HEADER = struct.Struct('<2s58xI')
+COFF_HEADER = struct.Struct('<4sHHIIIHH')
+SECTION_HEADER = struct.Struct('<8sIIIIIIHHI')
+RESOURCE_DIRECTORY = struct.Struct('<IIHHHH')
+RESOURCE_DIRECTORY_ENTRY = struct.Struct('<II')
+RESOURCE_DATA_ENTRY = struct.Struct('<IIII')
+
+PE32_MAGIC = 0x10b
+PE32_PLUS_MAGIC = 0x20b
+RESOURCE_TABLE_INDEX = 2
+SUBDIRECTORY_FLAG = 0x80000000
+
+FILE_ALIGNMENT = 0x200
+SECTION_ALIGNMENT = 0x1000
+
+
+class PEFormatError(ValueError):
+    pass
+
+
+def _rva_to_offset(sections, rva):
+    for virtual_address, virtual_size, raw_offset, raw_size in sections:
+        if virtual_address <= rva < virtual_address + max(virtual_size, raw_size):
+            return rva - virtual_address + raw_offset
+    raise PEFormatError(f'RVA {rva:#x} is not mapped by any section')
+
+
+def _directory_entries(data, offset):
+    _, _, _, _, named, ids = RESOURCE_DIRECTORY.unpack_from(data, offset)
+    offset += RESOURCE_DIRECTORY.size
+    for index in range(named + ids):
+        yield RESOURCE_DIRECTORY_ENTRY.unpack_from(data, offset + index * RESOURCE_DIRECTORY_ENTRY.size)
+
+
+def _decode_block(data, block_id):
+    strings = {}
+    offset = 0
+    for index in range(16):
+        if offset + 2 > len(data):
+            break
+        length, = struct.unpack_from('<H', data, offset)
+        offset += 2
+        if length:
+            strings[(block_id - 1) * 16 + index] = data[offset:offset + length * 2].decode('utf-16-le')
+        offset += length * 2
+    return strings
+
+
+def parse_string_table(data):
+    """
+    Returns a dict with all the strings (by string id) in the RT_STRING resources of the PE file in ``data``.
+    """
+    data = memoryview(data).tobytes() if not isinstance(data, bytes) else data
+    magic, pe_offset = DOS_HEADER.unpack_from(data, 0)
+    if magic != b'MZ':
+        raise PEFormatError('Not a PE file, missing MZ signature')
+    signature, _, section_count, _, _, _, optional_header_size, _ = COFF_HEADER.unpack_from(data, pe_offset)
+    if signature != b'PE\0\0':
+        raise PEFormatError('Not a PE file, missing PE signature')
+
+    optional_header_offset = pe_offset + COFF_HEADER.size
+    optional_magic, = struct.unpack_from('<H', data, optional_header_offset)
+    if optional_magic == PE32_MAGIC:
+        directories_offset = optional_header_offset + 96
+    elif optional_magic == PE32_PLUS_MAGIC:
+        directories_offset = optional_header_offset + 112
+    else:
+        raise PEFormatError(f'Unknown optional header magic {optional_magic:#x}')
+
+    resources_rva, resources_size = struct.unpack_from('<II', data, directories_offset + RESOURCE_TABLE_INDEX * 8)
+
+    sections = []
+    section_offset = optional_header_offset + optional_header_size
+    for index in range(section_count):
+        _, virtual_size, virtual_address, raw_size, raw_offset, *_ = SECTION_HEADER.unpack_from(
+            data, section_offset + index * SECTION_HEADER.size
+        )
+        sections.append((virtual_address, virtual_size, raw_offset, raw_size))
+
+    strings = {}
+    if not resources_rva:
+        return strings
+
+    root = _rva_to_offset(sections, resources_rva)
+    for type_id, type_offset in _directory_entries(data, root):
+        if type_id != RT_STRING or not type_offset & SUBDIRECTORY_FLAG:
+            continue
+        for block_id, block_offset in _directory_entries(data, root + (type_offset & ~SUBDIRECTORY_FLAG)):
+            languages = list(_directory_entries(data, root + (block_offset & ~SUBDIRECTORY_FLAG)))
+            if not languages:
+                continue
+            # Mimic LoadString on an english system, use the first language available otherwise
+            language_offset = dict(languages).get(LANG_EN_US, languages[0][1])
+            data_rva, size, _, _ = RESOURCE_DATA_ENTRY.unpack_from(data, root + language_offset)
+            block_start = _rva_to_offset(sections, data_rva)
+            strings.update(_decode_block(data[block_start:block_start + size], block_id))
+    return strings
+
+
+def read_string_table(file_path):
+    with open(file_path, "rb") as file_obj:
+        return parse_string_table(file_obj.read())
+
+
+def _align(value, alignment):
+    return (value + alignment - 1) // alignment * alignment
+
+
+def build_string_table_section(strings, section_rva):
+    blocks = {}
+    for string_id, text in strings.items():
+        blocks.setdefault(string_id // 16 + 1, [''] * 16)[string_id % 16] = text
+    block_ids = sorted(blocks)
+
+    def directory(entries):
+        return RESOURCE_DIRECTORY.pack(0, 0, 0, 0, 0, len(entries)) + b''.join(
+            RESOURCE_DIRECTORY_ENTRY.pack(*entry) for entry in entries
+        )
+
+    root_size = RESOURCE_DIRECTORY.size + RESOURCE_DIRECTORY_ENTRY.size
+    blocks_directory_size = RESOURCE_DIRECTORY.size + RESOURCE_DIRECTORY_ENTRY.size * len(block_ids)
+    language_directory_size = RESOURCE_DIRECTORY.size + RESOURCE_DIRECTORY_ENTRY.size
+    languages_offset = root_size + blocks_directory_size
+    data_entries_offset = languages_offset + language_directory_size * len(block_ids)
+    payload_offset = data_entries_offset + RESOURCE_DATA_ENTRY.size * len(block_ids)
+
+    payloads = []
+    for block_id in block_ids:
+        payloads.append(b''.join(
+            struct.pack('<H', len(text.encode('utf-16-le')) // 2) + text.encode('utf-16-le')
+            for text in blocks[block_id]
+        ))
+
+    section = bytearray(directory([(RT_STRING, SUBDIRECTORY_FLAG | root_size)]))
+    section += directory([
+        (block_id, SUBDIRECTORY_FLAG | (languages_offset + index * language_directory_size))
+        for index, block_id in enumerate(block_ids)
+    ])
+    for index in range(len(block_ids)):
+        section += directory([(LANG_EN_US, data_entries_offset + index * RESOURCE_DATA_ENTRY.size)])
+    offset = payload_offset
+    for payload in payloads:
+        section += RESOURCE_DATA_ENTRY.pack(section_rva + offset, len(payload), 0, 0)
+        offset = _align(offset + len(payload), 4)
+    for payload in payloads:
+        section += payload
+        section += b'\0' * (_align(len(section), 4) - len(section))
+    return bytes(section)
+
+
+def build_string_table_dll(strings):
+    """
+    Builds a minimal resource only 32 bits DLL containing ``strings`` (a dict of string id to text) as RT_STRING
+    resources.
+    """
+    headers_size = FILE_ALIGNMENT
+    section_rva = SECTION_ALIGNMENT
+    section = build_string_table_section(strings, section_rva)
+    raw_size = _align(len(section), FILE_ALIGNMENT)
+    image_size = section_rva + _align(len(section), SECTION_ALIGNMENT)
+
+    data_directories = [(0, 0)] * 16
+    data_directories[RESOURCE_TABLE_INDEX] = (section_rva, len(section))
+
+    optional_header = struct.pack(
+        '<HBBIIIIIIIIIHHHHHHIIIIHHIIIIII',
+        PE32_MAGIC, 6, 0, 0, raw_size, 0, 0, 0, section_rva,  # standard fields
+        0x10000000, SECTION_ALIGNMENT, FILE_ALIGNMENT,  # image base and alignment
+        4, 0, 0, 0, 4, 0, 0,  # os, image and subsystem versions, win32 version
+        image_size, headers_size, 0, 2, 0,  # sizes, checksum, subsystem (GUI) and dll characteristics
+        0x100000, 0x1000, 0x100000, 0x1000, 0, len(data_directories),
+    ) + b''.join(struct.pack('<II', *entry) for entry in data_directories)
+
+    pe_offset = DOS_HEADER.size
+    headers = DOS_HEADER.pack(b'MZ', pe_offset)
+    # machine i386, characteristics: executable image, 32 bits machine and dll
+    headers += COFF_HEADER.pack(b'PE\0\0', 0x14c, 1, 0, 0, 0, len(optional_header), 0x2102)
+    headers += optional_header
+    headers += SECTION_HEADER.pack(
+        b'.rsrc', len(section), section_rva, raw_size, headers_size, 0, 0, 0, 0, 0x40000040
+    )
+    headers += b'\0' * (headers_size - len(headers))
+    return headers + section + b'\0' * (raw_size - len(section))
+
+
+def write_string_table_dll(file_path, strings):
+    with open(file_path, "wb") as file_obj:
+        file_obj.write(build_string_table_dll(strings))
@@ -1,22 +1,72 @@
+import os
 from functools import cached_property
 
-import win32api
-import pywintypes
-
 from .base import DLLBaseWrapper
+from .resources import read_string_table
+
+_win32 = None
+
+# TextStraWrapper instances by fingerprint, see get_text_stra
+_text_stras = {}
+
+
+def load_win32():
+    """
+    Imports the Windows API on first use. Returns (win32api, pywintypes) or None where it is not available,
+    in which case the string table is read straight from the DLL file instead.
+    """
+    global _win32
+    if _win32 is None:
+        try:
+            import win32api
+            import pywintypes
+            _win32 = (win32api, pywintypes)
+        except ImportError:
+            _win32 = False
+    return _win32 or None
 
 
 class TextStraWrapper(DLLBaseWrapper):
     relative_path = "TEXTSTRA.DLL"
 
+    @cached_property
+    def win32(self):
+        return load_win32()
+
     @cached_property
     def library(self):
+        if self.win32 is None:
+            return read_string_table(self.file_path)
+        win32api, _ = self.win32
         return win32api.LoadLibrary(self.file_path)
 
-    def get_text(self, text_id):
-        if win32api is None or pywintypes is None:
+    @cached_property
+    def fingerprint(self):
+        """
+        Identifies the content of the DLL by its path, size and modification time, or None if it does not exist.
+        """
+        try:
+            stat = os.stat(self.file_path)
+        except OSError:
             return None
+        return f'{os.path.abspath(self.file_path)}:{stat.st_size}:{stat.st_mtime_ns}'
+
+    def get_text(self, text_id):
+        if self.win32 is None:
+            return self.library.get(text_id)
+        win32api, pywintypes = self.win32
         try:
             return win32api.LoadString(self.library, text_id)
         except pywintypes.error:
             return None
+
+
+def get_text_stra(data_path, fingerprint):
+    """
+    Returns a TextStraWrapper for the DLL identified by ``fingerprint``, shared by all the callers in this process.
+    """
+    text_stra = _text_stras.get(fingerprint)
+    if text_stra is None:
+        text_stra = TextStraWrapper(data_path)
+        _text_stras[text_stra.fingerprint] = _text_stras[fingerprint] = text_stra
+    return text_stra
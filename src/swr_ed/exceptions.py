@@ -4,3 +4,22 @@ class SWRebellionEditorError(Exception):
 
 class SWRebellionEditorDataFileHeaderMismatchError(SWRebellionEditorError):
     pass
+
+
+class SWRebellionEditorHistoryError(SWRebellionEditorError):
+    pass
+
+
+class SWRebellionEditorReadOnlyError(SWRebellionEditorError):
+    pass
+
+
+class SWRebellionEditorSchemaMismatchError(SWRebellionEditorError):
+    pass
+
+
+class SWRebellionEditorValidationError(SWRebellionEditorError):
+    def __init__(self, issues):
+        from .validation import format_issues
+        self.issues = issues
+        super().__init__(f'{len(issues)} invalid values:\n{format_issues(issues)}')
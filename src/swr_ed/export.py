@@ -0,0 +1,218 @@
+"""
+Exports the rows of data files as CSV, JSON Lines or JSON.
+
+    python -m swr_ed.export DATA_PATH OUTPUT_DIRECTORY [--format csv] [--file CAPSHPSD.DAT] [--workers 4]
+
+Rows are streamed from ``iter_records`` and written in chunks through a buffered file, so the memory used does not
+depend on the size of the data file. The columns are the keys of the upgraded rows (so they include the names
+resolved from TEXTSTRA.DLL), or ``field_0``, ``field_1``, etc for the managers whose rows are plain lists.
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, islice
+
+from . import ALL_MANAGERS, MANAGERS_BY_FILE
+from .base import SWRDataManager
+
+BUFFER_SIZE = 1024 * 1024
+CHUNK_ROWS = 4096
+
+
+class CSVWriter:
+    extension = 'csv'
+
+    def __init__(self, file_obj, columns):
+        self.writer = csv.writer(file_obj, quoting=csv.QUOTE_NONNUMERIC, lineterminator='\n')
+        self.writer.writerow(columns)
+
+    def write_rows(self, rows):
+        self.writer.writerows(rows)
+
+    def close(self):
+        pass
+
+
+def encode_value(value, encode=json.JSONEncoder(ensure_ascii=False).encode):
+    return str(value) if type(value) is int else encode(value)
+
+
+class JSONLinesWriter:
+    extension = 'jsonl'
+    row_start = '{'
+    separator = ', '
+    row_end = '}'
+
+    def __init__(self, file_obj, columns):
+        self.file_obj = file_obj
+        # The key of every column is encoded once, see encode_rows
+        self.prefixes = [
+            (self.row_start if index == 0 else self.separator) + json.dumps(column, ensure_ascii=False) + ': '
+            for index, column in enumerate(columns)
+        ]
+        self.template = None
+        self.text_columns = None
+
+    def encode_rows(self, rows):
+        """
+        Encodes the rows without building a dict per row. The first row decides the columns that are integers,
+        which are formatted with %d. The values of the other columns are encoded with json.
+        """
+        if self.template is None:
+            self.text_columns = [index for index, value in enumerate(rows[0]) if type(value) is not int]
+            self.template = ''.join(
+                prefix.replace('%', '%%') + ('%s' if index in self.text_columns else '%d')
+                for index, prefix in enumerate(self.prefixes)
+            ) + self.row_end
+        template = self.template
+        text_columns = self.text_columns
+        if not text_columns:
+            return [template % tuple(row) for row in rows]
+
+        encoded = []
+        for row in rows:
+            values = list(row)
+            for index in text_columns:
+                values[index] = encode_value(values[index])
+            encoded.append(template % tuple(values))
+        return encoded
+
+    def write_rows(self, rows):
+        self.file_obj.write('\n'.join(self.encode_rows(rows)) + '\n')
+
+    def close(self):
+        pass
+
+
+class JSONWriter(JSONLinesWriter):
+    """
+    Writes a JSON array, formatted like ``json.dump(rows, indent=2)``, one row at a time.
+    """
+    extension = 'json'
+    row_start = '{\n    '
+    separator = ',\n    '
+    row_end = '\n  }'
+
+    def __init__(self, file_obj, columns):
+        super().__init__(file_obj, columns)
+        self.first = True
+
+    def write_rows(self, rows):
+        self.file_obj.write(('[\n  ' if self.first else ',\n  ') + ',\n  '.join(self.encode_rows(rows)))
+        self.first = False
+
+    def close(self):
+        self.file_obj.write('[]' if self.first else '\n]')
+
+
+WRITERS = {
+    'csv': CSVWriter,
+    'jsonl': JSONLinesWriter,
+    'json': JSONWriter,
+}
+
+
+def iter_row_values(manager, chunk_rows=CHUNK_ROWS):
+    """
+    Returns the column names of ``manager`` and an iterator over the values of its rows, in the same order.
+    """
+    if type(manager).upgrade_data is SWRDataManager.upgrade_data:
+        # Same columns as upgrade_data, without building a dict per row
+        columns = list(manager.schema.names)
+        if 'name_id_1' not in columns:
+            return columns, manager.iter_records(upgrade=False, chunk_rows=chunk_rows)
+        name_index = columns.index('name_id_1')
+        get_text = manager.get_text
+        return columns + ['name'], (
+            data_tuple + (get_text(data_tuple[name_index]),)
+            for data_tuple in manager.iter_records(upgrade=False, chunk_rows=chunk_rows)
+        )
+
+    rows = manager.iter_records(chunk_rows=chunk_rows)
+    first = next(rows, None)
+    if first is None:
+        return list(manager.schema.names), iter(())
+    if isinstance(first, dict):
+        columns = list(first.keys())
+        return columns, (list(row.values()) for row in chain((first,), rows))
+    return list(manager.schema.names), chain((first,), rows)
+
+
+def export_manager(manager, output, fmt='csv', chunk_rows=CHUNK_ROWS):
+    """
+    Writes the rows of ``manager`` to ``output``, a path or a text file object, in format ``fmt``.
+    Returns the number of rows written.
+    """
+    writer_cls = WRITERS[fmt]
+    if isinstance(output, str):
+        with open(output, "w", newline='', encoding='utf-8', buffering=BUFFER_SIZE) as file_obj:
+            return export_manager(manager, file_obj, fmt, chunk_rows)
+
+    columns, values = iter_row_values(manager, chunk_rows)
+    writer = writer_cls(output, columns)
+    count = 0
+    while True:
+        chunk = list(islice(values, chunk_rows))
+        if not chunk:
+            break
+        writer.write_rows(chunk)
+        count += len(chunk)
+    writer.close()
+    return count
+
+
+def export_path(filename, directory, fmt):
+    return os.path.join(directory, f'{os.path.splitext(filename)[0]}.{WRITERS[fmt].extension}')
+
+
+def _export_file(manager_cls, data_path, directory, fmt):
+    output = export_path(manager_cls.filename, directory, fmt)
+    export_manager(manager_cls(data_path), output, fmt)
+    return output
+
+
+def export_installation(data_path, directory, fmt='csv', manager_classes=None, workers=1):
+    """
+    Exports every data file of the installation in ``data_path`` (or only those of ``manager_classes``) to a file
+    per data file in ``directory``. With ``workers`` above 1 the files are exported in parallel processes.
+    Returns the paths of the files written.
+    """
+    manager_classes = list(ALL_MANAGERS) if manager_classes is None else manager_classes
+    os.makedirs(directory, exist_ok=True)
+    if workers == 1:
+        return [_export_file(manager_cls, data_path, directory, fmt) for manager_cls in manager_classes]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(_export_file, manager_cls, data_path, directory, fmt) for manager_cls in manager_classes
+        ]
+        return [future.result() for future in futures]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('data_path')
+    parser.add_argument('directory', help='Where the files are written, - writes a single file to stdout')
+    parser.add_argument('--format', dest='fmt', default='csv', choices=WRITERS)
+    parser.add_argument('--file', dest='filenames', action='append', help='Only export this data file')
+    parser.add_argument('--workers', type=int, default=1)
+    args = parser.parse_args(argv)
+
+    manager_classes = [MANAGERS_BY_FILE[filename] for filename in args.filenames] if args.filenames else None
+    if args.directory == '-':
+        if not manager_classes or len(manager_classes) != 1:
+            parser.error('exactly one --file is needed to export to stdout')
+        stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', newline='', write_through=False)
+        export_manager(manager_classes[0](args.data_path), stdout, args.fmt)
+        stdout.flush()
+        stdout.detach()
+        return
+    for path in export_installation(args.data_path, args.directory, args.fmt, manager_classes, args.workers):
+        print(path)
+
+
+if __name__ == '__main__':
+    main()
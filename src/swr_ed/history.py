@@ -0,0 +1,280 @@
+from itertools import zip_longest
+
+from .base import SWRDataManager
+from .exceptions import SWRebellionEditorHistoryError
+
+BITS = 5
+WIDTH = 1 << BITS
+MASK = WIDTH - 1
+
+
+class PersistentVector:
+    """
+    An immutable sequence stored as a 32-way trie of tuples.
+
+    Updates return a new vector that shares every untouched node with the old one, so keeping
+    old versions around costs memory only for the paths that were copied by the update.
+    """
+    __slots__ = ('_count', '_shift', '_root')
+
+    def __init__(self, items=()):
+        vector = self._from_items(list(items))
+        self._count = vector[0]
+        self._shift = vector[1]
+        self._root = vector[2]
+
+    @classmethod
+    def _make(cls, count, shift, root):
+        vector = cls.__new__(cls)
+        vector._count = count
+        vector._shift = shift
+        vector._root = root
+        return vector
+
+    @staticmethod
+    def _from_items(items):
+        nodes = [tuple(items[i:i + WIDTH]) for i in range(0, len(items), WIDTH)] or [()]
+        shift = 0
+        while len(nodes) > 1:
+            nodes = [tuple(nodes[i:i + WIDTH]) for i in range(0, len(nodes), WIDTH)]
+            shift += BITS
+        return len(items), shift, nodes[0]
+
+    def __len__(self):
+        return self._count
+
+    def _index(self, index):
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError('PersistentVector index out of range')
+        return index
+
+    def __getitem__(self, index):
+        index = self._index(index)
+        node = self._root
+        shift = self._shift
+        while shift:
+            node = node[(index >> shift) & MASK]
+            shift -= BITS
+        return node[index & MASK]
+
+    def __iter__(self):
+        yield from self._iter_node(self._root, self._shift)
+
+    def _iter_node(self, node, shift):
+        if shift:
+            for child in node:
+                yield from self._iter_node(child, shift - BITS)
+        else:
+            yield from node
+
+    def set(self, index, value):
+        index = self._index(index)
+        return self._make(self._count, self._shift, self._set(self._root, self._shift, index, value))
+
+    def _set(self, node, shift, index, value):
+        position = (index >> shift) & MASK
+        if shift:
+            value = self._set(node[position], shift - BITS, index, value)
+        return node[:position] + (value,) + node[position + 1:]
+
+    def append(self, value):
+        index = self._count
+        root = self._root
+        shift = self._shift
+        if index == WIDTH << shift:
+            # The trie is full, grow a new level on top of the current root
+            root = (root,)
+            shift += BITS
+        return self._make(self._count + 1, shift, self._append(root, shift, index, value))
+
+    def _append(self, node, shift, index, value):
+        position = (index >> shift) & MASK
+        if not shift:
+            return node + (value,)
+        child = node[position] if position < len(node) else ()
+        child = self._append(child, shift - BITS, index, value)
+        return node[:position] + (child,)
+
+    def pop(self):
+        """
+        Returns a new vector without the last item.
+        """
+        if not self._count:
+            raise IndexError('pop from empty PersistentVector')
+        count = self._count - 1
+        root = self._pop(self._root, self._shift, count)
+        shift = self._shift
+        while shift and len(root) == 1:
+            root = root[0]
+            shift -= BITS
+        return self._make(count, shift, root)
+
+    def _pop(self, node, shift, index):
+        position = (index >> shift) & MASK
+        if not shift:
+            return node[:position]
+        child = self._pop(node[position], shift - BITS, index)
+        return node[:position] + ((child,) if child else ())
+
+    def changed_indices(self, other):
+        """
+        Yields the indices where this vector and ``other`` differ.
+
+        Subtrees that are shared between both vectors are skipped without being visited, so comparing
+        two versions of the same vector costs time proportional to the number of changed items.
+        """
+        common = min(self._count, other._count)
+        if self._shift == other._shift:
+            yield from self._diff(self._root, other._root, self._shift, 0, common)
+        else:
+            for index, (a, b) in enumerate(zip(self, other)):
+                if a is not b and a != b:
+                    yield index
+        yield from range(common, max(self._count, other._count))
+
+    def _diff(self, a, b, shift, offset, limit):
+        if a is b or offset >= limit:
+            return
+        if not shift:
+            for position, (x, y) in enumerate(zip_longest(a, b)):
+                index = offset + position
+                if index >= limit:
+                    return
+                if x is not y and x != y:
+                    yield index
+            return
+        for position, (x, y) in enumerate(zip_longest(a, b, fillvalue=())):
+            yield from self._diff(x, y, shift - BITS, offset + (position << shift), limit)
+
+
+class Snapshot:
+    """
+    An immutable, O(1) to take, view of the rows of a manager at a point in time.
+    """
+    __slots__ = ('rows', 'label')
+
+    def __init__(self, rows, label=None):
+        self.rows = rows
+        self.label = label
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __repr__(self):
+        return f'<Snapshot {self.label!r} rows={len(self.rows)}>'
+
+
+class ManagerHistory:
+    """
+    Keeps structurally shared snapshots of the data of a loaded manager to provide cheap undo/redo
+    and "what-if" branching.
+
+    Rows are stored as the immutable tuples that would be written to the data file. Edits should go
+    through ``set``, ``update``, ``append`` and ``pop`` so that the history can keep track of them.
+    Edits made directly to ``manager.data`` can be folded into the history by calling ``sync``.
+
+    Restoring a snapshot is also a branching operation: any snapshot can be restored at any time and
+    edits made afterwards do not affect the snapshots that were taken before.
+    """
+
+    def __init__(self, manager):
+        if manager.data is None:
+            manager.load()
+        self.manager = manager
+        self.field_names = list(manager.schema.names) if isinstance(manager, SWRDataManager) else None
+        self.rows = PersistentVector(self._row_tuple(row) for row in manager.data)
+        self.undo_stack = []
+        self.redo_stack = []
+
+    def _row_tuple(self, row):
+        return tuple(self.manager.downgrade_data(row))
+
+    def _field_index(self, field):
+        if self.field_names is None:
+            return field
+        try:
+            return self.field_names.index(field)
+        except ValueError:
+            raise SWRebellionEditorHistoryError(
+                f'Manager {self.manager.__class__.__name__} has no field {field!r}'
+            ) from None
+
+    def snapshot(self, label=None):
+        return Snapshot(self.rows, label)
+
+    def set(self, index, field, value):
+        self.update(index, {field: value})
+
+    def update(self, index, values=None, **kwargs):
+        values = dict(values or {}, **kwargs)
+        row = list(self.rows[index])
+        live_row = self.manager.data[index]
+        for field, value in values.items():
+            row[self._field_index(field)] = value
+            live_row[field] = value
+        self.rows = self.rows.set(index, tuple(row))
+
+    def append(self, row):
+        row = tuple(row) if self.field_names is None else tuple(row[attr] for attr in self.field_names)
+        self.rows = self.rows.append(row)
+        self.manager.data.append(self.manager.upgrade_data(row))
+
+    def pop(self):
+        self.rows = self.rows.pop()
+        return self.manager.data.pop()
+
+    def sync(self):
+        """
+        Folds edits made directly to ``manager.data`` into the history. Only rows that changed are copied.
+        """
+        rows = self.rows
+        for index, live_row in enumerate(self.manager.data):
+            row = self._row_tuple(live_row)
+            if index >= len(rows):
+                rows = rows.append(row)
+            elif rows[index] != row:
+                rows = rows.set(index, row)
+        while len(rows) > len(self.manager.data):
+            rows = rows.pop()
+        self.rows = rows
+
+    def restore(self, snapshot):
+        """
+        Brings ``manager.data`` back to the state captured in ``snapshot``.
+        Only the rows that differ between the current state and the snapshot are rebuilt.
+        """
+        data = self.manager.data
+        target = snapshot.rows
+        for index in list(target.changed_indices(self.rows)):
+            if index >= len(target):
+                break
+            row = self.manager.upgrade_data(target[index])
+            if index < len(data):
+                data[index] = row
+            else:
+                data.append(row)
+        del data[len(target):]
+        self.rows = target
+
+    def checkpoint(self, label=None):
+        """
+        Records the current state so that it can be returned to with ``undo``.
+        """
+        snapshot = self.snapshot(label)
+        self.undo_stack.append(snapshot)
+        self.redo_stack.clear()
+        return snapshot
+
+    def undo(self):
+        if not self.undo_stack:
+            raise SWRebellionEditorHistoryError('Nothing to undo')
+        self.redo_stack.append(self.snapshot())
+        self.restore(self.undo_stack.pop())
+
+    def redo(self):
+        if not self.redo_stack:
+            raise SWRebellionEditorHistoryError('Nothing to redo')
+        self.undo_stack.append(self.snapshot())
+        self.restore(self.redo_stack.pop())
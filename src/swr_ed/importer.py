@@ -0,0 +1,210 @@
+"""
+Rebuilds data files from CSV or JSON Lines files, like the ones written by ``swr_ed.export``.
+
+    python -m swr_ed.importer DATA_PATH INPUT_FILE [INPUT_FILE ...] [--check] [--allow-read-only]
+
+The columns are matched to the fields of the manager by name, extra columns (like the names resolved from
+TEXTSTRA.DLL) are ignored. Every value is checked against the struct code of its field before anything is written,
+and all the problems found in all the files are reported together in a SWRebellionEditorValidationError.
+
+As with ``save()``, the derived fields of the rows whose sources changed are recomputed, and the READ_ONLY fields
+must keep the values of the data file being replaced (matched by key) unless ``--allow-read-only`` is given.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+from functools import reduce
+from io import BytesIO
+
+from . import MANAGERS_BY_FILE
+from .exceptions import SWRebellionEditorValidationError
+from .validation import ValidationIssue, check_columns, format_issues
+
+FORMATS = ('csv', 'jsonl')
+
+
+def detect_format(path):
+    extension = os.path.splitext(path)[1].lstrip('.').lower()
+    if extension not in FORMATS:
+        raise ValueError(f'Can not tell the format of {path}, expected one of {", ".join(FORMATS)}')
+    return extension
+
+
+def read_csv(file_obj):
+    """
+    Returns the list of columns and a list of (line, values) of a CSV file.
+    """
+    reader = csv.reader(file_obj)
+    columns = next(reader, [])
+    return columns, [(reader.line_num, values) for values in reader if values]
+
+
+def read_jsonl(file_obj, source=None):
+    """
+    Returns the list of columns, a list of (line, values) and the list of issues of a JSON Lines file. The columns
+    are the keys of all the rows in order of appearance, and the lines that are not JSON objects are the issues.
+    """
+    columns = {}
+    records = []
+    issues = []
+    for line, text in enumerate(file_obj, start=1):
+        if not text.strip():
+            continue
+        try:
+            record = json.loads(text)
+        except ValueError as error:
+            issues.append(ValidationIssue(source, line, None, text.strip(), f'is not valid JSON ({error})'))
+            continue
+        if not isinstance(record, dict):
+            issues.append(ValidationIssue(source, line, None, record, 'is not a JSON object'))
+            continue
+        columns.update(dict.fromkeys(record))
+        records.append((line, record))
+    columns = list(columns)
+    return columns, [(line, [record.get(column) for column in columns]) for line, record in records], issues
+
+
+def read_columns(manager_cls, source, fmt=None):
+    """
+    Reads ``source`` (a path) and returns the columns of the fields of ``manager_cls`` (in the order of the schema),
+    the line numbers of the rows and the issues found so far.
+    """
+    fmt = fmt or detect_format(source)
+    with open(source, newline='', encoding='utf-8-sig') as file_obj:
+        if fmt == 'csv':
+            columns, records = read_csv(file_obj)
+            issues = []
+        else:
+            columns, records, issues = read_jsonl(file_obj, source)
+
+    names = manager_cls.schema.names
+    missing = [name for name in names if name not in columns]
+    if missing:
+        issues.extend(ValidationIssue(source, 1, name, None, 'is missing') for name in missing)
+        return [], [], issues
+
+    for line, values in records:
+        if len(values) != len(columns):
+            issues.append(ValidationIssue(
+                source, line, None, values, f'has {len(values)} values but there are {len(columns)} columns'
+            ))
+    records = [(line, values) for line, values in records if len(values) == len(columns)]
+    lines = [line for line, _ in records]
+    all_columns = list(zip(*(values for _, values in records))) or [() for _ in columns]
+    return [all_columns[columns.index(name)] for name in names], lines, issues
+
+
+def prepare_file(manager, source, fmt=None, allow_read_only=False):
+    """
+    Reads and checks ``source`` for ``manager``. Returns the packed content of the data file and the issues found,
+    the content is None when there are issues.
+    """
+    manager_cls = type(manager)
+    columns, lines, issues = read_columns(manager_cls, source, fmt)
+    columns, column_issues = check_columns(manager_cls.schema, columns, lines, source)
+    issues.extend(column_issues)
+    if issues:
+        return None, issues
+
+    return pack_data_file(manager, list(zip(*columns)), lines, source, allow_read_only)
+
+
+def current_rows(manager):
+    """
+    Returns the packed rows of the data file of ``manager`` as it is on disk, or None when there is no such file
+    (or it does not have whole rows).
+    """
+    try:
+        with open(manager.file_path, "rb") as file_obj:
+            rows = file_obj.read()[manager.header_struct.size:]
+    except FileNotFoundError:
+        return None
+    return rows if len(rows) % manager.data_struct.size == 0 else None
+
+
+def pack_data_file(manager, data_tuples, lines=None, source=None, allow_read_only=False):
+    """
+    Returns the content of the data file of ``manager`` with ``data_tuples`` as rows and the issues found, the
+    content is None when there are issues. The rows are packed as by ``save()`` (see pack_rows_from), compared to
+    the data file they replace. The issues are reported on ``lines`` (the line of every row) of ``source``.
+    """
+    try:
+        payload = manager.pack_rows_from(data_tuples, current_rows(manager), allow_read_only)
+    except SWRebellionEditorValidationError as error:
+        if lines is None:
+            return None, error.issues
+        return None, [
+            issue._replace(source=source, line=lines[issue.line] if issue.line is not None else None)
+            for issue in error.issues
+        ]
+    count = reduce(manager.count_row, data_tuples, 0)
+    header = list(manager.expected_header)
+    return manager.header_struct.pack(header[0], count, *header[2:]) + payload, []
+
+
+def write_data_files(prepared):
+    """
+    Writes the content of the data file of every (manager, content) in ``prepared``.
+    """
+    for manager, content in prepared:
+        manager.save_stream_to_file(BytesIO(content))
+        manager.header_count = manager.header_struct.unpack_from(content)[1]
+        manager.set_packed_rows(content[manager.header_struct.size:])
+
+
+def import_files(data_path, sources, manager_classes=None, check_only=False, allow_read_only=False):
+    """
+    Imports every file in ``sources`` into the installation in ``data_path``. The manager of every file is found
+    from its name (CAPSHPSD.csv is imported into CAPSHPSD.DAT) unless given in ``manager_classes``.
+
+    Nothing is written unless all the files are valid, otherwise a SWRebellionEditorValidationError with the
+    issues of all the files is raised. With ``allow_read_only``, changes to the READ_ONLY fields are written too.
+    Returns the managers of the imported files, their data is decoded lazily.
+    """
+    if manager_classes is None:
+        manager_classes = [
+            MANAGERS_BY_FILE.get(os.path.splitext(os.path.basename(source))[0].upper() + '.DAT') for source in sources
+        ]
+
+    prepared = []
+    issues = []
+    for source, manager_cls in zip(sources, manager_classes):
+        if manager_cls is None:
+            issues.append(ValidationIssue(source, None, None, None, 'is not named after a data file'))
+            continue
+        manager = manager_cls(data_path)
+        content, file_issues = prepare_file(manager, source, allow_read_only=allow_read_only)
+        prepared.append((manager, content))
+        issues.extend(sorted(file_issues, key=lambda issue: issue.line or 0))
+    if issues:
+        raise SWRebellionEditorValidationError(issues)
+    if check_only:
+        return [manager for manager, _ in prepared]
+
+    write_data_files(prepared)
+    return [manager for manager, _ in prepared]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('data_path')
+    parser.add_argument('sources', nargs='+', metavar='INPUT_FILE')
+    parser.add_argument('--check', action='store_true', help='Only check the files, do not write anything')
+    parser.add_argument('--allow-read-only', action='store_true', help='Write changes to the read-only fields too')
+    args = parser.parse_args(argv)
+
+    try:
+        managers = import_files(
+            args.data_path, args.sources, check_only=args.check, allow_read_only=args.allow_read_only
+        )
+    except SWRebellionEditorValidationError as error:
+        print(format_issues(error.issues, limit=len(error.issues)), file=sys.stderr)
+        sys.exit(1)
+    for manager in managers:
+        print(manager.file_path)
+
+
+if __name__ == '__main__':
+    main()
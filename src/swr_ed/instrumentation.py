@@ -0,0 +1,205 @@
+"""
+Timing instrumentation for the stages of the load/save pipeline.
+
+Nothing is measured until a sink is installed with ``set_metrics_sink``. While no sink is installed, ``span``
+returns a shared do-nothing span, so the cost of the instrumentation is a function call per stage.
+
+    from swr_ed.instrumentation import InMemoryAggregator, set_metrics_sink
+
+    aggregator = InMemoryAggregator()
+    set_metrics_sink(aggregator)
+    manager.load()
+    print(aggregator.summary())
+"""
+import json
+import threading
+from time import perf_counter
+
+_sink = None
+
+
+def set_metrics_sink(sink):
+    """
+    Installs ``sink`` as the receiver of all spans, ``None`` disables the instrumentation.
+    Returns the sink that was previously installed.
+    """
+    global _sink
+    previous, _sink = _sink, sink
+    return previous
+
+
+def get_metrics_sink():
+    return _sink
+
+
+class MetricsSink:
+    """
+    Base class for the receivers of spans. ``on_start`` is called when a stage begins and ``on_stop``
+    when it ends, at which point ``span.duration`` is set.
+    """
+
+    def on_start(self, span):
+        pass
+
+    def on_stop(self, span):
+        pass
+
+
+class Span:
+    __slots__ = ('stage', 'manager', 'tags', 'start', 'duration', 'sink')
+
+    def __init__(self, sink, stage, manager, tags):
+        self.sink = sink
+        self.stage = stage
+        self.manager = manager
+        self.tags = tags
+        self.start = None
+        self.duration = None
+
+    def set_tag(self, key, value):
+        self.tags[key] = value
+
+    def __enter__(self):
+        self.start = perf_counter()
+        self.sink.on_start(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.duration = perf_counter() - self.start
+        if exc_type is not None:
+            self.tags['error'] = exc_type.__name__
+        self.sink.on_stop(self)
+        return False
+
+    def as_dict(self):
+        return dict(stage=self.stage, manager=self.manager, start=self.start, duration=self.duration, **self.tags)
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def set_tag(self, key, value):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+NULL_SPAN = _NullSpan()
+
+
+def span(stage, manager, **tags):
+    """
+    Returns a context manager that reports the time spent in ``stage`` by ``manager`` (an instance or class)
+    to the installed sink.
+    """
+    sink = _sink
+    if sink is None:
+        return NULL_SPAN
+    manager_name = manager if isinstance(manager, str) else getattr(manager, '__name__', type(manager).__name__)
+    return Span(sink, stage, manager_name, tags)
+
+
+class StageTimer:
+    """
+    Accumulates the time of many short calls (like text lookups) that are too frequent to report one by one.
+    """
+    __slots__ = ('seconds', 'count')
+
+    def __init__(self):
+        self.seconds = 0.0
+        self.count = 0
+
+    def add(self, seconds):
+        self.seconds += seconds
+        self.count += 1
+
+
+def stage_timer():
+    return StageTimer() if _sink is not None else None
+
+
+def record_timer(stage, manager, timer, **tags):
+    """
+    Reports the time accumulated in ``timer`` as a single span.
+    """
+    if _sink is None or timer is None or not timer.count:
+        return
+    reported = span(stage, manager, calls=timer.count, **tags)
+    reported.start = perf_counter() - timer.seconds
+    reported.sink.on_start(reported)
+    reported.duration = timer.seconds
+    reported.sink.on_stop(reported)
+
+
+class InMemoryAggregator(MetricsSink):
+    """
+    Aggregates the spans by manager and stage.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stats = {}
+
+    def on_stop(self, span):
+        key = (span.manager, span.stage)
+        with self.lock:
+            stats = self.stats.get(key)
+            if stats is None:
+                stats = self.stats[key] = {
+                    'manager': span.manager, 'stage': span.stage, 'count': 0,
+                    'total': 0.0, 'min': span.duration, 'max': span.duration, 'bytes': 0,
+                }
+            stats['count'] += 1
+            stats['total'] += span.duration
+            stats['min'] = min(stats['min'], span.duration)
+            stats['max'] = max(stats['max'], span.duration)
+            stats['bytes'] += span.tags.get('bytes', 0)
+
+    def summary(self):
+        with self.lock:
+            return [dict(stats) for stats in self.stats.values()]
+
+    def reset(self):
+        with self.lock:
+            self.stats.clear()
+
+
+class JSONLinesExporter(MetricsSink):
+    """
+    Writes every finished span as a line of JSON to ``output``, a path or a text file object.
+    """
+
+    def __init__(self, output):
+        self.lock = threading.Lock()
+        if isinstance(output, str):
+            self.file_obj = open(output, "a")
+            self.owns_file = True
+        else:
+            self.file_obj = output
+            self.owns_file = False
+
+    def on_stop(self, span):
+        line = json.dumps(span.as_dict())
+        with self.lock:
+            self.file_obj.write(line + '\n')
+
+    def close(self):
+        if self.owns_file:
+            self.file_obj.close()
+
+
+class MultiSink(MetricsSink):
+    def __init__(self, *sinks):
+        self.sinks = sinks
+
+    def on_start(self, span):
+        for sink in self.sinks:
+            sink.on_start(span)
+
+    def on_stop(self, span):
+        for sink in self.sinks:
+            sink.on_stop(span)
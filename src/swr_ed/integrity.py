@@ -0,0 +1,231 @@
+"""
+Checks the references between the data files of an installation.
+
+    python -m swr_ed.integrity DATA_PATH [--base BASE_DATA_PATH]
+
+Every rule compares a column of a data file against a set of allowed values: the ids of the rows of another file
+(``SYSTEMSD.sector_id`` must be the id of a sector), the family and id of the units of the fleets, or a fixed set
+of values. The columns are read straight from the packed rows and every key set is built once, so a rule is a set
+difference that runs in C. Only the columns with values outside of the set are walked to report the bad rows.
+"""
+import argparse
+import os
+import sys
+from collections import namedtuple
+from itertools import compress
+
+from . import ALL_MANAGERS, MANAGERS_BY_FILE
+from .constants import PRODUCING_FACILITY_FAMILIES, Families
+from .validation import ValidationIssue, format_issues
+
+FACILITY_FILES = ('MANFACSD.DAT', 'PROFACSD.DAT', 'DEFFACSD.DAT')
+FLEET_FILES = ('CMUNEFTB.DAT', 'CMUNAFTB.DAT')
+SYSTEM_FACILITY_FILES = ('SYFCCRTB.DAT', 'SYFCRMTB.DAT')
+
+
+class Installation:
+    """
+    The columns and key sets of the data files of an installation, read once and kept for every rule.
+
+    A data file is read from ``data_path``, or from ``base_path`` when it is not there (a mod that only ships the
+    files it changes is checked against the installation it applies to).
+    """
+
+    def __init__(self, data_path, base_path=None):
+        self.data_path = data_path
+        self.base_path = base_path
+        self.tables = {}
+        self.key_sets = {}
+        self.family_key_set = None
+        self.missing = set()
+
+    def find_file(self, manager_cls):
+        for data_path in (self.data_path, self.base_path):
+            if data_path is None:
+                continue
+            manager = manager_cls(data_path)
+            if os.path.exists(manager.file_path):
+                return manager
+        return None
+
+    def columns(self, filename):
+        """
+        Returns a dict with the column of every field of ``filename``, or None when the file can not be found.
+        """
+        if filename not in self.tables:
+            manager_cls = MANAGERS_BY_FILE[filename]
+            manager = self.find_file(manager_cls)
+            if manager is None:
+                self.missing.add(filename)
+                self.tables[filename] = None
+            else:
+                with open(manager.file_path, "rb") as file_obj:
+                    content = file_obj.read()
+                manager.check_header(manager.header_struct.unpack_from(content), None)
+                rows = manager.data_struct.iter_unpack(memoryview(content)[manager.header_struct.size:])
+                columns = list(zip(*rows)) or [() for _ in manager_cls.schema.names]
+                self.tables[filename] = dict(zip(manager_cls.schema.names, columns))
+        return self.tables[filename]
+
+    def keys(self, filename, field='id'):
+        """
+        Returns the set of the values of ``field`` in ``filename``, or None when the file can not be found.
+        """
+        if (filename, field) not in self.key_sets:
+            columns = self.columns(filename)
+            self.key_sets[filename, field] = None if columns is None else frozenset(columns[field])
+        return self.key_sets[filename, field]
+
+    def family_keys(self):
+        """
+        Returns the set of the (family_id, id) of the rows of every data file that has both.
+        """
+        if self.family_key_set is None:
+            keys = set()
+            for manager_cls in ALL_MANAGERS:
+                names = manager_cls.schema.names
+                if 'id' in names and 'family_id' in names and manager_cls.filename not in SYSTEM_FACILITY_FILES:
+                    columns = self.columns(manager_cls.filename)
+                    if columns is not None:
+                        keys.update(zip(columns['family_id'], columns['id']))
+            self.family_key_set = frozenset(keys)
+        return self.family_key_set
+
+
+def find_bad_values(filename, field, column, allowed, message):
+    bad = set(column).difference(allowed)
+    if not bad:
+        return []
+    return [
+        ValidationIssue(filename, row, field, value, message)
+        for row, value in enumerate(column) if value in bad
+    ]
+
+
+class Reference(namedtuple(
+    'Reference', ('filename', 'field', 'target_filenames', 'target_field', 'null'), defaults=(None,)
+)):
+    """
+    The values of ``field`` in ``filename`` are values of ``target_field`` in one of ``target_filenames``, or
+    ``null`` (when given) for a row that refers to nothing.
+    """
+    __slots__ = ()
+
+    def check(self, installation):
+        columns = installation.columns(self.filename)
+        key_sets = [installation.keys(target, self.target_field) for target in self.target_filenames]
+        if columns is None or None in key_sets:
+            return []
+        allowed = frozenset().union(*key_sets)
+        if self.null is not None:
+            allowed |= {self.null}
+        return find_bad_values(
+            self.filename, self.field, columns[self.field], allowed,
+            f'is not a {self.target_field} of {" or ".join(self.target_filenames)}',
+        )
+
+
+class AllowedValues(namedtuple('AllowedValues', ('filename', 'field', 'values', 'description'))):
+    """
+    The values of ``field`` in ``filename`` are in ``values``.
+    """
+    __slots__ = ()
+
+    def check(self, installation):
+        columns = installation.columns(self.filename)
+        if columns is None:
+            return []
+        return find_bad_values(
+            self.filename, self.field, columns[self.field], self.values, f'is not {self.description}'
+        )
+
+
+class UnitReference(namedtuple('UnitReference', ('filename', 'family_field', 'id_field', 'unit_field'))):
+    """
+    The rows of ``filename`` whose ``unit_field`` is 0 are units, given by the family and id of a row of another
+    data file.
+    """
+    __slots__ = ()
+
+    def check(self, installation):
+        columns = installation.columns(self.filename)
+        if columns is None:
+            return []
+        is_unit = [not value for value in columns[self.unit_field]]
+        units = list(compress(zip(columns[self.family_field], columns[self.id_field]), is_unit))
+        bad = set(units).difference(installation.family_keys())
+        if not bad:
+            return []
+        rows = compress(range(len(is_unit)), is_unit)
+        return [
+            ValidationIssue(
+                self.filename, row, self.id_field, unit[1], f'is not the id of a unit of family {unit[0]}'
+            )
+            for row, unit in zip(rows, units) if unit in bad
+        ]
+
+
+def family_rules():
+    """
+    The families of the rows of a data file are in the range given by the header of the file (like 28 to 31 for
+    the fighters).
+    """
+    for manager_cls in ALL_MANAGERS:
+        first, end = manager_cls.expected_header[2:4]
+        if 'family_id' in manager_cls.schema.names and isinstance(end, int):
+            yield AllowedValues(
+                manager_cls.filename, 'family_id', frozenset(range(first, end)),
+                f'a family of {manager_cls.filename} ({first} to {end - 1})',
+            )
+
+
+def producing_facility_rules():
+    for filename, family in PRODUCING_FACILITY_FAMILIES.items():
+        name = Families(family).name.lower().replace('_', ' ')
+        yield AllowedValues(filename, 'producing_facility_family_id', frozenset((family,)), f'{family} ({name})')
+        yield AllowedValues(
+            filename, 'producing_facility_family_id_one_based', frozenset((family + 1,)), f'{family + 1} ({name})'
+        )
+
+
+RULES = (
+    Reference('SYSTEMSD.DAT', 'sector_id', ('SECTORSD.DAT',), 'id'),
+    # A family of 0 seeds no facility
+    *(Reference(filename, 'family_id', FACILITY_FILES, 'family_id', null=0) for filename in SYSTEM_FACILITY_FILES),
+    *(UnitReference(filename, 'field_4', 'field_2', 'field_1') for filename in FLEET_FILES),
+    *family_rules(),
+    *producing_facility_rules(),
+)
+
+
+def check_installation(data_path, rules=RULES, base_path=None):
+    """
+    Checks the ``rules`` against the installation in ``data_path`` (with the files missing from it read from
+    ``base_path``). Returns the list of issues, the line of an issue is the index of the row in its data file.
+    """
+    installation = Installation(data_path, base_path)
+    issues = []
+    for rule in rules:
+        issues.extend(rule.check(installation))
+    issues.extend(
+        ValidationIssue(filename, None, None, None, 'is missing') for filename in sorted(installation.missing)
+    )
+    return issues
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('data_path')
+    parser.add_argument(
+        '--base', dest='base_path', help='Installation the data files missing from DATA_PATH are read from'
+    )
+    args = parser.parse_args(argv)
+
+    issues = check_installation(args.data_path, base_path=args.base_path)
+    if issues:
+        print(format_issues(issues, limit=len(issues)), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
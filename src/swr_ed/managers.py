@@ -4,6 +4,10 @@ from swr_ed.base import SWRDataManager, FieldDef, ProbabilityTableManager, Simpl
 from swr_ed.constants import FieldType
 
 
+def firepower_arcs(weapon):
+    return tuple(f'{weapon}_firepower_{arc}' for arc in ('front', 'rear', 'left', 'right'))
+
+
 class FightersDataDataManager(SWRDataManager):
     filename = "FIGHTSD.DAT"
     expected_header = (1, 8, 28, 32)
@@ -44,10 +48,12 @@ class FightersDataDataManager(SWRDataManager):
     turbolasers_range = FieldDef('I', FieldType.EDITABLE)
     ion_range = FieldDef('I', FieldType.EDITABLE)
     laser_range = FieldDef('I', FieldType.EDITABLE)
-    turbolaser_firepower_sum = FieldDef('I', FieldType.DENORMALIZED)
-    ion_firepower_sum = FieldDef('I', FieldType.DENORMALIZED)
-    laser_firepower_sum = FieldDef('I', FieldType.DENORMALIZED)
-    firepower_sum = FieldDef('I', FieldType.DENORMALIZED)
+    turbolaser_firepower_sum = FieldDef('I', FieldType.DENORMALIZED, sources=firepower_arcs('turbolaser'))
+    ion_firepower_sum = FieldDef('I', FieldType.DENORMALIZED, sources=firepower_arcs('ion'))
+    laser_firepower_sum = FieldDef('I', FieldType.DENORMALIZED, sources=firepower_arcs('laser'))
+    firepower_sum = FieldDef(
+        'I', FieldType.DENORMALIZED, sources=('turbolaser_firepower_sum', 'ion_firepower_sum', 'laser_firepower_sum')
+    )
     torpedo_power = FieldDef('I', FieldType.EDITABLE)
     torpedo_range = FieldDef('I', FieldType.EDITABLE)
     squadron_size = FieldDef('I', FieldType.EDITABLE)  # always 12
@@ -119,10 +125,12 @@ class CapitalShipsDataDataManager(SWRDataManager):
     turbolasers_range = FieldDef('I', FieldType.EDITABLE)
     ion_range = FieldDef('I', FieldType.EDITABLE)
     laser_range = FieldDef('I', FieldType.EDITABLE)
-    turbolaser_firepower_sum = FieldDef('I', FieldType.DENORMALIZED)
-    ion_firepower_sum = FieldDef('I', FieldType.DENORMALIZED)
-    laser_firepower_sum = FieldDef('I', FieldType.DENORMALIZED)
-    firepower_sum = FieldDef('I', FieldType.DENORMALIZED)
+    turbolaser_firepower_sum = FieldDef('I', FieldType.DENORMALIZED, sources=firepower_arcs('turbolaser'))
+    ion_firepower_sum = FieldDef('I', FieldType.DENORMALIZED, sources=firepower_arcs('ion'))
+    laser_firepower_sum = FieldDef('I', FieldType.DENORMALIZED, sources=firepower_arcs('laser'))
+    firepower_sum = FieldDef(
+        'I', FieldType.DENORMALIZED, sources=('turbolaser_firepower_sum', 'ion_firepower_sum', 'laser_firepower_sum')
+    )
     hull = FieldDef('I', FieldType.EDITABLE)
     tractor_beam_power = FieldDef('I', FieldType.EDITABLE)
     tractor_beam_range = FieldDef('I', FieldType.EDITABLE)
@@ -362,7 +370,7 @@ class CharacterBaseDataDataManager(SWRDataManager):
     can_train_jedis = FieldDef('I', FieldType.EDITABLE)
 
     def upgrade_data(self, data_tuple):
-        data_dict = OrderedDict(zip(list(self.fields.keys()), data_tuple))
+        data_dict = OrderedDict(zip(self.schema.names, data_tuple))
         data_dict.update(
             self.get_texts(
                 name=data_dict['name_id_1'],
@@ -0,0 +1,172 @@
+"""
+Parallel processing of a single data file.
+
+The rows of a data file have a fixed size, so the file can be split into byte ranges that start and end on a row
+boundary. Every range is handed to a worker process, which maps the file (the pages are shared through the page
+cache of the OS rather than copied), decodes its rows and runs a function over them. The results are returned
+in the order of the ranges.
+
+    def count_ships(rows, first_row):
+        return sum(1 for row in rows if row['family_id'] == 20)
+
+    total = map_reduce(file_path, count_ships, operator.add, 0)
+
+The functions are sent to the workers, so they must be picklable (defined at the top level of a module).
+"""
+import mmap
+import os
+import struct
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial, reduce
+
+from .exceptions import SWRebellionEditorValidationError
+from .streaming import manager_for_file, open_temp_file, replace_file
+
+RecordRange = namedtuple('RecordRange', ('start', 'stop', 'first_row'))
+
+# The mapped file and the manager of the current worker process, see _init_worker
+_worker = {}
+
+
+def record_ranges(file_size, header_size, record_size, parts):
+    """
+    Splits the rows of a file of ``file_size`` bytes into at most ``parts`` ranges of (almost) equal size.
+    """
+    payload_size = file_size - header_size
+    if payload_size % record_size:
+        raise struct.error(
+            f'The rows take {payload_size} bytes, which is not a multiple of the {record_size} bytes row size'
+        )
+    rows = payload_size // record_size
+    parts = max(1, min(parts, rows))
+    ranges = []
+    for part in range(parts):
+        first_row = rows * part // parts
+        last_row = rows * (part + 1) // parts
+        ranges.append(RecordRange(
+            header_size + first_row * record_size, header_size + last_row * record_size, first_row
+        ))
+    return ranges
+
+
+def _init_worker(file_path, manager_cls):
+    with open(file_path, "rb") as file_obj:
+        _worker['mapped'] = mmap.mmap(file_obj.fileno(), 0, access=mmap.ACCESS_READ)
+    _worker['manager'] = manager_for_file(file_path, manager_cls)
+
+
+def _close_worker():
+    _worker.pop('manager', None)
+    mapped = _worker.pop('mapped', None)
+    if mapped is not None:
+        mapped.close()
+
+
+def _iter_range(record_range, upgrade):
+    manager = _worker['manager']
+    view = memoryview(_worker['mapped'])[record_range.start:record_range.stop]
+    try:
+        for data_tuple in manager.data_struct.iter_unpack(view):
+            yield manager.upgrade_data(data_tuple) if upgrade else data_tuple
+    finally:
+        view.release()
+
+
+def _run_range(fn, record_range, upgrade):
+    return fn(_iter_range(record_range, upgrade), record_range.first_row)
+
+
+def _transform_range(fn, record_range, upgrade, allow_read_only=False):
+    manager = _worker['manager']
+    data_tuples = [
+        tuple(manager.downgrade_data(row)) if upgrade else tuple(row)
+        for row in fn(_iter_range(record_range, upgrade), record_range.first_row)
+    ]
+    loaded_rows = _worker['mapped'][record_range.start:record_range.stop]
+    try:
+        payload = manager.pack_rows_from(data_tuples, loaded_rows, allow_read_only)
+    except SWRebellionEditorValidationError as error:
+        return None, 0, error.issues, len(data_tuples)
+    return payload, reduce(manager.count_row, data_tuples, 0), [], len(data_tuples)
+
+
+def _submit_ranges(worker, file_path, fn, manager_cls, upgrade, workers, parts):
+    file_path = os.path.abspath(file_path)
+    manager = manager_for_file(file_path, manager_cls)
+    manager_cls = type(manager)
+
+    with open(file_path, "rb") as file_obj:
+        header = manager.header_struct.unpack(file_obj.read(manager.header_struct.size))
+    manager.check_header(header, None)
+
+    workers = workers or os.cpu_count() or 1
+    ranges = record_ranges(
+        os.path.getsize(file_path), manager.header_struct.size, manager.data_struct.size, parts or workers * 4
+    )
+    if workers == 1:
+        _init_worker(file_path, manager_cls)
+        try:
+            return manager, [worker(fn, record_range, upgrade) for record_range in ranges]
+        finally:
+            _close_worker()
+
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(file_path, manager_cls)
+    ) as executor:
+        futures = [executor.submit(worker, fn, record_range, upgrade) for record_range in ranges]
+        return manager, [future.result() for future in futures]
+
+
+def map_ranges(file_path, fn, manager_cls=None, upgrade=True, workers=None, parts=None):
+    """
+    Calls ``fn(rows, first_row)`` for every range of the data file in a pool of ``workers`` processes
+    (one per core by default) and returns the list of results in the order of the ranges.
+
+    ``rows`` is an iterator over the rows of the range (upgraded, unless ``upgrade`` is False) and ``first_row``
+    the index of its first row in the file. The file is split in ``parts`` ranges, four per worker by default,
+    so that a slow range does not keep the other workers idle. With ``workers=1`` everything runs in this process.
+    """
+    return _submit_ranges(_run_range, file_path, fn, manager_cls, upgrade, workers, parts)[1]
+
+
+def map_reduce(file_path, fn, reduce_fn, initial, **kwargs):
+    """
+    Like ``map_ranges``, but the results are merged in order with ``reduce_fn(accumulated, result)``.
+    """
+    return reduce(reduce_fn, map_ranges(file_path, fn, **kwargs), initial)
+
+
+def transform(src, dst, fn, manager_cls=None, upgrade=True, workers=None, parts=None, allow_read_only=False):
+    """
+    The parallel counterpart of ``streaming.transform``: ``fn(rows, first_row)`` returns an iterable with the rows
+    to write for every range. The workers pack their rows and the results are written to ``dst`` in order.
+    The rows of every range are packed and checked against the rows of the range as in ``streaming.transform``,
+    nothing is written when any range has issues.
+
+    Returns the header count of the new file.
+    """
+    worker = partial(_transform_range, allow_read_only=allow_read_only)
+    manager, results = _submit_ranges(worker, src, fn, manager_cls, upgrade, workers, parts)
+    issues = []
+    rows_written = 0
+    for _, _, range_issues, rows in results:
+        issues.extend(issue._replace(line=issue.line + rows_written) for issue in range_issues)
+        rows_written += rows
+    if issues:
+        raise SWRebellionEditorValidationError(issues)
+    count = manager.merge_counts(count for _, count, _, _ in results)
+
+    temp_file = open_temp_file(dst)
+    try:
+        with temp_file as file_obj:
+            header = list(manager.expected_header)
+            file_obj.write(manager.header_struct.pack(header[0], count, *header[2:]))
+            for payload, _, _, _ in results:
+                file_obj.write(payload)
+    except BaseException:
+        os.remove(temp_file.name)
+        raise
+
+    replace_file(temp_file.name, dst)
+    return count
@@ -0,0 +1,125 @@
+"""
+The registry of managers by data file.
+
+Importing the managers is not free (each one is built by a metaclass and they depend on the DLL wrappers), so the
+registry knows where each stock manager lives and only imports them when they are first requested.
+Managers defined anywhere else are added to the registry when their class is created.
+"""
+from collections.abc import Mapping, Sequence
+
+# filename -> dotted path of the class of the stock managers, keep in sync with managers.py
+MANAGER_PATHS = {
+    'ABDCMSTB.DAT': 'swr_ed.managers.AbductionMissionTableDataManager',
+    'ASSNMSTB.DAT': 'swr_ed.managers.AssassinationMissionTableDataManager',
+    'CAPSHPSD.DAT': 'swr_ed.managers.CapitalShipsDataDataManager',
+    'CMUNAFTB.DAT': 'swr_ed.managers.AllianceFleetHomeTableDataManager',
+    'CMUNEFTB.DAT': 'swr_ed.managers.EmpireFleetHomeTableDataManager',
+    'DEFFACSD.DAT': 'swr_ed.managers.DefensiveFacilitiesDataDataManager',
+    'DIPLMSTB.DAT': 'swr_ed.managers.DiplomacyMissionTableDataManager',
+    'DSSBMSTB.DAT': 'swr_ed.managers.DeathStarSabotageMissionTableDataManager',
+    'ESCAPETB.DAT': 'swr_ed.managers.EscapeAttemptTableDataManager',
+    'ESPIMSTB.DAT': 'swr_ed.managers.EspionageMissionTableDataManager',
+    'FDECOYTB.DAT': 'swr_ed.managers.FleetDecoyTableDataManager',
+    'FIGHTSD.DAT': 'swr_ed.managers.FightersDataDataManager',
+    'FOILTB.DAT': 'swr_ed.managers.FoilMissionTableDataManager',
+    'INCTMSTB.DAT': 'swr_ed.managers.InciteUprisingMissionTableDataManager',
+    'INFORMTB.DAT': 'swr_ed.managers.InformantsTableDataManager',
+    'MANFACSD.DAT': 'swr_ed.managers.ManufacturingFacilitiesDataDataManager',
+    'MISSNSD.DAT': 'swr_ed.managers.MissionDataDataManager',
+    'MJCHARSD.DAT': 'swr_ed.managers.MajorCharacterDataManager',
+    'MNCHARSD.DAT': 'swr_ed.managers.MinorCharacterDataManager',
+    'PROFACSD.DAT': 'swr_ed.managers.ProductionFacilitiesDataDataManager',
+    'RCRTMSTB.DAT': 'swr_ed.managers.ReconnaissanceMissionTableDataManager',
+    'RESCMSTB.DAT': 'swr_ed.managers.RescueMissionTableDataManager',
+    'RESRCTB.DAT': 'swr_ed.managers.ResearchMissionTableDataManager',
+    'RLEVADTB.DAT': 'swr_ed.managers.EvadeCaptureTableDataManager',
+    'SBTGMSTB.DAT': 'swr_ed.managers.SabotageMissionTableDataManager',
+    'SECTORSD.DAT': 'swr_ed.managers.SectorsDataDataManager',
+    'SPECFCSD.DAT': 'swr_ed.managers.SpecialForcesDataDataManager',
+    'SUBDMSTB.DAT': 'swr_ed.managers.SubdueUprisingMissionTableDataManager',
+    'SYFCCRTB.DAT': 'swr_ed.managers.SystemFacilityCoreTableDataManager',
+    'SYFCRMTB.DAT': 'swr_ed.managers.SystemFacilityRimTableDataManager',
+    'SYSTEMSD.DAT': 'swr_ed.managers.SystemsDataDataManager',
+    'TDECOYTB.DAT': 'swr_ed.managers.TroopDecoyTableDataManager',
+    'TROOPSD.DAT': 'swr_ed.managers.TroopsDataDataManager',
+    'UPRIS1TB.DAT': 'swr_ed.managers.Uprising1TableDataManager',
+    'UPRIS2TB.DAT': 'swr_ed.managers.Uprising2TableDataManager',
+}
+
+_registered = []
+_by_file = {}
+# The registered managers sorted by filename, built on first use and dropped when a manager is registered
+_sorted = None
+
+
+def register_manager(manager_cls):
+    global _sorted
+    _registered.append(manager_cls)
+    _by_file[manager_cls.filename] = manager_cls
+    _sorted = None
+
+
+def import_manager(path):
+    module_name, class_name = path.rsplit('.', 1)
+    # __import__ rather than importlib.import_module so the import is reported by -X importtime
+    return getattr(__import__(module_name, fromlist=[class_name]), class_name)
+
+
+def import_all_managers():
+    for path in MANAGER_PATHS.values():
+        import_manager(path)
+
+
+class ManagersByFile(Mapping):
+    """
+    A read-only dict of filename to manager class that imports the managers on first access.
+    """
+
+    def __getitem__(self, filename):
+        if filename not in _by_file and filename in MANAGER_PATHS:
+            import_manager(MANAGER_PATHS[filename])
+        return _by_file[filename]
+
+    def __contains__(self, filename):
+        return filename in MANAGER_PATHS or filename in _by_file
+
+    def __iter__(self):
+        return iter(sorted(set(MANAGER_PATHS).union(_by_file)))
+
+    def __len__(self):
+        return len(set(MANAGER_PATHS).union(_by_file))
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({sorted(self)!r})'
+
+
+class AllManagers(Sequence):
+    """
+    A read-only list of all the manager classes sorted by filename that imports the managers on first access.
+    """
+
+    def _managers(self):
+        global _sorted
+        if _sorted is None:
+            import_all_managers()
+            _sorted = sorted(_registered, key=lambda m: m.filename)
+        return _sorted
+
+    def __getitem__(self, index):
+        return self._managers()[index]
+
+    def __iter__(self):
+        return iter(self._managers())
+
+    def __len__(self):
+        return len(self._managers())
+
+    def __contains__(self, manager_cls):
+        return manager_cls in self._managers()
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self._managers()!r})'
+
+
+ALL_MANAGERS = AllManagers()
+MANAGERS_BY_FILE = ManagersByFile()
@@ -0,0 +1,442 @@
+"""
+A JSON-RPC 2.0 service for editor frontends, over stdio, that sends the rows and fields that changed rather than
+whole tables.
+
+    python -m swr_ed.rpc DATA_PATH
+
+Messages are JSON objects (or batches of them), one per line. Every data file has a version, bumped by each batch of
+edits that changes it. ``subscribe`` returns the rows of a file and its version; after that the client gets a
+``changes`` notification for every new version, with only the rows and fields that changed since the version it
+has. The rows of every version are kept as a PersistentVector (see swr_ed.history): versions share their untouched
+subtrees, and comparing two versions skips those, so both the memory of a version and the size of a delta grow with
+the size of the change rather than with the size of the file.
+
+Methods:
+
+- ``files()``: the names of the data files.
+- ``subscribe(filename, version=None)``: the rows of ``filename``, or only the changes since ``version``.
+- ``unsubscribe(filename)``.
+- ``sync(filename, version)``: the changes since ``version`` (all the rows when that version is too old).
+- ``edit(edits, versions=None, allow_read_only=False)``: applies a batch of edits, to any number of files, as a
+  whole or not at all. Every edit is ``{"filename", "op", "index", "values"}``, ``op`` being ``set`` (the default),
+  ``append`` or ``pop``. With ``versions`` (a version by filename), the batch is refused if any of those files
+  changed since.
+- ``save(filenames=None, allow_read_only=False)``: writes the files edited since they were loaded or saved.
+"""
+import argparse
+import inspect
+import json
+import logging
+import sys
+from collections import OrderedDict
+
+from . import ALL_MANAGERS, MANAGERS_BY_FILE
+from .exceptions import SWRebellionEditorError, SWRebellionEditorValidationError
+from .history import ManagerHistory, Snapshot
+from .validation import check_data_tuples
+
+log = logging.getLogger(__name__)
+
+MAX_VERSIONS = 256
+
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+VALIDATION_ERROR = 1
+VERSION_CONFLICT = 2
+
+
+class RPCError(Exception):
+    def __init__(self, code, message, data=None):
+        super().__init__(message)
+        self.code = code
+        self.data = data
+
+    def to_json(self):
+        error = {'code': self.code, 'message': str(self)}
+        if self.data is not None:
+            error['data'] = self.data
+        return error
+
+
+class ManagerState:
+    """
+    The versions of the rows of a loaded manager. ``versions`` holds the rows (as the tuples that are packed in the
+    data file) of the last MAX_VERSIONS versions, ``manager.data`` is kept in step with the last one.
+    """
+
+    def __init__(self, manager):
+        self.manager = manager
+        self.history = ManagerHistory(manager)
+        self.schema = manager.schema
+        self.version = 0
+        self.saved_version = 0
+        self.versions = OrderedDict([(0, self.history.rows)])
+        self.columns = list(self.record(self.rows[0]).keys()) if len(self.rows) else list(self.schema.names)
+
+    @property
+    def rows(self):
+        return self.history.rows
+
+    def record(self, row):
+        """
+        Returns a row as a dict by column, with the names resolved like ``manager.data``.
+        """
+        entry = self.manager.upgrade_data(row)
+        return entry if isinstance(entry, dict) else dict(zip(self.schema.names, entry))
+
+    def commit(self, rows):
+        """
+        Makes ``rows`` (a PersistentVector) the new version. Only the rows of ``manager.data`` that changed are
+        rebuilt.
+        """
+        self.history.restore(Snapshot(rows))
+        self.add_version()
+
+    def add_version(self):
+        rows = self.rows
+        self.version += 1
+        self.versions[self.version] = rows
+        while len(self.versions) > MAX_VERSIONS:
+            self.versions.popitem(last=False)
+
+    def full(self):
+        return {
+            'filename': self.manager.filename,
+            'version': self.version,
+            'fields': self.columns,
+            'rows': [list(self.record(row).values()) for row in self.rows],
+        }
+
+    def delta(self, since):
+        """
+        Returns the rows and fields that changed since the version ``since``, as ``[index, {column: value}]`` pairs,
+        or the full rows (see full) when that version is no longer kept.
+        """
+        old = self.versions.get(since)
+        if old is None:
+            return dict(self.full(), reset=True)
+        rows = self.rows
+        changes = []
+        for index in sorted(rows.changed_indices(old)):
+            if index >= len(rows):
+                break
+            new = self.record(rows[index])
+            if index < len(old):
+                previous = self.record(old[index])
+                new = {column: value for column, value in new.items() if previous.get(column) != value}
+            changes.append([index, new])
+        return {
+            'filename': self.manager.filename,
+            'from_version': since,
+            'version': self.version,
+            'count': len(rows),
+            'rows': changes,
+        }
+
+
+JSON_TYPES = {
+    dict: 'an object',
+    list: 'an array',
+    str: 'a string',
+    int: 'an integer',
+    bool: 'a boolean',
+    type(None): 'null',
+}
+
+
+def expect(name, value, *types):
+    """
+    Raises an INVALID_PARAMS RPCError unless ``value`` is an instance of one of ``types``. Booleans are not taken
+    for integers.
+    """
+    if not isinstance(value, types) or (isinstance(value, bool) and bool not in types):
+        expected = ' or '.join(JSON_TYPES[value_type] for value_type in types)
+        raise RPCError(INVALID_PARAMS, f'{name} must be {expected}, not {value!r}')
+    return value
+
+
+def derive(schema, row, edited):
+    """
+    Recomputes the derived fields of ``row`` (a list) whose sources are in ``edited`` (a set of field indexes),
+    unless they were edited themselves. ``edited`` is updated with the fields recomputed.
+    """
+    for field, sources, formula in schema.derived:
+        if field.index not in edited and not edited.isdisjoint(sources):
+            try:
+                row[field.index] = formula(tuple(row[index] for index in sources))
+            except TypeError:
+                # A source that is not a number, it is reported when the row is checked
+                continue
+            edited.add(field.index)
+
+
+class EditorService:
+    """
+    The methods of the service for the installation in ``data_path`` (see the module documentation). The managers
+    are loaded on first use. ``notify(method, params)`` is called with the notifications for the client.
+    """
+
+    def __init__(self, data_path, manager_classes=None, notify=None):
+        self.data_path = data_path
+        self.manager_classes = {
+            manager_cls.filename: manager_cls for manager_cls in (manager_classes or ALL_MANAGERS)
+        }
+        self.notify = notify or (lambda method, params: None)
+        self.states = {}
+        # The version last sent to the client, by subscribed filename
+        self.subscriptions = {}
+        self.methods = {
+            'files': self.files,
+            'subscribe': self.subscribe,
+            'unsubscribe': self.unsubscribe,
+            'sync': self.sync,
+            'edit': self.edit,
+            'save': self.save,
+        }
+
+    def state(self, filename):
+        expect('filename', filename, str)
+        state = self.states.get(filename)
+        if state is None:
+            manager_cls = self.manager_classes.get(filename)
+            if manager_cls is None:
+                raise RPCError(INVALID_PARAMS, f'Unknown data file {filename!r}')
+            state = self.states[filename] = ManagerState(manager_cls(self.data_path))
+        return state
+
+    def files(self):
+        return list(self.manager_classes)
+
+    def subscribe(self, filename, version=None):
+        expect('version', version, int, type(None))
+        state = self.state(filename)
+        result = state.full() if version is None else state.delta(version)
+        self.subscriptions[filename] = state.version
+        return result
+
+    def unsubscribe(self, filename):
+        expect('filename', filename, str)
+        self.subscriptions.pop(filename, None)
+        return True
+
+    def sync(self, filename, version):
+        expect('version', version, int)
+        return self.state(filename).delta(version)
+
+    def apply(self, state, edits, allow_read_only):
+        """
+        Returns the rows of ``state`` with ``edits`` applied, without changing anything, after checking them.
+        """
+        schema = state.schema
+        rows = state.rows
+        edited = {}
+        for edit in edits:
+            op = expect('op', edit.get('op', 'set'), str)
+            values = expect('values', edit.get('values') or {}, dict)
+            unknown = [name for name in values if name not in schema.by_name]
+            if unknown:
+                raise RPCError(INVALID_PARAMS, f'{state.manager.filename} has no field {", ".join(unknown)}')
+            if op == 'set':
+                index = edit.get('index')
+                if type(index) is not int or not 0 <= index < len(rows):
+                    raise RPCError(INVALID_PARAMS, f'{state.manager.filename} has no row {index!r}')
+                row = list(rows[index])
+                for name, value in values.items():
+                    row[schema.by_name[name].index] = value
+                edited.setdefault(index, set()).update(schema.by_name[name].index for name in values)
+                rows = rows.set(index, tuple(row))
+            elif op == 'append':
+                missing = [name for name in schema.names if name not in values]
+                if missing:
+                    raise RPCError(
+                        INVALID_PARAMS, f'The new row of {state.manager.filename} needs {", ".join(missing)}'
+                    )
+                rows = rows.append(tuple(values[name] for name in schema.names))
+                edited.pop(len(rows) - 1, None)
+            elif op == 'pop':
+                if not len(rows):
+                    raise RPCError(INVALID_PARAMS, f'{state.manager.filename} has no rows')
+                rows = rows.pop()
+                edited.pop(len(rows), None)
+            else:
+                raise RPCError(INVALID_PARAMS, f'Unknown edit {op!r}')
+
+        for index, fields in edited.items():
+            if index < len(rows):
+                row = list(rows[index])
+                derive(schema, row, fields)
+                rows = rows.set(index, tuple(row))
+
+        indexes = sorted(rows.changed_indices(state.rows))
+        if not indexes:
+            return state.rows, []
+        indexes = [index for index in indexes if index < len(rows)]
+        loaded_tuples = None
+        manager = state.manager
+        if not allow_read_only and manager.loaded_rows is not None:
+            loaded_count = len(manager.loaded_rows) // schema.size
+            loaded_tuples = [
+                manager.data_struct.unpack_from(manager.loaded_rows, index * schema.size)
+                for index in indexes if index < loaded_count
+            ]
+        issues = check_data_tuples(schema, [rows[index] for index in indexes], loaded_tuples, manager.filename)
+        # The lines of the issues are positions in the rows checked
+        return rows, [issue._replace(line=indexes[issue.line]) for issue in issues]
+
+    def edit(self, edits, versions=None, allow_read_only=False):
+        expect('edits', edits, list)
+        expect('versions', versions, dict, type(None))
+        expect('allow_read_only', allow_read_only, bool)
+        by_file = OrderedDict()
+        for edit in edits:
+            expect('Every edit', edit, dict)
+            by_file.setdefault(expect('filename', edit.get('filename'), str), []).append(edit)
+
+        for filename, version in (versions or {}).items():
+            expect('version', version, int)
+            state = self.state(filename)
+            if state.version != version:
+                raise RPCError(
+                    VERSION_CONFLICT, f'{filename} is at version {state.version}, not {version}',
+                    {'filename': filename, 'version': state.version},
+                )
+
+        # Every file is checked before any is changed, so that the batch is applied as a whole or not at all
+        new_rows = {}
+        issues = []
+        for filename, file_edits in by_file.items():
+            state = self.state(filename)
+            new_rows[filename], file_issues = self.apply(state, file_edits, allow_read_only)
+            issues.extend(file_issues)
+        if issues:
+            error = SWRebellionEditorValidationError(issues)
+            raise RPCError(VALIDATION_ERROR, str(error), [issue._asdict() for issue in issues])
+
+        for filename, rows in new_rows.items():
+            state = self.states[filename]
+            if rows is not state.rows:
+                state.commit(rows)
+        self.publish(new_rows)
+        return {'versions': {filename: self.states[filename].version for filename in new_rows}}
+
+    def publish(self, filenames):
+        """
+        Sends the changes of the subscribed ``filenames`` since the version the client has.
+        """
+        for filename in filenames:
+            version = self.subscriptions.get(filename)
+            state = self.states[filename]
+            if version is not None and version != state.version:
+                self.notify('changes', state.delta(version))
+                self.subscriptions[filename] = state.version
+
+    def save(self, filenames=None, allow_read_only=False):
+        expect('filenames', filenames, list, type(None))
+        expect('allow_read_only', allow_read_only, bool)
+        saved = {}
+        for filename in self.states if filenames is None else filenames:
+            state = self.state(filename)
+            if state.version == state.saved_version:
+                continue
+            try:
+                state.manager.save(allow_read_only)
+            except SWRebellionEditorValidationError as error:
+                raise RPCError(VALIDATION_ERROR, str(error), [issue._asdict() for issue in error.issues]) from None
+            # Saving recomputes the derived fields of the rows whose sources changed, see update_derived_fields
+            rows = state.rows
+            state.history.sync()
+            if state.rows is not rows:
+                state.add_version()
+            state.saved_version = state.version
+            saved[filename] = state.manager.md5_checksum
+        self.publish(saved)
+        return {'saved': saved}
+
+    def call(self, method, params):
+        function = self.methods.get(method)
+        if function is None:
+            raise RPCError(METHOD_NOT_FOUND, f'Unknown method {method!r}')
+        args, kwargs = (), {}
+        if isinstance(params, dict):
+            kwargs = params
+        elif params is not None:
+            args = params
+        try:
+            inspect.signature(function).bind(*args, **kwargs)
+        except TypeError as error:
+            raise RPCError(INVALID_PARAMS, str(error)) from None
+        return function(*args, **kwargs)
+
+    def handle(self, message):
+        """
+        Returns the response to a JSON-RPC request (or batch of requests), None for notifications.
+        """
+        if message == []:
+            return {'jsonrpc': '2.0', 'id': None, 'error': RPCError(INVALID_REQUEST, 'Empty batch').to_json()}
+        if isinstance(message, list):
+            responses = [response for response in map(self.handle, message) if response is not None]
+            return responses or None
+        if not isinstance(message, dict) or not isinstance(message.get('method'), str):
+            return {'jsonrpc': '2.0', 'id': None, 'error': RPCError(INVALID_REQUEST, 'Invalid request').to_json()}
+
+        request_id = message.get('id')
+        try:
+            result = self.call(message['method'], message.get('params'))
+        except RPCError as error:
+            response = {'error': error.to_json()}
+        except SWRebellionEditorError as error:
+            response = {'error': RPCError(INTERNAL_ERROR, str(error)).to_json()}
+        except Exception as error:
+            # A bug in the service fails the request, not the session
+            log.exception('%s failed', message['method'])
+            response = {'error': RPCError(INTERNAL_ERROR, f'{type(error).__name__}: {error}').to_json()}
+        else:
+            response = {'result': result}
+        if 'id' not in message:
+            return None
+        return dict({'jsonrpc': '2.0', 'id': request_id}, **response)
+
+
+def serve(service, input_file, output_file):
+    """
+    Answers the requests read from ``input_file``, one JSON message per line, until it ends.
+    """
+    def write(message):
+        output_file.write(json.dumps(message, ensure_ascii=False, separators=(',', ':')) + '\n')
+        output_file.flush()
+
+    service.notify = lambda method, params: write({'jsonrpc': '2.0', 'method': method, 'params': params})
+    for line in input_file:
+        if not line.strip():
+            continue
+        try:
+            message = json.loads(line)
+        except ValueError as error:
+            write({'jsonrpc': '2.0', 'id': None, 'error': RPCError(PARSE_ERROR, str(error)).to_json()})
+            continue
+        response = service.handle(message)
+        if response is not None:
+            write(response)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('data_path')
+    parser.add_argument('--file', dest='filenames', action='append', help='Only serve this data file')
+    args = parser.parse_args(argv)
+
+    manager_classes = None
+    if args.filenames:
+        filenames = [filename.upper() for filename in args.filenames]
+        unknown = [filename for filename in filenames if filename not in MANAGERS_BY_FILE]
+        if unknown:
+            parser.error(f'unknown data files: {", ".join(unknown)}')
+        manager_classes = [MANAGERS_BY_FILE[filename] for filename in filenames]
+    serve(EditorService(args.data_path, manager_classes), sys.stdin, sys.stdout)
+
+
+if __name__ == '__main__':
+    main()
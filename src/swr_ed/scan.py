@@ -0,0 +1,207 @@
+"""
+Finds the data files that differ from the stock ones, across any number of installations.
+
+    python -m swr_ed.scan DATA_PATH [DATA_PATH ...] [--workers 16] [--cache digests.json] [--changed]
+
+Installations are scanned in a pool of threads, one installation per task: a single listing of its GDATA directory
+tells the missing files apart, and the files are hashed with large reads into a buffer kept by every thread
+(hashlib releases the GIL while hashing). With a DigestCache, the files whose size, modification and change times and
+inode did not change since the last scan are not read at all.
+
+``-`` as DATA_PATH reads the installations from stdin, one per line.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from . import ALL_MANAGERS
+
+STOCK = 'stock'
+MODIFIED = 'modified'
+MISSING = 'missing'
+
+READ_SIZE = 1024 * 1024
+DIGEST_CACHE_FORMAT_VERSION = 2
+
+_local = threading.local()
+
+
+class ScanResult(namedtuple('ScanResult', ('data_path', 'filename', 'status', 'md5_checksum'))):
+    __slots__ = ()
+
+
+class DigestCache:
+    """
+    The md5 checksums of files, keyed by their path and valid while their size, modification and change times
+    and inode do not change. Kept in a JSON file when ``path`` is given, see load and save.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.digests = {}
+        if path is not None:
+            self.load()
+
+    @staticmethod
+    def signature(stat):
+        # The change time can not be set back, unlike the modification time
+        return [stat.st_size, stat.st_mtime_ns, stat.st_ino, stat.st_ctime_ns]
+
+    def get(self, file_path, stat):
+        entry = self.digests.get(file_path)
+        if entry is not None and entry[:-1] == self.signature(stat):
+            return entry[-1]
+        return None
+
+    def put(self, file_path, stat, md5_checksum):
+        # A single assignment, so threads can share the cache
+        self.digests[file_path] = self.signature(stat) + [md5_checksum]
+
+    def load(self):
+        try:
+            with open(self.path, encoding='utf-8') as file_obj:
+                content = json.load(file_obj)
+        except FileNotFoundError:
+            return
+        except ValueError:
+            # An unreadable cache is rebuilt
+            return
+        if content.get('version') == DIGEST_CACHE_FORMAT_VERSION:
+            self.digests = content['digests']
+
+    def save(self):
+        """
+        Writes the checksums to ``path``, nothing is written for a cache without a path.
+        """
+        if self.path is None:
+            return
+        temp_path = f'{self.path}.{os.getpid()}.tmp'
+        with open(temp_path, "w", encoding='utf-8') as file_obj:
+            json.dump({'version': DIGEST_CACHE_FORMAT_VERSION, 'digests': self.digests}, file_obj)
+        os.replace(temp_path, self.path)
+
+
+def file_md5(file_path):
+    """
+    Returns the md5 checksum of a file, read in chunks of READ_SIZE bytes into a buffer reused by the thread.
+    """
+    view = getattr(_local, 'view', None)
+    if view is None:
+        view = _local.view = memoryview(bytearray(READ_SIZE))
+    md5 = hashlib.md5()
+    with open(file_path, "rb", buffering=0) as file_obj:
+        while True:
+            size = file_obj.readinto(view)
+            if not size:
+                break
+            md5.update(view[:size])
+    return md5.hexdigest()
+
+
+def expected_checksums(manager_classes=None):
+    """
+    Returns a dict with the expected checksum of every data file, by directory (GDATA) and file name.
+    """
+    checksums = {}
+    for manager_cls in ALL_MANAGERS if manager_classes is None else manager_classes:
+        checksums.setdefault(manager_cls.file_location, {})[manager_cls.filename] = manager_cls.expected_md5_checksum
+    return checksums
+
+
+def scan_installation(data_path, checksums, cache=None):
+    """
+    Returns the list of ScanResult of the files of ``checksums`` (see expected_checksums) in ``data_path``.
+    File names are matched regardless of their case, as they are on Windows.
+    """
+    results = []
+    for location, files in checksums.items():
+        try:
+            with os.scandir(os.path.join(data_path, location)) as entries:
+                found = {entry.name.upper(): entry for entry in entries}
+        except (FileNotFoundError, NotADirectoryError):
+            found = {}
+
+        for filename, expected in files.items():
+            entry = found.get(filename.upper())
+            if entry is None or not entry.is_file():
+                results.append(ScanResult(data_path, filename, MISSING, None))
+                continue
+            md5_checksum = None
+            if cache is not None:
+                stat = entry.stat()
+                md5_checksum = cache.get(entry.path, stat)
+            if md5_checksum is None:
+                md5_checksum = file_md5(entry.path)
+                if cache is not None:
+                    cache.put(entry.path, stat, md5_checksum)
+            status = STOCK if md5_checksum == expected else MODIFIED
+            results.append(ScanResult(data_path, filename, status, md5_checksum))
+    return results
+
+
+def scan(data_paths, manager_classes=None, checksums=None, workers=None, cache=None):
+    """
+    Scans every installation of ``data_paths`` (any iterable, consumed as the scan goes) and yields a ScanResult
+    per data file of ``manager_classes``, as soon as the installation it belongs to is scanned. The files are
+    compared against the expected checksums of the managers, or against ``checksums`` (a dict by file name).
+    """
+    if checksums is None:
+        checksums = expected_checksums(manager_classes)
+    else:
+        checksums = {
+            location: {filename: checksums[filename] for filename in files}
+            for location, files in expected_checksums(manager_classes).items()
+        }
+
+    workers = workers or min(32, (os.cpu_count() or 1) + 4)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # A bounded number of installations in flight, so that the results stream back in constant memory
+        limit = workers * 4
+        pending = set()
+        for data_path in data_paths:
+            pending.add(executor.submit(scan_installation, data_path, checksums, cache))
+            if len(pending) >= limit:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from future.result()
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield from future.result()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('data_paths', nargs='+', metavar='DATA_PATH')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--cache', help='JSON file with the checksums of the files scanned before')
+    parser.add_argument('--changed', action='store_true', help='Only print the modified and missing files')
+    args = parser.parse_args(argv)
+
+    if args.data_paths == ['-']:
+        data_paths = (line.strip() for line in sys.stdin if line.strip())
+    else:
+        data_paths = args.data_paths
+    cache = DigestCache(args.cache) if args.cache else None
+    found = False
+    try:
+        for result in scan(data_paths, workers=args.workers, cache=cache):
+            if result.status != STOCK:
+                found = True
+            elif args.changed:
+                continue
+            print(f'{result.data_path}\t{result.filename}\t{result.status}')
+    finally:
+        if cache is not None:
+            cache.save()
+    if found:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
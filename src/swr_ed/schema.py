@@ -0,0 +1,126 @@
+"""
+The compiled layout of the rows of a data file.
+
+Managers compile their schema once, when their class is created. Besides the ``struct.Struct`` used to (un)pack
+the rows, the schema knows the offset, size, signedness and range of values of every field.
+"""
+import hashlib
+import re
+import struct
+from collections import namedtuple
+
+FORMAT_TOKEN = re.compile(r'(\d*)([cbB?hHiIlLqQnNefdspP])')
+SIGNED_CODES = set('bhilqn')
+INTEGER_CODES = set('bBhHiIlLqQnN')
+
+
+class FieldLayout:
+    __slots__ = ('name', 'index', 'format', 'offset', 'size', 'signed', 'min', 'max', 'field_def')
+
+    def __init__(self, name, index, struct_format, offset, size, field_def=None):
+        self.name = name
+        self.index = index
+        self.format = struct_format
+        self.offset = offset
+        self.size = size
+        self.field_def = field_def
+        self.signed = struct_format in SIGNED_CODES
+        if struct_format in INTEGER_CODES:
+            bits = size * 8
+            self.min = -(1 << (bits - 1)) if self.signed else 0
+            self.max = (1 << (bits - 1)) - 1 if self.signed else (1 << bits) - 1
+        else:
+            self.min = None
+            self.max = None
+
+    def __repr__(self):
+        return f'<FieldLayout {self.name} {self.format} offset={self.offset} size={self.size}>'
+
+
+class DerivedField(namedtuple('DerivedField', ('field', 'sources', 'formula'))):
+    """
+    A field whose value is computed with ``formula`` from the tuple of the values of its ``sources``
+    (the indexes of the source fields).
+    """
+    __slots__ = ()
+
+
+class Schema:
+    """
+    The layout of a row: ``fields`` is a tuple of FieldLayout, ``struct`` the compiled ``struct.Struct``
+    and ``fingerprint`` a short hash that changes whenever the layout (names or formats) changes.
+    """
+
+    def __init__(self, byte_order, fields, header_format=''):
+        self.byte_order = byte_order
+        self.header_format = header_format
+        self.names = tuple(name for name, _, _ in fields)
+        self.struct = struct.Struct(byte_order + ''.join(code for _, code, _ in fields))
+        self.size = self.struct.size
+
+        layout = []
+        offset = 0
+        for index, (name, code, field_def) in enumerate(fields):
+            size = struct.calcsize(byte_order + code)
+            layout.append(FieldLayout(name, index, code, offset, size, field_def))
+            offset += size
+        self.fields = tuple(layout)
+        self.by_name = {field.name: field for field in self.fields}
+        self.derived = self.build_derived()
+
+        signature = repr((byte_order, header_format, [(name, code) for name, code, _ in fields]))
+        self.fingerprint = hashlib.md5(signature.encode()).hexdigest()[:16]
+
+    def build_derived(self):
+        """
+        The derived fields, in the order of the schema. A field can be derived from other derived fields as long
+        as they come before it, so that computing them in order is enough.
+        """
+        derived = []
+        derived_names = set()
+        for field in self.fields:
+            sources = getattr(field.field_def, 'sources', None)
+            if not sources:
+                continue
+            for name in sources:
+                if name not in self.by_name:
+                    raise ValueError(f'{field.name} is derived from {name}, which is not a field')
+                if getattr(self.by_name[name].field_def, 'sources', None) and name not in derived_names:
+                    raise ValueError(f'{field.name} is derived from {name}, a derived field that is not before it')
+            derived.append(DerivedField(
+                field, tuple(self.by_name[name].index for name in sources), field.field_def.formula
+            ))
+            derived_names.add(field.name)
+        return tuple(derived)
+
+    def __iter__(self):
+        return iter(self.fields)
+
+    def __len__(self):
+        return len(self.fields)
+
+    def __getitem__(self, name):
+        return self.by_name[name]
+
+    def __repr__(self):
+        return f'<Schema {self.struct.format} fingerprint={self.fingerprint}>'
+
+    @classmethod
+    def from_fields(cls, byte_order, fields, header_format=''):
+        """
+        Builds the schema from an ordered dict of FieldDef.
+        """
+        return cls(byte_order, [(name, field.format, field) for name, field in fields.items()], header_format)
+
+    @classmethod
+    def from_format(cls, byte_order, struct_format, header_format=''):
+        """
+        Builds the schema from a plain struct format, the fields are named field_0, field_1, etc.
+        """
+        codes = []
+        for count, code in FORMAT_TOKEN.findall(struct_format):
+            if code in 'sp':
+                codes.append(f'{count or 1}{code}')
+            else:
+                codes.extend([code] * int(count or 1))
+        return cls(byte_order, [(f'field_{index}', code, None) for index, code in enumerate(codes)], header_format)
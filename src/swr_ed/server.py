@@ -0,0 +1,282 @@
+"""
+Serves the rows of the data files of an installation as JSON, read-only, over HTTP.
+
+    python -m swr_ed.server DATA_PATH [--host 127.0.0.1] [--port 8000] [--file CAPSHPSD.DAT]
+
+``GET /files`` lists the data files, with their number of rows and their ETag. ``GET /files/CAPSHPSD.DAT`` returns
+a page of rows, see ``offset`` and ``limit``, with only the fields listed in ``fields`` (comma separated) if given.
+
+The managers are loaded once and kept up to date by a Watcher. The ETag of a data file is its md5 checksum (and the
+fingerprint of TEXTSTRA.DLL for the files with names), so clients revalidate with If-None-Match and get a 304 until
+the file changes. Responses are serialized once per version of a file and then served from a cache.
+"""
+import argparse
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from operator import itemgetter
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from . import MANAGERS_BY_FILE
+from .export import JSONLinesWriter
+from .watcher import Watcher
+
+log = logging.getLogger(__name__)
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 10000
+MAX_CACHED_RESPONSES = 1024
+
+
+class RequestError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def manager_etag(manager):
+    """
+    Returns the strong ETag of the rows of ``manager``: the md5 checksum of its data file, followed by a digest of
+    the fingerprint of TEXTSTRA.DLL when its rows have names.
+    """
+    etag = manager.md5_checksum
+    fingerprint = getattr(getattr(manager, 'text_stra', None), 'fingerprint', None)
+    if fingerprint is not None and 'name_id_1' in manager.schema.names:
+        etag += '-' + hashlib.md5(fingerprint.encode('utf-8')).hexdigest()[:16]
+    return f'"{etag}"'
+
+
+def row_columns(manager):
+    """
+    Returns the column names of the rows of ``manager`` and a function that returns the values of a row, in the
+    same order. The columns are the keys of the upgraded rows, as in export.
+    """
+    data = manager.data
+    if data and isinstance(data[0], dict):
+        return list(data[0].keys()), lambda row: tuple(row.values())
+    return list(manager.schema.names), tuple
+
+
+def encode_page(manager, offset, limit, fields=None):
+    """
+    Returns the JSON of the page of ``limit`` rows of ``manager`` starting at ``offset``, with only ``fields``.
+    """
+    columns, get_values = row_columns(manager)
+    rows = [get_values(row) for row in manager.data[offset:offset + limit]]
+    if fields is not None:
+        unknown = [field for field in fields if field not in columns]
+        if unknown:
+            raise RequestError(HTTPStatus.BAD_REQUEST, f'Unknown fields: {", ".join(unknown)}')
+        indexes = [columns.index(field) for field in fields]
+        select = itemgetter(*indexes) if len(indexes) > 1 else lambda values: (values[indexes[0]],)
+        rows = [select(values) for values in rows]
+        columns = list(fields)
+
+    records = JSONLinesWriter(None, columns).encode_rows(rows) if rows and columns else ['{}'] * len(rows)
+    header = json.dumps({
+        'filename': manager.filename,
+        'total': len(manager.data),
+        'offset': offset,
+        'limit': limit,
+        'fields': columns,
+    }, ensure_ascii=False)
+    return f'{header[:-1]}, "records": [{", ".join(records)}]}}'.encode('utf-8')
+
+
+class ResponseCache:
+    """
+    The serialized responses for the managers of a Watcher, keyed by the ETag of the file they were built from so a
+    reloaded file is never served from the responses of the previous version. These are dropped when the watcher
+    notifies the change, and the least recently used responses are dropped past ``max_entries``.
+    """
+
+    def __init__(self, watcher, max_entries=MAX_CACHED_RESPONSES):
+        self.watcher = watcher
+        self.max_entries = max_entries
+        self.responses = OrderedDict()
+        self.lock = threading.Lock()
+        # A response is built by a single thread, the others wait for it instead of building it too. This also keeps
+        # the rows of a manager from being decoded by several threads at once.
+        self.file_locks = {filename: threading.Lock() for filename in watcher.managers}
+        self.builds = 0
+        watcher.subscribe(self.on_change)
+
+    def get(self, key, build):
+        with self.lock:
+            response = self.responses.get(key)
+            if response is not None:
+                self.responses.move_to_end(key)
+                return response
+        with self.file_locks[key[0]]:
+            with self.lock:
+                response = self.responses.get(key)
+            if response is None:
+                response = build()
+                self.builds += 1
+                with self.lock:
+                    self.responses[key] = response
+                    while len(self.responses) > self.max_entries:
+                        self.responses.popitem(last=False)
+        return response
+
+    def on_change(self, change):
+        with self.lock:
+            for key in [key for key in self.responses if key[0] == change.filename]:
+                del self.responses[key]
+
+    def page(self, filename, offset=0, limit=DEFAULT_LIMIT, fields=None):
+        """
+        Returns the ETag and the JSON of a page of the rows of ``filename``.
+        """
+        manager = self.watcher.managers.get(filename)
+        if manager is None:
+            raise RequestError(HTTPStatus.NOT_FOUND, f'Unknown data file {filename}')
+        etag = manager_etag(manager)
+        key = (filename, etag, offset, limit, None if fields is None else tuple(fields))
+        return etag, self.get(key, lambda: encode_page(manager, offset, limit, fields))
+
+    def index(self):
+        """
+        Returns the ETag and the JSON of the list of the data files.
+        """
+        managers = sorted(self.watcher.managers.items())
+        etags = [manager_etag(manager) for _, manager in managers]
+        etag = '"%s"' % hashlib.md5(''.join(etags).encode('utf-8')).hexdigest()
+        files = []
+        for (filename, manager), file_etag in zip(managers, etags):
+            with self.file_locks[filename]:
+                files.append({'filename': filename, 'count': len(manager.data), 'etag': file_etag})
+        return etag, json.dumps({'files': files}, ensure_ascii=False).encode('utf-8')
+
+
+def parse_int(query, name, default, maximum=None):
+    values = query.get(name)
+    if not values:
+        return default
+    try:
+        value = int(values[-1])
+    except ValueError:
+        value = -1
+    if value < 0 or (maximum is not None and value > maximum):
+        limit = f' and at most {maximum}' if maximum is not None else ''
+        raise RequestError(HTTPStatus.BAD_REQUEST, f'{name} must be an integer from 0{limit}')
+    return value
+
+
+def etag_matches(header, etag):
+    if header is None:
+        return False
+    if header.strip() == '*':
+        return True
+    # If-None-Match uses the weak comparison
+    return any(tag.strip().removeprefix('W/') == etag for tag in header.split(','))
+
+
+class DataRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'swr_ed'
+
+    def do_GET(self):
+        self.respond(send_body=True)
+
+    def do_HEAD(self):
+        self.respond(send_body=False)
+
+    def route(self):
+        url = urlsplit(self.path)
+        parts = [unquote(part) for part in url.path.split('/') if part]
+        query = parse_qs(url.query)
+        cache = self.server.responses
+        if parts == ['files']:
+            return cache.index()
+        if len(parts) == 2 and parts[0] == 'files':
+            fields = query.get('fields')
+            if fields is not None:
+                fields = [field for field in ','.join(fields).split(',') if field]
+            return cache.page(
+                parts[1].upper(),
+                offset=parse_int(query, 'offset', 0),
+                limit=parse_int(query, 'limit', DEFAULT_LIMIT, MAX_LIMIT),
+                fields=fields,
+            )
+        raise RequestError(HTTPStatus.NOT_FOUND, f'Unknown path {url.path}')
+
+    def respond(self, send_body):
+        try:
+            etag, body = self.route()
+        except RequestError as error:
+            etag, body = None, json.dumps({'error': str(error)}).encode('utf-8')
+            self.send_response(error.status)
+        else:
+            if etag_matches(self.headers.get('If-None-Match'), etag):
+                self.send_response(HTTPStatus.NOT_MODIFIED)
+                self.send_header('ETag', etag)
+                self.send_header('Cache-Control', 'no-cache')
+                self.end_headers()
+                return
+            self.send_response(HTTPStatus.OK)
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        log.debug('%s %s', self.address_string(), format % args)
+
+
+class DataServer(ThreadingHTTPServer):
+    """
+    A threaded HTTP server of the managers of ``watcher``, see the module documentation. The watcher is not
+    started, see serve.
+    """
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, server_address, watcher, handler_cls=DataRequestHandler):
+        super().__init__(server_address, handler_cls)
+        self.watcher = watcher
+        self.responses = ResponseCache(watcher)
+
+
+def serve(data_path, host='127.0.0.1', port=8000, manager_classes=None):
+    """
+    Serves the installation in ``data_path`` until interrupted, reloading the files that change.
+    """
+    with Watcher(data_path, manager_classes) as watcher:
+        with DataServer((host, port), watcher) as server:
+            log.info('Serving %s on http://%s:%s/files', data_path, *server.server_address[:2])
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('data_path')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--file', dest='filenames', action='append', help='Only serve this data file')
+    args = parser.parse_args(argv)
+
+    manager_classes = None
+    if args.filenames:
+        filenames = [filename.upper() for filename in args.filenames]
+        unknown = [filename for filename in filenames if filename not in MANAGERS_BY_FILE]
+        if unknown:
+            parser.error(f'unknown data files: {", ".join(unknown)}')
+        manager_classes = [MANAGERS_BY_FILE[filename] for filename in filenames]
+
+    logging.basicConfig(level=logging.INFO)
+    serve(args.data_path, args.host, args.port, manager_classes)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,266 @@
+"""
+Game data loaded once into shared memory and used from many processes.
+
+    with SharedInstallation.create(data_path) as installation:
+        with ProcessPoolExecutor() as executor:
+            executor.map(work, [installation.handle] * jobs)
+
+    def work(handle):
+        installation = SharedInstallation.attach(handle)
+        manager = installation.manager('CAPSHPSD.DAT')
+        ...
+
+A single ``multiprocessing.shared_memory`` segment holds, for every data file, its raw content and one column per
+field, plus the strings of TEXTSTRA.DLL. The handle is a small picklable tuple with the name of the segment and the
+offsets of everything in it. Attaching maps the segment without copying anything.
+
+The managers returned by ``manager`` decode their rows from the shared content on access, and can not be saved.
+"""
+import array
+import bisect
+import hashlib
+import struct
+import sys
+from collections import OrderedDict, namedtuple
+from collections.abc import Sequence
+from multiprocessing import shared_memory
+from types import MappingProxyType
+
+from . import ALL_MANAGERS, MANAGERS_BY_FILE
+from .base import SWRDataManager
+from .dll_wrappers import TextStraWrapper
+from .dll_wrappers.resources import read_string_table
+from .schema import INTEGER_CODES
+
+SharedHandle = namedtuple('SharedHandle', ('name', 'data_path', 'files', 'strings'))
+SharedFile = namedtuple('SharedFile', ('filename', 'offset', 'size', 'md5_checksum', 'columns'))
+SharedColumn = namedtuple('SharedColumn', ('name', 'typecode', 'offset', 'length'))
+SharedStrings = namedtuple('SharedStrings', ('ids_offset', 'offsets_offset', 'text_offset', 'count', 'text_size'))
+
+ALIGNMENT = 8
+
+# array typecodes by (size, signed), the typecodes of the struct module have different sizes on some platforms
+ARRAY_TYPECODES = {
+    (size, signed): typecode
+    for typecode in 'bBhHiIlLqQ'
+    for size, signed in [(array.array(typecode).itemsize, typecode.islower())]
+}
+
+
+def _aligned(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def _freeze(row):
+    if isinstance(row, dict):
+        return MappingProxyType(row)
+    if isinstance(row, list):
+        return tuple(row)
+    return row
+
+
+class SharedRows(Sequence):
+    """
+    The rows of a shared data file, each row is decoded (and upgraded) when it is accessed.
+    """
+
+    def __init__(self, manager, payload):
+        self.manager = manager
+        self.payload = payload
+        self.record_size = manager.data_struct.size
+
+    def __len__(self):
+        return len(self.payload) // self.record_size
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        data_tuple = self.manager.data_struct.unpack_from(self.payload, index * self.record_size)
+        return _freeze(self.manager.upgrade_data(data_tuple))
+
+    def __iter__(self):
+        for data_tuple in self.manager.data_struct.iter_unpack(self.payload):
+            yield _freeze(self.manager.upgrade_data(data_tuple))
+
+
+class SharedStringTable:
+    """
+    A read-only stand-in for TextStraWrapper over the strings stored in the segment.
+    """
+
+    def __init__(self, view, strings):
+        self.ids = view(strings.ids_offset, strings.count * 4, 'I')
+        self.offsets = view(strings.offsets_offset, (strings.count + 1) * 4, 'I')
+        self.text = view(strings.text_offset, strings.text_size)
+
+    def get_text(self, text_id):
+        index = bisect.bisect_left(self.ids, text_id)
+        if index == len(self.ids) or self.ids[index] != text_id:
+            return None
+        return str(self.text[self.offsets[index]:self.offsets[index + 1]], 'utf-8')
+
+
+def _build_columns(manager_cls, payload):
+    data_tuples = list(manager_cls.data_struct.iter_unpack(payload))
+    columns = []
+    for field in manager_cls.schema:
+        if field.format not in INTEGER_CODES:
+            continue
+        typecode = ARRAY_TYPECODES[(field.size, field.signed)]
+        columns.append((field.name, array.array(typecode, (row[field.index] for row in data_tuples))))
+    return columns
+
+
+def _build_strings(data_path):
+    # The Windows API can not list the strings of a library, so they are always read from the file
+    strings = read_string_table(TextStraWrapper(data_path).file_path)
+    ids = array.array('I', sorted(strings))
+    offsets = array.array('I', [0])
+    text = bytearray()
+    for text_id in ids:
+        text += strings[text_id].encode('utf-8')
+        offsets.append(len(text))
+    return ids, offsets, bytes(text)
+
+
+class SharedInstallation:
+    def __init__(self, shm, handle, owner):
+        self.shm = shm
+        self.handle = handle
+        self.owner = owner
+        self.files = {shared_file.filename: shared_file for shared_file in handle.files}
+        # The views handed out, by (offset, size, typecode). A view is handed out once and shared by every caller,
+        # the segment can only be unmapped once they are all released
+        self.views = {}
+        self.strings = SharedStringTable(self.view, handle.strings) if handle.strings else None
+
+    @classmethod
+    def create(cls, data_path, manager_classes=None, name=None):
+        """
+        Loads the data files of ``data_path`` (all of them by default) into a new shared memory segment.
+        The creator owns the segment, which is removed by ``close``.
+        """
+        manager_classes = list(ALL_MANAGERS) if manager_classes is None else manager_classes
+
+        blocks = []
+        offset = 0
+
+        def add(content):
+            nonlocal offset
+            offset = _aligned(offset)
+            blocks.append((offset, content))
+            offset += len(content)
+            return offset - len(content)
+
+        files = []
+        for manager_cls in manager_classes:
+            manager = manager_cls(data_path)
+            with open(manager.file_path, "rb") as file_obj:
+                content = file_obj.read()
+            md5_checksum = hashlib.md5(content).hexdigest()
+            manager.check_header(manager.header_struct.unpack_from(content), md5_checksum)
+            file_offset = add(content)
+            columns = tuple(
+                SharedColumn(column_name, column.typecode, add(column.tobytes()), len(column))
+                for column_name, column in _build_columns(manager_cls, content[manager_cls.header_struct.size:])
+            )
+            files.append(SharedFile(manager_cls.filename, file_offset, len(content), md5_checksum, columns))
+
+        strings = None
+        if any(issubclass(manager_cls, SWRDataManager) for manager_cls in manager_classes):
+            ids, offsets, text = _build_strings(data_path)
+            strings = SharedStrings(add(ids.tobytes()), add(offsets.tobytes()), add(text), len(ids), len(text))
+
+        shm = shared_memory.SharedMemory(name=name, create=True, size=max(offset, 1))
+        for block_offset, content in blocks:
+            shm.buf[block_offset:block_offset + len(content)] = content
+        return cls(shm, SharedHandle(shm.name, data_path, tuple(files), strings), owner=True)
+
+    @classmethod
+    def attach(cls, handle):
+        """
+        Attaches to the segment described by ``handle`` (the ``handle`` of the installation that created it).
+        """
+        if sys.version_info >= (3, 13):
+            shm = shared_memory.SharedMemory(name=handle.name, track=False)
+        else:
+            # Worker processes share the resource tracker of their parent, so registering the segment again is
+            # harmless there. Unrelated processes should attach with python 3.13 or later.
+            shm = shared_memory.SharedMemory(name=handle.name)
+        return cls(shm, handle, owner=False)
+
+    def view(self, offset, size, typecode='B'):
+        """
+        A read-only memoryview of ``size`` bytes of the segment, as items of ``typecode``. The same view is returned
+        for the same block, so repeated calls do not pile up views; a view released by a caller is replaced.
+        """
+        key = (offset, size, typecode)
+        view = self.views.get(key)
+        if view is not None:
+            try:
+                view.nbytes
+            except ValueError:
+                view = None
+        if view is None:
+            with self.shm.buf[offset:offset + size] as block:
+                with block.toreadonly() as read_only:
+                    view = self.views[key] = read_only.cast(typecode)
+        return view
+
+    def content(self, filename):
+        """
+        A memoryview of the content of the data file ``filename``.
+        """
+        shared_file = self.files[filename]
+        return self.view(shared_file.offset, shared_file.size)
+
+    def columns(self, filename):
+        """
+        An ordered dict with a memoryview of the values of every integer field of ``filename``.
+        """
+        return OrderedDict(
+            (column.name, self.view(column.offset, column.length * struct.calcsize(column.typecode), column.typecode))
+            for column in self.files[filename].columns
+        )
+
+    def manager(self, filename, manager_cls=None):
+        """
+        Returns a read-only manager whose ``data`` decodes the rows of the shared content on access.
+        """
+        manager_cls = manager_cls or MANAGERS_BY_FILE[filename]
+        manager = manager_cls(self.handle.data_path)
+        manager.read_only = True
+        if isinstance(manager, SWRDataManager):
+            manager.text_stra = self.strings
+
+        shared_file = self.files[filename]
+        header = manager.header_struct.unpack_from(self.shm.buf, shared_file.offset)
+        manager.md5_checksum = shared_file.md5_checksum
+        manager.check_header(header, manager.md5_checksum)
+        manager.header_count = header[1]
+        header_size = manager.header_struct.size
+        manager.data = SharedRows(manager, self.view(shared_file.offset + header_size, shared_file.size - header_size))
+        return manager
+
+    def close(self):
+        """
+        Detaches from the segment, and removes it when this is the installation that created it.
+        The views returned by ``content``, ``columns`` and the managers can not be used afterwards.
+        """
+        self.strings = None
+        for view in self.views.values():
+            view.release()
+        self.views = {}
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
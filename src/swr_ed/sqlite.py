@@ -0,0 +1,159 @@
+"""
+Exports an installation to a SQLite database, and writes the data files back from it.
+
+    python -m swr_ed.sqlite export DATA_PATH DB_PATH
+    python -m swr_ed.sqlite import DB_PATH DATA_PATH
+
+There is a table per data file, named after it (CAPSHPSD.DAT is in table CAPSHPSD), with a column per field and
+the text columns of the rows (like ``name``). The rows keep the order of the file through their ``rowid``.
+The ids and the columns that refer to other files (``family_id``, ``sector_id``, etc) are indexed, so tables can be
+joined on them.
+"""
+import argparse
+import os
+import sqlite3
+import sys
+
+from . import ALL_MANAGERS
+from .exceptions import SWRebellionEditorValidationError
+from .export import iter_row_values
+from .importer import pack_data_file, write_data_files
+from .validation import ValidationIssue, check_rows, format_issues
+
+
+def table_name(manager_cls):
+    return os.path.splitext(manager_cls.filename)[0]
+
+
+def quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def is_key_column(name):
+    """
+    Tells whether a column holds ids, which are indexed. ``field_0`` is the id (or group) of the rows of the
+    managers without field names.
+    """
+    return name in ('id', 'name_id_1', 'field_0') or name.endswith('_id')
+
+
+def export_manager(connection, manager):
+    """
+    Creates the table of ``manager`` (replacing it if it exists) and inserts its rows. Returns the number of rows.
+    """
+    table = table_name(type(manager))
+    columns, values = iter_row_values(manager)
+    field_names = set(manager.schema.names)
+    definitions = ', '.join(
+        f'{quote(column)} {"INTEGER" if column in field_names else "TEXT"}' for column in columns
+    )
+    connection.execute(f'DROP TABLE IF EXISTS {quote(table)}')
+    connection.execute(f'CREATE TABLE {quote(table)} ({definitions})')
+    cursor = connection.executemany(
+        f'INSERT INTO {quote(table)} VALUES ({", ".join("?" * len(columns))})', values
+    )
+    # The indexes are built after the rows are inserted, which is faster than updating them on every insert
+    for column in columns:
+        if is_key_column(column):
+            connection.execute(
+                f'CREATE INDEX {quote(f"{table}_{column}")} ON {quote(table)} ({quote(column)})'
+            )
+    return cursor.rowcount
+
+
+def export_sqlite(data_path, db_path, manager_classes=None):
+    """
+    Exports every data file of the installation in ``data_path`` (or only those of ``manager_classes``)
+    to the database in ``db_path``, in a single transaction. Returns a dict with the number of rows per table.
+    """
+    manager_classes = list(ALL_MANAGERS) if manager_classes is None else manager_classes
+    counts = {}
+    connection = sqlite3.connect(db_path)
+    try:
+        connection.execute('PRAGMA synchronous = OFF')
+        with connection:
+            for manager_cls in manager_classes:
+                counts[table_name(manager_cls)] = export_manager(connection, manager_cls(data_path))
+    finally:
+        connection.close()
+    return counts
+
+
+def import_sqlite(db_path, data_path, manager_classes=None, allow_read_only=False):
+    """
+    Writes the data files of the installation in ``data_path`` from the tables of the database in ``db_path``.
+    Only the data files with a table are written, unless ``manager_classes`` is given.
+
+    Like ``importer.import_files``, all the tables are checked first and nothing is written when any value is
+    invalid, a SWRebellionEditorValidationError with all the issues is raised instead. The derived fields are
+    recomputed and the READ_ONLY fields are checked as by ``save()``, unless ``allow_read_only``. Returns the
+    managers written.
+    """
+    connection = sqlite3.connect(db_path)
+    try:
+        tables = {row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        if manager_classes is None:
+            manager_classes = [manager_cls for manager_cls in ALL_MANAGERS if table_name(manager_cls) in tables]
+
+        prepared = []
+        issues = []
+        for manager_cls in manager_classes:
+            table = table_name(manager_cls)
+            columns = ', '.join(quote(name) for name in manager_cls.schema.names)
+            try:
+                cursor = connection.execute(f'SELECT rowid, {columns} FROM {quote(table)} ORDER BY rowid')
+            except sqlite3.OperationalError as error:
+                # Most likely a missing table or column
+                issues.append(ValidationIssue(table, None, None, None, f'can not be read ({error})'))
+                continue
+            rows = cursor.fetchall()
+            data_tuples, table_issues = check_rows(
+                manager_cls.schema, [row[1:] for row in rows], [row[0] for row in rows], table
+            )
+            issues.extend(table_issues)
+            manager = manager_cls(data_path)
+            content = None
+            if not table_issues:
+                content, table_issues = pack_data_file(
+                    manager, data_tuples, [row[0] for row in rows], table, allow_read_only
+                )
+                issues.extend(table_issues)
+            prepared.append((manager, content))
+    finally:
+        connection.close()
+
+    if issues:
+        raise SWRebellionEditorValidationError(issues)
+    write_data_files(prepared)
+    return [manager for manager, _ in prepared]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    export_parser = subparsers.add_parser('export', help='Export an installation to a database')
+    export_parser.add_argument('data_path')
+    export_parser.add_argument('db_path')
+    import_parser = subparsers.add_parser('import', help='Write the data files of an installation from a database')
+    import_parser.add_argument('db_path')
+    import_parser.add_argument('data_path')
+    import_parser.add_argument(
+        '--allow-read-only', action='store_true', help='Write changes to the read-only fields too'
+    )
+    args = parser.parse_args(argv)
+
+    if args.command == 'export':
+        for table, count in export_sqlite(args.data_path, args.db_path).items():
+            print(f'{table}: {count} rows')
+        return
+    try:
+        managers = import_sqlite(args.db_path, args.data_path, allow_read_only=args.allow_read_only)
+    except SWRebellionEditorValidationError as error:
+        print(format_issues(error.issues, limit=len(error.issues)), file=sys.stderr)
+        sys.exit(1)
+    for manager in managers:
+        print(manager.file_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+"""
+Bounded memory processing of data files.
+
+Rows are read in chunks with ``iter_records``, transformed, packed and written a chunk at a time, so neither the
+input nor the output rows are ever held in memory as a whole.
+"""
+import os
+import shutil
+import tempfile
+from collections import namedtuple
+from functools import reduce
+from itertools import starmap
+
+from . import MANAGERS_BY_FILE
+from .exceptions import SWRebellionEditorValidationError
+
+TransformStats = namedtuple('TransformStats', ('rows_read', 'rows_written', 'header_count'))
+
+
+def manager_for_file(file_path, manager_cls=None):
+    """
+    Returns a manager that reads ``file_path``, which is expected to live in the GDATA directory of an
+    installation. The manager class is found from the file name when not given.
+    """
+    file_path = os.path.abspath(file_path)
+    if manager_cls is None:
+        manager_cls = MANAGERS_BY_FILE[os.path.basename(file_path).upper()]
+    manager = manager_cls(os.path.dirname(os.path.dirname(file_path)))
+    manager.file_path = file_path
+    return manager
+
+
+def open_temp_file(dst):
+    """
+    Returns a new temporary file, open for writing, in the directory of ``dst`` so that it can replace it (see
+    replace_file). Its name is unique, so concurrent writers of ``dst`` never share it.
+    """
+    return tempfile.NamedTemporaryFile(
+        dir=os.path.dirname(os.path.abspath(dst)), prefix=os.path.basename(dst) + '.', suffix='.tmp', delete=False
+    )
+
+
+def replace_file(temp_path, dst):
+    """
+    Replaces ``dst`` with the file ``temp_path``, which keeps the permissions of ``dst`` if it exists.
+    """
+    if os.path.exists(dst):
+        shutil.copymode(dst, temp_path)
+    os.replace(temp_path, dst)
+
+
+def _results(result):
+    if result is None:
+        return ()
+    if isinstance(result, (list, tuple)) and (not result or isinstance(result[0], (dict, list, tuple))):
+        return result
+    return (result,)
+
+
+def transform(src, dst, fn, manager_cls=None, upgrade=True, batch=False, chunk_rows=4096, allow_read_only=False):
+    """
+    Streams the rows of the data file ``src`` through ``fn`` and writes the results to ``dst``.
+
+    ``fn`` receives a row (a dict, or a list for the plain struct managers, or the raw tuple when ``upgrade``
+    is False) and returns the row to write, ``None`` to drop it or a list of rows to write several.
+    With ``batch=True``, ``fn`` receives the list of rows of a whole chunk and returns an iterable with the rows
+    to write instead, which allows vectorized rules.
+
+    The rows written for every chunk are packed as by ``save()`` (see pack_rows_from): the derived fields of the
+    rows whose sources changed are recomputed, and the READ_ONLY fields must keep the values of the rows of the
+    chunk they come from (matched by key) unless ``allow_read_only``. The issues of all the chunks are raised
+    together in a SWRebellionEditorValidationError, the line of an issue being the index of the row written.
+
+    The header is written first with a placeholder count and patched once all rows are written.
+    The output goes to a temporary file, with a unique name, that replaces ``dst`` at the end, so ``src`` and ``dst``
+    can be the same.
+    """
+    reader = manager_for_file(src, manager_cls)
+    pack = reader.data_struct.pack
+    rows_read = rows_written = count = 0
+    issues = []
+
+    temp_file = open_temp_file(dst)
+    try:
+        with temp_file as file_obj:
+            header = list(reader.expected_header)
+            file_obj.write(reader.header_struct.pack(header[0], 0, *header[2:]))
+
+            def write(loaded_tuples, rows):
+                nonlocal rows_written, count
+                if upgrade:
+                    data_tuples = [tuple(reader.downgrade_data(row)) for row in rows]
+                else:
+                    data_tuples = [tuple(row) for row in rows]
+                try:
+                    payload = reader.pack_rows_from(
+                        data_tuples, b''.join(starmap(pack, loaded_tuples)), allow_read_only
+                    )
+                except SWRebellionEditorValidationError as error:
+                    issues.extend(issue._replace(line=issue.line + rows_written) for issue in error.issues)
+                else:
+                    file_obj.write(payload)
+                    count = reduce(reader.count_row, data_tuples, count)
+                rows_written += len(data_tuples)
+
+            # The rows read are kept as they were unpacked, ``fn`` may change the rows it receives
+            loaded_tuples = []
+            rows = []
+            for data_tuple in reader.iter_records(upgrade=False, chunk_rows=chunk_rows):
+                rows_read += 1
+                loaded_tuples.append(data_tuple)
+                row = reader.upgrade_data(data_tuple) if upgrade else data_tuple
+                if batch:
+                    rows.append(row)
+                else:
+                    rows.extend(_results(fn(row)))
+                if len(loaded_tuples) == chunk_rows:
+                    write(loaded_tuples, list(fn(rows)) if batch else rows)
+                    loaded_tuples = []
+                    rows = []
+            if loaded_tuples:
+                write(loaded_tuples, list(fn(rows)) if batch else rows)
+
+            if issues:
+                raise SWRebellionEditorValidationError(issues)
+            file_obj.seek(0)
+            file_obj.write(reader.header_struct.pack(header[0], count, *header[2:]))
+    except BaseException:
+        os.remove(temp_file.name)
+        raise
+
+    replace_file(temp_file.name, dst)
+    return TransformStats(rows_read, rows_written, count)
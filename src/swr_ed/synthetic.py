@@ -0,0 +1,183 @@
+"""
+Deterministic generator of synthetic game installations.
+
+It writes a GDATA directory with a valid data file for every registered manager, at any scale, plus a
+TEXTSTRA.DLL stand-in holding the names those files refer to. This makes it possible to exercise (and measure)
+the library without a copy of the game.
+"""
+import os
+import random
+
+from . import ALL_MANAGERS
+from .base import GroupedTableManager
+from .constants import PRODUCING_FACILITY_FAMILIES, Families
+from .dll_wrappers import TextStraWrapper
+from .dll_wrappers.resources import write_string_table_dll
+from .managers import CharacterBaseDataDataManager, SystemFacilityTableDataDataManager, SystemsDataDataManager
+
+FIRST_NAME_ID = 8192
+NAME_ID_SPACE = 16384
+
+# Offsets used by the character managers to get the names given to a character in each role
+CHARACTER_NAME_OFFSETS = (28672, 26624, 27648)
+
+ID_BASES = {
+    'SECTORSD.DAT': 20,
+    'SYSTEMSD.DAT': 100,
+}
+
+FACILITY_FAMILIES = (
+    Families.ORBITAL_SHIPYARDS.value,
+    Families.TRAINING_FACILITIES.value,
+    Families.CONSTRUCTION_YARDS.value,
+    Families.MINES.value,
+    Families.REFINERIES.value,
+)
+
+FAMILY_IDS = {family.value for family in Families}
+
+# Managers whose rows refer to the rows of other files, they are generated once those exist
+DEPENDENT_MANAGERS = (SystemsDataDataManager, SystemFacilityTableDataDataManager, GroupedTableManager)
+
+
+class SyntheticInstallation:
+    """
+    Generates the data files of a fake installation in ``data_path``.
+
+    ``scale`` multiplies the number of rows (or groups) found in the stock files, ``seed`` makes the values
+    reproducible.
+    """
+
+    def __init__(self, data_path, scale=1, seed=0, manager_classes=None):
+        self.data_path = data_path
+        self.scale = scale
+        self.seed = seed
+        self.manager_classes = list(manager_classes or ALL_MANAGERS)
+        self.texts = {}
+        self.keys = {}
+        self.family_keys = {}
+        self.next_name_id = 0
+
+    def generate(self):
+        os.makedirs(os.path.join(self.data_path, 'GDATA'), exist_ok=True)
+
+        # Referenced files go first so that the systems, facility tables and fleets have something to point to
+        manager_classes = sorted(
+            self.manager_classes, key=lambda m: (issubclass(m, DEPENDENT_MANAGERS), m.filename)
+        )
+        for manager_cls in manager_classes:
+            rng = random.Random(f'{self.seed}:{manager_cls.filename}')
+            self.write_data_file(manager_cls, rng)
+
+        write_string_table_dll(os.path.join(self.data_path, TextStraWrapper.relative_path), self.texts)
+        return self.data_path
+
+    def get_row_count(self, manager_cls):
+        return max(1, round(manager_cls.expected_header[1] * self.scale))
+
+    def write_data_file(self, manager_cls, rng):
+        count = self.get_row_count(manager_cls)
+        if issubclass(manager_cls, GroupedTableManager):
+            rows = self.generate_groups(count, rng)
+        else:
+            rows = self.generate_rows(manager_cls, count, rng)
+
+        file_path = os.path.join(self.data_path, manager_cls.file_location, manager_cls.filename)
+        data_struct = manager_cls.data_struct
+        with open(file_path, "wb") as file_obj:
+            file_obj.write(manager_cls.header_struct.pack(
+                manager_cls.expected_header[0], count, *manager_cls.expected_header[2:]
+            ))
+            buffer = bytearray()
+            for row in rows:
+                buffer += data_struct.pack(*row)
+                if len(buffer) >= 1 << 20:
+                    file_obj.write(buffer)
+                    buffer.clear()
+            file_obj.write(buffer)
+        return file_path
+
+    def new_name_id(self, label, with_character_names=False):
+        name_id = FIRST_NAME_ID + self.next_name_id % NAME_ID_SPACE
+        self.next_name_id += 1
+        self.texts[name_id] = label
+        if with_character_names:
+            for role, offset in zip(('General', 'Commander', 'Admiral'), CHARACTER_NAME_OFFSETS):
+                self.texts[name_id + offset] = f'{role} {label}'
+        return name_id
+
+    def generate_rows(self, manager_cls, count, rng):
+        is_character = issubclass(manager_cls, CharacterBaseDataDataManager)
+        id_base = ID_BASES.get(manager_cls.filename, 1)
+        ids = []
+
+        for index in range(count):
+            row = {}
+            for field in manager_cls.schema:
+                row[field.name] = self.generate_value(manager_cls, field, index, id_base, rng, is_character)
+            if 'id' in row:
+                ids.append(row['id'])
+                if 'family_id' in row:
+                    self.family_keys.setdefault(row['family_id'], []).append(row['id'])
+            values = [row[name] for name in manager_cls.schema.names]
+            # Derived fields are consistent with their sources
+            for field, sources, formula in manager_cls.schema.derived:
+                values[field.index] = formula(tuple(values[index] for index in sources))
+            yield values
+
+        self.keys[manager_cls.filename] = ids
+
+    def generate_value(self, manager_cls, field, index, id_base, rng, is_character):
+        header = manager_cls.expected_header
+        name = field.name
+        if name == 'id':
+            return id_base + index
+        if name in ('index', 'field_0'):
+            return index + 1
+        if name in ('active', 'one', 'field_1'):
+            return 1
+        if name == 'name_id_1':
+            return self.new_name_id(f'{manager_cls.__name__} {index}', with_character_names=is_character)
+        if name == 'name_id_2':
+            return 2
+        if name == 'family_id':
+            if isinstance(header[3], int):
+                # The families of a file are in the range given by its header
+                families = [family for family in sorted(FAMILY_IDS) if header[2] <= family < header[3]]
+                return families[index % len(families)] if families else header[2]
+            if index == 0:
+                # As in the stock tables, a family of 0 seeds no facility
+                return 0
+            facility_families = [family for family in FACILITY_FAMILIES if family in self.family_keys]
+            return rng.choice(facility_families or FACILITY_FAMILIES)
+        if name == 'producing_facility_family_id':
+            return PRODUCING_FACILITY_FAMILIES.get(manager_cls.filename, 0)
+        if name == 'producing_facility_family_id_one_based':
+            family = PRODUCING_FACILITY_FAMILIES.get(manager_cls.filename, 0)
+            return family + 1 if family else 0
+        if name == 'sector_id' and self.keys.get('SECTORSD.DAT'):
+            return rng.choice(self.keys['SECTORSD.DAT'])
+
+        return rng.randint(max(field.min, -100), min(field.max, 100))
+
+    def generate_groups(self, count, rng):
+        """
+        Fleet tables group their rows: a row that opens the group, a row with the length of the group,
+        the capital ship that leads the group and the units that it carries.
+        """
+        def unit_id(family, default_count):
+            ids = self.family_keys.get(family)
+            return rng.choice(ids) if ids else rng.randint(1, default_count)
+
+        for group in range(1, count + 1):
+            units = rng.randint(0, 12)
+            yield [group, 1, group, 0, 0]
+            yield [1, 1, units + 1, 0, 0]
+            yield [1, 0, unit_id(Families.CAPITAL_SHIPS.value, 30), 0, Families.CAPITAL_SHIPS.value]
+            for _ in range(units):
+                family = rng.choice((Families.FIGHTERS.value, Families.TROOPS.value))
+                yield [1, 0, unit_id(family, 10), 0, family]
+
+
+def generate_installation(data_path, scale=1, seed=0, manager_classes=None):
+    return SyntheticInstallation(data_path, scale=scale, seed=seed, manager_classes=manager_classes).generate()
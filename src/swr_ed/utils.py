@@ -1,8 +1,9 @@
 import os
-import hashlib
+import sys
 
 from . import ALL_MANAGERS
-from .base import SWRDataManager
+from .export import export_manager
+from .scan import STOCK, scan
 
 
 def list_unprocessed_files():
@@ -12,28 +13,19 @@ def list_unprocessed_files():
     return [filename for filename in all_data_files.difference(processed_files)]
 
 
-def print_csv(manager_class):
-    if issubclass(manager_class, SWRDataManager):
-        manager = manager_class(fetch_names=True)
-        manager.load()
-        print('"' + '","'.join(manager.fields.keys()) + '"')
-        for row in manager.data:
-            print('"' + '","'.join([str(v) for v in row.values()]) + '"')
-    else:
-        manager = manager_class()
-        manager.load()
-        for row in manager.data:
-            print('"' + '","'.join([str(v) for v in row]) + '"')
+def print_csv(manager_class, data_path=None):
+    manager = manager_class(data_path or os.getenv('SW_REBELLION_DIR'))
+    export_manager(manager, sys.stdout, 'csv')
 
 
-def list_files_edited_files():
-    tampered_files = []
-    for manager_cls in ALL_MANAGERS:
-        manager = manager_cls()
-
-        with open(manager.file_path, "rb") as file_obj:
-            md5_checksum = hashlib.md5(file_obj.read()).hexdigest()
-
-        if md5_checksum != manager.expected_md5_checksum:
-            tampered_files.append((manager.file_path, md5_checksum))
-    return tampered_files
+def list_files_edited_files(data_path=None):
+    """
+    Returns the (file path, md5 checksum) of the data files that are not the stock ones, the checksum is None
+    for the missing files. See swr_ed.scan to check many installations.
+    """
+    data_path = data_path or os.getenv('SW_REBELLION_DIR')
+    locations = {manager_cls.filename: manager_cls.file_location for manager_cls in ALL_MANAGERS}
+    return [
+        (os.path.join(data_path, locations[result.filename], result.filename), result.md5_checksum)
+        for result in scan([data_path], workers=1) if result.status != STOCK
+    ]
@@ -0,0 +1,222 @@
+"""
+Checks the values of the fields of a manager against their struct codes, one column at a time.
+
+Columns that are valid as a whole (the common case) are checked with a few calls that run in C: a conversion with
+``map(int, ...)`` and the ``min`` and ``max`` of the column. Only the columns that fail are checked value by value,
+to report every bad value rather than just the first one.
+"""
+from collections import deque, namedtuple
+
+from .constants import FieldType
+from .schema import INTEGER_CODES
+
+# The fields that identify the rows, the first one found in a schema is its key
+KEY_FIELDS = ('id', 'index')
+
+
+class ValidationIssue(namedtuple('ValidationIssue', ('source', 'line', 'column', 'value', 'message'))):
+    __slots__ = ()
+
+    def __str__(self):
+        location = ':'.join(str(part) for part in (self.source, self.line) if part is not None)
+        return f'{location}: {self.column}: {self.message} (got {self.value!r})'
+
+
+def format_issues(issues, limit=20):
+    lines = [str(issue) for issue in issues[:limit]]
+    if len(issues) > limit:
+        lines.append(f'... and {len(issues) - limit} more')
+    return '\n'.join(lines)
+
+
+def _to_int(value, parse_strings=True):
+    if type(value) is int:
+        return value
+    if parse_strings and isinstance(value, str):
+        return int(value)
+    raise TypeError(value)
+
+
+def convert_column(field, values, lines=None, source=None, parse_strings=True):
+    """
+    Converts the ``values`` of the ``field`` (a FieldLayout of the schema) to integers and checks them against
+    the range of its struct code. Strings (as read from CSV) are parsed unless ``parse_strings`` is False,
+    other types than int are rejected.
+
+    Returns the converted values and the list of issues; the values that could not be converted are left as is.
+    ``lines`` are the line numbers of the values in ``source``, the index of the values is used when not given.
+    """
+    if field.format not in INTEGER_CODES:
+        return list(values), []
+
+    issues = []
+    try:
+        types = set(map(type, values))
+        if types <= {int}:
+            converted = list(values)
+        elif types == {str} and parse_strings:
+            converted = list(map(int, values))
+        else:
+            raise TypeError()
+        if not converted or (min(converted) >= field.min and max(converted) <= field.max):
+            return converted, issues
+    except (TypeError, ValueError):
+        pass
+
+    converted = list(values)
+    for index, value in enumerate(values):
+        line = lines[index] if lines is not None else index
+        try:
+            number = _to_int(value, parse_strings)
+        except (TypeError, ValueError):
+            issues.append(ValidationIssue(source, line, field.name, value, f'is not an integer ({field.format})'))
+            continue
+        converted[index] = number
+        if not field.min <= number <= field.max:
+            issues.append(ValidationIssue(
+                source, line, field.name, value, f'is out of the range [{field.min}, {field.max}] of {field.format}'
+            ))
+    return converted, issues
+
+
+def check_columns(schema, columns, lines=None, source=None):
+    """
+    Checks the values of every field, ``columns`` holds a sequence of values per field in the order of the schema.
+    Returns the columns with their values converted and the list of issues.
+    """
+    issues = []
+    converted_columns = []
+    for field, values in zip(schema.fields, columns):
+        converted, column_issues = convert_column(field, values, lines, source)
+        converted_columns.append(converted)
+        issues.extend(column_issues)
+    return converted_columns, issues
+
+
+def check_rows(schema, rows, lines=None, source=None):
+    """
+    Checks rows of raw values (in the order of ``schema.names``) column by column.
+    Returns the rows with their values converted and the list of issues.
+    """
+    columns = list(zip(*rows)) if rows else [() for _ in schema.fields]
+    converted_columns, issues = check_columns(schema, columns, lines, source)
+    return list(zip(*converted_columns)), issues
+
+
+def read_only_fields(schema):
+    return [
+        field for field in schema.fields
+        if field.field_def is not None and field.field_def.type is FieldType.READ_ONLY
+    ]
+
+
+def key_field(schema):
+    """
+    Returns the field that identifies the rows of ``schema`` (see KEY_FIELDS), or None.
+    """
+    for name in KEY_FIELDS:
+        if name in schema.by_name:
+            return schema.by_name[name]
+    return None
+
+
+def match_loaded_rows(keys, loaded_keys):
+    """
+    Returns, for every row, the index of the loaded row it was loaded as, or None for an added row. ``keys`` and
+    ``loaded_keys`` are the keys of the rows (see key_field) and of the loaded rows.
+
+    Rows are matched by position while their keys are the same, then by key, so rows can be deleted or reordered.
+    A row whose key is left once every loaded row with that key is matched (a duplicated row, or a row whose key was
+    changed to the key of another row) is matched to the first loaded row with that key, so it keeps its values.
+    A row whose key is not among the loaded keys, in place of a loaded row that is gone, is that loaded row with an
+    edited key.
+    """
+    keys = list(keys)
+    loaded_keys = list(loaded_keys)
+    count = min(len(keys), len(loaded_keys))
+    first_loaded = {}
+    for index, key in enumerate(loaded_keys):
+        first_loaded.setdefault(key, index)
+    if keys[:count] == loaded_keys[:count]:
+        return list(range(count)) + [first_loaded.get(key) for key in keys[count:]]
+
+    matches = [index if index < count and key == loaded_keys[index] else None for index, key in enumerate(keys)]
+    used = set(matches)
+    unused = {}
+    for index, key in enumerate(loaded_keys):
+        if index not in used:
+            unused.setdefault(key, deque()).append(index)
+    for index, key in enumerate(keys):
+        if matches[index] is None and unused.get(key):
+            matches[index] = unused[key].popleft()
+            used.add(matches[index])
+    for index, key in enumerate(keys):
+        if matches[index] is not None:
+            continue
+        if key in first_loaded:
+            matches[index] = first_loaded[key]
+        elif index < count and index not in used:
+            matches[index] = index
+    return matches
+
+
+def check_read_only(schema, columns, loaded_columns, source=None):
+    """
+    Checks that the READ_ONLY fields of ``columns`` still have the values of ``loaded_columns``. The rows are
+    compared with the loaded rows they match (see match_loaded_rows), added rows are not checked.
+    """
+    fields = read_only_fields(schema)
+    if not fields:
+        return []
+    key = key_field(schema)
+    rows = len(columns[0]) if columns else 0
+    if key is None:
+        matches = list(range(min(rows, len(loaded_columns[0])))) + [None] * max(rows - len(loaded_columns[0]), 0)
+    else:
+        matches = match_loaded_rows(columns[key.index], loaded_columns[key.index])
+    lines = [index for index, match in enumerate(matches) if match is not None]
+    loaded_lines = [matches[index] for index in lines]
+
+    issues = []
+    for field in fields:
+        values = columns[field.index]
+        loaded = loaded_columns[field.index]
+        current_values = [values[index] for index in lines]
+        loaded_values = [loaded[index] for index in loaded_lines]
+        if current_values == loaded_values:
+            continue
+        issues.extend(
+            ValidationIssue(source, line, field.name, value, f'is read-only and was loaded as {loaded_value!r}')
+            for line, value, loaded_value in zip(lines, current_values, loaded_values)
+            if value != loaded_value
+        )
+    return issues
+
+
+def check_data_tuples(schema, data_tuples, loaded_tuples=None, source=None):
+    """
+    Checks rows that are about to be packed with the struct of ``schema``: every row has a value per field and
+    every value fits the struct code of its field, without converting anything. When ``loaded_tuples`` are given,
+    the READ_ONLY fields are checked against them too. Returns the list of issues, the line of an issue is the
+    index of the row.
+    """
+    size = len(schema.fields)
+    lines = None
+    if set(map(len, data_tuples)) - {size}:
+        issues = [
+            ValidationIssue(source, index, None, data_tuple, f'has {len(data_tuple)} values instead of {size}')
+            for index, data_tuple in enumerate(data_tuples) if len(data_tuple) != size
+        ]
+        lines = [index for index, data_tuple in enumerate(data_tuples) if len(data_tuple) == size]
+        data_tuples = [data_tuples[index] for index in lines]
+    else:
+        issues = []
+
+    columns = list(zip(*data_tuples)) or [() for _ in schema.fields]
+    for field, values in zip(schema.fields, columns):
+        issues.extend(convert_column(field, values, lines, source, parse_strings=False)[1])
+
+    if loaded_tuples is not None and lines is None:
+        loaded_columns = list(zip(*loaded_tuples)) or [() for _ in schema.fields]
+        issues.extend(check_read_only(schema, columns, loaded_columns, source))
+    return issues
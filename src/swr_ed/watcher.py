@@ -0,0 +1,324 @@
+"""
+Keeps the managers of an installation up to date while other programs edit its files.
+
+The watcher notices the data files (and TEXTSTRA.DLL) that changed, either by polling their ``os.stat`` or, on
+Linux, through inotify. A file is only reloaded once it stopped changing for ``debounce`` seconds, so a burst of
+writes causes a single reload. The new manager is loaded in the background thread of the watcher and replaces the
+old one in ``managers`` in a single assignment, so whoever reads ``managers`` is never blocked nor sees a half
+loaded manager.
+
+Subscribers are called with a FileChange holding the rows that changed, found by comparing the packed rows before
+and after the reload rather than the decoded rows.
+"""
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+import threading
+import time
+from collections import namedtuple
+from itertools import compress, count
+from operator import ne
+
+from . import ALL_MANAGERS
+from .dll_wrappers import TextStraWrapper
+
+log = logging.getLogger(__name__)
+
+TEXTS = TextStraWrapper.relative_path
+
+
+class RowChange(namedtuple('RowChange', ('index', 'fields', 'old', 'new'))):
+    """
+    A row that changed: ``old`` and ``new`` are the decoded rows (None for an added or removed row) and ``fields``
+    the names of the fields (or texts, like ``name``) that differ.
+    """
+    __slots__ = ()
+
+
+class FileChange(namedtuple('FileChange', ('filename', 'manager', 'rows'))):
+    """
+    The reload of ``filename``: ``manager`` is the new manager and ``rows`` the list of RowChange.
+    """
+    __slots__ = ()
+
+
+def stat_signature(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns, stat.st_ino
+
+
+def row_fields(old, new):
+    if isinstance(old, dict):
+        return tuple(key for key in new if old.get(key) != new[key])
+    return tuple(f'field_{index}' for index, (a, b) in enumerate(zip(old, new)) if a != b)
+
+
+def diff_rows(old_manager, new_manager):
+    """
+    Returns the RowChange of the rows whose packed bytes differ between the managers. Only these rows are decoded.
+    """
+    data_struct = new_manager.data_struct
+    old_tuples = list(data_struct.iter_unpack(old_manager.loaded_rows or b''))
+    new_tuples = list(data_struct.iter_unpack(new_manager.loaded_rows or b''))
+    changes = [
+        RowChange(index, None, old_manager.upgrade_data(old_tuples[index]), new_manager.data[index])
+        for index in compress(count(), map(ne, old_tuples, new_tuples))
+    ]
+    changes = [change._replace(fields=row_fields(change.old, change.new)) for change in changes]
+    changes.extend(
+        RowChange(index, tuple(new_manager.schema.names), None, new_manager.data[index])
+        for index in range(len(old_tuples), len(new_tuples))
+    )
+    changes.extend(
+        RowChange(index, tuple(new_manager.schema.names), old_manager.upgrade_data(old_tuples[index]), None)
+        for index in range(len(new_tuples), len(old_tuples))
+    )
+    return changes
+
+
+def diff_texts(old_manager, new_manager):
+    """
+    Returns the RowChange of the rows whose texts changed, for managers reloaded after TEXTSTRA.DLL changed.
+    """
+    old_data, new_data = old_manager.data, new_manager.data
+    return [
+        RowChange(index, row_fields(old_data[index], new_data[index]), old_data[index], new_data[index])
+        for index in compress(count(), map(ne, old_data, new_data))
+    ]
+
+
+class PollingBackend:
+    """
+    Waits ``timeout`` seconds, after which every file may have changed.
+    """
+
+    def __init__(self, directories):
+        self.woken = threading.Event()
+
+    def wait(self, timeout):
+        self.woken.wait(timeout)
+        return None
+
+    def wake(self):
+        self.woken.set()
+
+    def close(self):
+        pass
+
+
+class InotifyBackend:
+    """
+    Waits for inotify events in the directories of the files, through the C library (Linux only).
+    Returns the names of the files that had events.
+    """
+    MASK = 0x2 | 0x8 | 0x80 | 0x100 | 0x200  # IN_MODIFY, IN_CLOSE_WRITE, IN_MOVED_TO, IN_CREATE, IN_DELETE
+    EVENT = struct.Struct('iIII')
+
+    def __init__(self, directories):
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        # Written to by wake, to interrupt the select of wait
+        self.reader, self.writer = os.pipe()
+        for directory in directories:
+            if libc.inotify_add_watch(self.fd, os.fsencode(directory), self.MASK) < 0:
+                error = ctypes.get_errno()
+                self.close()
+                raise OSError(error, f'Can not watch {directory}')
+
+    def wait(self, timeout):
+        ready, _, _ = select.select([self.fd, self.reader], [], [], timeout)
+        if self.fd not in ready:
+            return set()
+        names = set()
+        try:
+            buffer = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return names
+        offset = 0
+        while offset < len(buffer):
+            _, _, _, size = self.EVENT.unpack_from(buffer, offset)
+            offset += self.EVENT.size
+            names.add(os.fsdecode(buffer[offset:offset + size].rstrip(b'\0')).upper())
+            offset += size
+        return names
+
+    def wake(self):
+        os.write(self.writer, b'\0')
+
+    def close(self):
+        for fd in (self.fd, self.reader, self.writer):
+            os.close(fd)
+
+
+def create_backend(directories, backend='auto'):
+    if backend in ('auto', 'inotify') and hasattr(os, 'O_CLOEXEC') and ctypes.util.find_library('c'):
+        try:
+            return InotifyBackend(directories)
+        except (OSError, AttributeError):
+            if backend == 'inotify':
+                raise
+    return PollingBackend(directories)
+
+
+class Watcher:
+    """
+    Loads the managers of ``manager_classes`` for the installation in ``data_path`` and reloads them when their files
+    change. ``managers`` holds the current manager of every data file.
+
+    ``start()`` watches in a background thread, checking every ``interval`` seconds when polling. ``check()`` does a
+    single round in the calling thread. ``backend`` is 'poll', 'inotify' or 'auto' (inotify where available).
+    """
+
+    def __init__(self, data_path, manager_classes=None, interval=1.0, debounce=0.2, backend='auto'):
+        self.data_path = data_path
+        self.interval = interval
+        self.debounce = debounce
+        self.backend_name = backend
+        self.backend = None
+        self.thread = None
+        self.stopped = threading.Event()
+        self.subscribers = []
+
+        self.managers = {}
+        for manager_cls in ALL_MANAGERS if manager_classes is None else manager_classes:
+            self.managers[manager_cls.filename] = manager_cls(data_path)
+        self.paths = {filename: manager.file_path for filename, manager in self.managers.items()}
+        self.paths[TEXTS] = os.path.join(data_path, TEXTS)
+        # Taken before loading, so that a change made while loading is not missed
+        self.signatures = {filename: stat_signature(path) for filename, path in self.paths.items()}
+        for manager in self.managers.values():
+            manager.load()
+        # Files that changed and are waiting for the writes to settle: filename -> (signature, time of the change)
+        self.pending = {}
+
+    def subscribe(self, callback):
+        """
+        Calls ``callback(file_change)`` from the watcher thread after every reload. Returns ``callback``.
+        """
+        self.subscribers.append(callback)
+        return callback
+
+    def unsubscribe(self, callback):
+        self.subscribers.remove(callback)
+
+    def check(self, filenames=None, now=None):
+        """
+        Looks for changes to ``filenames`` (all the files when None) and reloads the files that stopped changing.
+        Returns the list of FileChange notified.
+        """
+        now = time.monotonic() if now is None else now
+        if filenames is None:
+            filenames = self.paths
+        for filename in set(filenames) | set(self.pending):
+            if filename not in self.paths:
+                continue
+            signature = stat_signature(self.paths[filename])
+            pending = self.pending.get(filename)
+            if pending is not None and pending[0] == signature:
+                continue
+            if pending is not None or signature != self.signatures[filename]:
+                self.pending[filename] = (signature, now)
+
+        settled = [filename for filename, (_, changed) in self.pending.items() if now - changed >= self.debounce]
+        changes = []
+        for filename in sorted(settled):
+            signature, _ = self.pending.pop(filename)
+            self.signatures[filename] = signature
+            if signature is None:
+                # Removed, the manager is kept until the file is back
+                continue
+            if filename == TEXTS:
+                changes.extend(self.reload_texts())
+            else:
+                change = self.reload(filename)
+                if change is not None:
+                    changes.append(change)
+        for change in changes:
+            self.notify(change)
+        return changes
+
+    def load_manager(self, manager_cls):
+        manager = manager_cls(self.data_path)
+        try:
+            manager.load()
+        except Exception:
+            # Most likely a file that is still being written, it is reloaded on its next change
+            log.warning('Could not reload %s', manager.file_path, exc_info=True)
+            return None
+        return manager
+
+    def reload(self, filename):
+        old_manager = self.managers[filename]
+        manager = self.load_manager(type(old_manager))
+        if manager is None:
+            return None
+        self.managers[filename] = manager
+        return FileChange(filename, manager, diff_rows(old_manager, manager))
+
+    def reload_texts(self):
+        changes = []
+        for filename, old_manager in list(self.managers.items()):
+            if 'name_id_1' not in old_manager.schema.names or not hasattr(old_manager, 'text_stra'):
+                continue
+            manager = self.load_manager(type(old_manager))
+            if manager is None:
+                continue
+            self.managers[filename] = manager
+            rows = diff_texts(old_manager, manager)
+            if rows:
+                changes.append(FileChange(filename, manager, rows))
+        return changes
+
+    def notify(self, change):
+        for callback in list(self.subscribers):
+            try:
+                callback(change)
+            except Exception:
+                log.exception('Subscriber %r failed on the change of %s', callback, change.filename)
+
+    def run(self):
+        try:
+            while not self.stopped.is_set():
+                timeout = self.debounce if self.pending else self.interval
+                names = self.backend.wait(timeout)
+                if self.stopped.is_set():
+                    break
+                if names is not None:
+                    names = {filename for filename in self.paths if filename.upper() in names}
+                try:
+                    self.check(names)
+                except Exception:
+                    log.exception('Could not check the files of %s', self.data_path)
+        finally:
+            self.backend.close()
+            self.backend = None
+
+    def start(self):
+        directories = sorted({os.path.dirname(path) for path in self.paths.values()})
+        self.backend = create_backend(directories, self.backend_name)
+        self.stopped.clear()
+        self.thread = threading.Thread(target=self.run, name=f'swr_ed watcher {self.data_path}', daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stopped.set()
+        if self.thread is not None:
+            if self.backend is not None:
+                self.backend.wake()
+            self.thread.join()
+            self.thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,8 @@
+import pytest
+
+from swr_ed.synthetic import generate_installation
+
+
+@pytest.fixture(scope='session')
+def synthetic_data_path(tmp_path_factory):
+    return generate_installation(str(tmp_path_factory.mktemp('synthetic')), scale=2)
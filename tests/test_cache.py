@@ -0,0 +1,103 @@
+import os
+import shutil
+from collections import OrderedDict
+
+import pytest
+
+from swr_ed import ALL_MANAGERS, MANAGERS_BY_FILE
+from swr_ed.cache import DataCache, set_data_cache
+from swr_ed.schema import Schema
+
+
+@pytest.fixture
+def data_cache(tmp_path):
+    cache = DataCache(str(tmp_path / 'cache'))
+    previous = set_data_cache(cache)
+    yield cache
+    set_data_cache(previous)
+
+
+def copy_installation(manager_cls, data_path, tmp_path):
+    os.mkdir(tmp_path / 'GDATA')
+    shutil.copy(manager_cls(data_path).file_path, str(tmp_path / 'GDATA'))
+    shutil.copy(os.path.join(data_path, 'TEXTSTRA.DLL'), str(tmp_path))
+    return str(tmp_path)
+
+
+@pytest.mark.parametrize("manager_cls", ALL_MANAGERS)
+def test_cached_load_matches_load(manager_cls, synthetic_data_path, data_cache):
+    manager = manager_cls(synthetic_data_path)
+    manager.load()
+    assert os.path.exists(data_cache.entry_path(data_cache.key(manager)))
+
+    cached = manager_cls(synthetic_data_path)
+    assert data_cache.load(cached)
+    assert cached.data == manager.data
+    assert cached.header_count == manager.header_count
+    assert cached.md5_checksum == manager.md5_checksum
+
+
+def test_modified_file_is_not_served_from_cache(synthetic_data_path, tmp_path, data_cache):
+    manager_cls = MANAGERS_BY_FILE['CAPSHPSD.DAT']
+    data_path = copy_installation(manager_cls, synthetic_data_path, tmp_path)
+    manager = manager_cls(data_path)
+    manager.load()
+    manager.data[0]['maintenance'] += 1
+    manager.save()
+
+    reloaded = manager_cls(data_path)
+    assert not data_cache.load(reloaded)
+    reloaded.load()
+    assert reloaded.data[0]['maintenance'] == manager.data[0]['maintenance']
+
+
+def test_rewrite_with_the_same_size_and_time_is_not_served_from_cache(synthetic_data_path, tmp_path, data_cache):
+    manager_cls = MANAGERS_BY_FILE['CAPSHPSD.DAT']
+    data_path = copy_installation(manager_cls, synthetic_data_path, tmp_path)
+    manager = manager_cls(data_path)
+    manager.load()
+    stat = os.stat(manager.file_path)
+
+    edited = manager_cls(data_path)
+    edited.load()
+    edited.data[0]['maintenance'] += 1
+    edited.save()
+    os.utime(manager.file_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert os.path.getsize(manager.file_path) == stat.st_size
+
+    reloaded = manager_cls(data_path)
+    reloaded.load()
+    assert reloaded.data[0]['maintenance'] == manager.data[0]['maintenance'] + 1
+
+
+def test_schema_change_invalidates_entries(synthetic_data_path, data_cache, monkeypatch):
+    manager_cls = MANAGERS_BY_FILE['CAPSHPSD.DAT']
+    manager_cls(synthetic_data_path).load()
+
+    fields = OrderedDict(manager_cls.fields)
+    fields['renamed_field'] = fields.pop('unknown_1')
+    schema = Schema.from_fields(manager_cls.byte_order, fields, manager_cls.header_struct_format)
+    monkeypatch.setattr(manager_cls, 'schema', schema)
+    assert not data_cache.load(manager_cls(synthetic_data_path))
+
+
+def test_corrupt_entry_is_a_miss(synthetic_data_path, data_cache):
+    manager = MANAGERS_BY_FILE['CAPSHPSD.DAT'](synthetic_data_path)
+    manager.load()
+    path = data_cache.entry_path(data_cache.key(manager))
+    with open(path, "wb") as file_obj:
+        file_obj.write(b'garbage')
+
+    assert not data_cache.load(MANAGERS_BY_FILE['CAPSHPSD.DAT'](synthetic_data_path))
+    assert not os.path.exists(path)
+
+
+def test_eviction(synthetic_data_path, data_cache):
+    for manager_cls in ALL_MANAGERS:
+        manager_cls(synthetic_data_path).load()
+    sizes = sorted(size for _, size, _ in data_cache.entries())
+
+    data_cache.max_bytes = sizes[-1]
+    data_cache.evict()
+    assert data_cache.size() <= sizes[-1]
+    assert data_cache.entries()
@@ -0,0 +1,61 @@
+import shutil
+
+import pytest
+
+from swr_ed import ALL_MANAGERS, MANAGERS_BY_FILE
+from swr_ed.exceptions import SWRebellionEditorValidationError
+
+pandas = pytest.importorskip('pandas')
+
+
+@pytest.mark.parametrize("manager_cls", ALL_MANAGERS)
+def test_dataframe_round_trip(manager_cls, synthetic_data_path):
+    manager = manager_cls(synthetic_data_path)
+    dataframe = manager.to_dataframe()
+    assert list(dataframe.columns[:len(manager.schema.names)]) == list(manager.schema.names)
+    for field in manager.schema:
+        assert dataframe[field.name].dtype.itemsize == field.size
+
+    loaded = manager_cls(synthetic_data_path)
+    loaded.load()
+    assert len(dataframe) == len(loaded.data)
+
+    manager.from_dataframe(dataframe)
+    assert manager.prepare_output_stream().read() == open(manager.file_path, "rb").read()
+    assert manager.data == loaded.data
+
+
+def test_dataframe_names_and_types(synthetic_data_path):
+    manager = MANAGERS_BY_FILE['CAPSHPSD.DAT'](synthetic_data_path)
+    manager.load()
+    dataframe = manager.to_dataframe()
+    assert list(dataframe['name']) == [row['name'] for row in manager.data]
+    assert str(dataframe['id'].dtype) == 'uint32'
+    assert str(dataframe['name_id_1'].dtype) == 'uint16'
+
+
+def test_from_dataframe_checks_values(synthetic_data_path):
+    manager = MANAGERS_BY_FILE['CAPSHPSD.DAT'](synthetic_data_path)
+    dataframe = manager.to_dataframe()
+    dataframe['maintenance'] = dataframe['maintenance'].astype('int64')
+    dataframe.loc[1, 'maintenance'] = -5
+    dataframe['shield'] = dataframe['shield'].astype('float64')
+
+    with pytest.raises(SWRebellionEditorValidationError) as error:
+        manager.from_dataframe(dataframe)
+    assert {(issue.line, issue.column) for issue in error.value.issues} == {(1, 'maintenance'), (None, 'shield')}
+
+
+def test_from_dataframe_checks_read_only_fields(synthetic_data_path, tmp_path):
+    data_path = str(tmp_path / 'install')
+    shutil.copytree(synthetic_data_path, data_path)
+    manager = MANAGERS_BY_FILE['CAPSHPSD.DAT'](data_path)
+    dataframe = manager.to_dataframe()
+    dataframe.loc[2, 'id'] = 10 ** 6
+
+    fresh = MANAGERS_BY_FILE['CAPSHPSD.DAT'](data_path)
+    fresh.from_dataframe(dataframe)
+    with pytest.raises(SWRebellionEditorValidationError) as error:
+        fresh.save()
+    assert [(issue.line, issue.column) for issue in error.value.issues] == [(2, 'id')]
+    fresh.save(allow_read_only=True)
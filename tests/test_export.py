@@ -0,0 +1,68 @@
+import csv
+import io
+import json
+import os
+
+import pytest
+
+from swr_ed import ALL_MANAGERS, MANAGERS_BY_FILE
+from swr_ed.export import export_installation, export_manager
+from swr_ed.utils import print_csv
+
+
+def loaded_rows(manager_cls, data_path):
+    manager = manager_cls(data_path)
+    manager.load()
+    if manager.data and isinstance(manager.data[0], dict):
+        return [dict(row) for row in manager.data]
+    return [dict(zip(manager.schema.names, row)) for row in manager.data]
+
+
+@pytest.mark.parametrize("manager_cls", ALL_MANAGERS)
+@pytest.mark.parametrize("fmt", ['jsonl', 'json'])
+def test_export_json(manager_cls, fmt, synthetic_data_path):
+    output = io.StringIO()
+    count = export_manager(manager_cls(synthetic_data_path), output, fmt, chunk_rows=7)
+
+    expected = loaded_rows(manager_cls, synthetic_data_path)
+    assert count == len(expected)
+    if fmt == 'jsonl':
+        assert [json.loads(line) for line in output.getvalue().splitlines()] == expected
+    else:
+        assert output.getvalue() == json.dumps(expected, indent=2, ensure_ascii=False)
+
+
+@pytest.mark.parametrize("manager_cls", ALL_MANAGERS)
+def test_export_csv(manager_cls, synthetic_data_path):
+    output = io.StringIO()
+    export_manager(manager_cls(synthetic_data_path), output, 'csv')
+
+    reader = csv.reader(io.StringIO(output.getvalue()), quoting=csv.QUOTE_NONNUMERIC)
+    header = next(reader)
+    expected = loaded_rows(manager_cls, synthetic_data_path)
+    assert [dict(zip(header, row)) for row in reader] == [
+        {key: '' if value is None else value for key, value in row.items()} for row in expected
+    ]
+
+
+def test_csv_quoting():
+    from swr_ed.export import CSVWriter
+
+    output = io.StringIO()
+    writer = CSVWriter(output, ['id', 'name'])
+    writer.write_rows([[1, 'Say "hi", Luke']])
+    assert output.getvalue() == '"id","name"\n1,"Say ""hi"", Luke"\n'
+
+
+def test_print_csv(synthetic_data_path, capsys):
+    print_csv(MANAGERS_BY_FILE['CAPSHPSD.DAT'], synthetic_data_path)
+    lines = capsys.readouterr().out.splitlines()
+    assert len(lines) == len(loaded_rows(MANAGERS_BY_FILE['CAPSHPSD.DAT'], synthetic_data_path)) + 1
+    assert lines[0].startswith('"id","active"')
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_export_installation(synthetic_data_path, tmp_path, workers):
+    paths = export_installation(synthetic_data_path, str(tmp_path), 'jsonl', workers=workers)
+    assert sorted(os.listdir(tmp_path)) == sorted(os.path.basename(path) for path in paths)
+    assert len(paths) == len(ALL_MANAGERS)
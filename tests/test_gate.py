@@ -0,0 +1,64 @@
+import json
+
+import pytest
+
+from benchmarks import gate
+
+
+def baseline(thresholds=None, **results):
+    return {
+        'version': gate.BASELINE_FORMAT_VERSION,
+        'config': {'scale': 1, 'repeat': 3},
+        'thresholds': thresholds or {},
+        'results': {key: gate.summarize(timings) for key, timings in results.items()},
+    }
+
+
+def test_summarize():
+    summary = gate.summarize([1.0, 2.0, 3.0, 4.0, 100.0])
+    assert summary['median'] == 3.0
+    assert summary['iqr'] > 0
+    assert gate.summarize([2.0]) == {'median': 2.0, 'iqr': 0, 'samples': [2.0]}
+
+
+def test_no_regression():
+    recorded = baseline(**{'A.DAT:load': [1.0, 1.0, 1.0]})
+    current = {'A.DAT:load': gate.summarize([1.05, 1.05, 1.05])}
+    assert gate.compare(recorded, current) == [('A.DAT:load', 1.0, 1.05, pytest.approx(1.05), False)]
+
+
+def test_regression():
+    recorded = baseline(**{'A.DAT:load': [1.0, 1.0, 1.0], 'A.DAT:pack': [1.0, 1.0, 1.0]})
+    current = {
+        'A.DAT:load': gate.summarize([1.5, 1.5, 1.5]),
+        # Slower than the threshold, but within the spread of the timings
+        'A.DAT:pack': gate.summarize([0.5, 1.5, 2.5]),
+    }
+    assert [(key, is_regression) for key, *_, is_regression in gate.compare(recorded, current)] == [
+        ('A.DAT:load', True), ('A.DAT:pack', False),
+    ]
+
+
+def test_thresholds():
+    recorded = baseline({'load': 1.0, 'default': 0.2}, **{'A.DAT:load': [1.0] * 3, 'A.DAT:pack': [1.0] * 3})
+    current = {'A.DAT:load': gate.summarize([1.5] * 3), 'A.DAT:pack': gate.summarize([1.5] * 3)}
+    assert [is_regression for *_, is_regression in gate.compare(recorded, current)] == [False, True]
+    # The threshold of the command line wins over those of the baseline
+    assert [is_regression for *_, is_regression in gate.compare(recorded, current, threshold=0.1)] == [True, True]
+    assert [is_regression for *_, is_regression in gate.compare(recorded, current, threshold=0.6)] == [False, False]
+
+
+def test_missing_benchmarks():
+    recorded = baseline(**{'A.DAT:load': [1.0] * 3, 'B.DAT:load': [1.0] * 3})
+    current = {'A.DAT:load': gate.summarize([1.0] * 3), 'C.DAT:load': gate.summarize([1.0] * 3)}
+    assert [key for key, *_ in gate.compare(recorded, current)] == ['A.DAT:load']
+    assert gate.missing_benchmarks(recorded, current) == (['B.DAT:load'], ['C.DAT:load'])
+
+
+def test_check_refuses_another_scale(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(gate, 'BASELINES_DIR', str(tmp_path))
+    monkeypatch.setattr(gate, 'collect', lambda scale, repeat, seed=0: pytest.fail('Nothing should run'))
+    with open(gate.baseline_path('test'), "w") as file_obj:
+        json.dump(baseline(**{'A.DAT:load': [1.0]}), file_obj)
+    assert gate.main(['check', '--profile', 'test', '--scale', '5']) == gate.EXIT_MISMATCH
+    assert 'scale 1' in capsys.readouterr().err
@@ -0,0 +1,96 @@
+import copy
+
+import pytest
+
+from swr_ed import MANAGERS_BY_FILE
+from swr_ed.exceptions import SWRebellionEditorHistoryError
+from swr_ed.history import ManagerHistory, PersistentVector
+
+
+@pytest.mark.parametrize("size", [0, 1, 32, 33, 1024, 1025, 5000])
+def test_persistent_vector_updates(size):
+    items = list(range(size))
+    vector = PersistentVector(items)
+    assert list(vector) == items
+
+    updated = vector.append(-1).append(-2)
+    if size:
+        updated = updated.set(size // 2, 'x')
+    updated = updated.pop()
+
+    assert list(vector) == items
+    expected = items + [-1]
+    if size:
+        expected[size // 2] = 'x'
+    assert list(updated) == expected
+    assert sorted(updated.changed_indices(vector)) == sorted(({size // 2} if size else set()) | {size})
+
+
+@pytest.fixture
+def manager(synthetic_data_path):
+    # Nothing is saved, so the shared installation can be used
+    manager = MANAGERS_BY_FILE['CAPSHPSD.DAT'](synthetic_data_path)
+    manager.load()
+    return manager
+
+
+def test_undo_and_redo(manager):
+    history = ManagerHistory(manager)
+    original = copy.deepcopy(manager.data)
+    maintenance = original[2]['maintenance']
+
+    history.checkpoint('start')
+    history.set(2, 'maintenance', maintenance + 1)
+    history.update(3, hull=1, shield=2)
+    history.append(original[0])
+    edited = copy.deepcopy(manager.data)
+    assert len(edited) == len(original) + 1
+    assert (edited[2]['maintenance'], edited[3]['hull'], edited[3]['shield']) == (maintenance + 1, 1, 2)
+
+    history.undo()
+    assert manager.data == original
+    history.redo()
+    assert manager.data == edited
+    with pytest.raises(SWRebellionEditorHistoryError):
+        history.redo()
+
+    history.undo()
+    with pytest.raises(SWRebellionEditorHistoryError):
+        history.undo()
+    with pytest.raises(SWRebellionEditorHistoryError):
+        history.set(0, 'nope', 1)
+
+
+def test_snapshots_are_branches(manager):
+    history = ManagerHistory(manager)
+    original = copy.deepcopy(manager.data)
+    start = history.snapshot('start')
+    history.set(0, 'maintenance', 11)
+    branch = history.snapshot('branch')
+    history.restore(start)
+    assert manager.data == original
+
+    history.set(1, 'maintenance', 12)
+    history.pop()
+    history.restore(branch)
+    assert manager.data[0]['maintenance'] == 11
+    assert manager.data[1] == original[1]
+    assert len(manager.data) == len(original)
+
+
+def test_sync_picks_up_direct_edits(manager):
+    history = ManagerHistory(manager)
+    start = history.snapshot()
+    original = copy.deepcopy(manager.data)
+    manager.data[4]['hull'] += 1
+    manager.data.append(dict(original[1]))
+    history.sync()
+
+    assert len(history.rows) == len(original) + 1
+    assert sorted(history.rows.changed_indices(start.rows)) == [4, len(original)]
+    history.restore(start)
+    assert manager.data == original
+
+    del manager.data[-3:]
+    history.sync()
+    assert len(history.rows) == len(original) - 3
@@ -0,0 +1,126 @@
+import json
+import os
+import shutil
+
+import pytest
+
+from swr_ed import ALL_MANAGERS, MANAGERS_BY_FILE
+from swr_ed.exceptions import SWRebellionEditorValidationError
+from swr_ed.export import export_manager, export_path
+from swr_ed.importer import import_files
+from swr_ed.validation import convert_column
+
+
+@pytest.fixture
+def data_path(synthetic_data_path, tmp_path):
+    shutil.copytree(synthetic_data_path, str(tmp_path / 'install'))
+    return str(tmp_path / 'install')
+
+
+@pytest.mark.parametrize("manager_cls", ALL_MANAGERS)
+@pytest.mark.parametrize("fmt", ['csv', 'jsonl'])
+def test_export_import_round_trip(manager_cls, fmt, data_path, tmp_path):
+    source = export_path(manager_cls.filename, str(tmp_path), fmt)
+    export_manager(manager_cls(data_path), source, fmt)
+    original = open(manager_cls(data_path).file_path, "rb").read()
+    os.remove(manager_cls(data_path).file_path)
+
+    manager, = import_files(data_path, [source])
+    assert open(manager.file_path, "rb").read() == original
+
+    loaded = manager_cls(data_path)
+    loaded.load()
+    assert manager.data == loaded.data
+
+
+def test_all_errors_are_reported(data_path, tmp_path):
+    sources = []
+    for filename in ('CAPSHPSD.DAT', 'FIGHTSD.DAT'):
+        manager_cls = MANAGERS_BY_FILE[filename]
+        source = export_path(filename, str(tmp_path), 'csv')
+        export_manager(manager_cls(data_path), source, 'csv')
+        sources.append(source)
+    original = open(MANAGERS_BY_FILE['CAPSHPSD.DAT'](data_path).file_path, "rb").read()
+
+    lines = open(sources[0]).read().splitlines()
+    header = lines[0].replace('"', '').split(',')
+    row = lines[1].split(',')
+    row[header.index('maintenance')] = '-1'
+    row[header.index('shield')] = 'lots'
+    lines[1] = ','.join(row)
+    row = lines[2].split(',')
+    row[header.index('name_id_1')] = str(1 << 16)
+    lines[2] = ','.join(row)
+    with open(sources[0], "w") as file_obj:
+        file_obj.write('\n'.join(lines) + '\n')
+
+    lines = open(sources[1]).read().splitlines()
+    lines[0] = lines[0].replace('"detection"', '"detections"')
+    with open(sources[1], "w") as file_obj:
+        file_obj.write('\n'.join(lines) + '\n')
+
+    with pytest.raises(SWRebellionEditorValidationError) as error:
+        import_files(data_path, sources)
+    found = {(os.path.basename(issue.source), issue.line, issue.column) for issue in error.value.issues}
+    assert found == {
+        ('CAPSHPSD.csv', 2, 'maintenance'), ('CAPSHPSD.csv', 2, 'shield'), ('CAPSHPSD.csv', 3, 'name_id_1'),
+        ('FIGHTSD.csv', 1, 'detection'),
+    }
+    # Nothing is written when any file is invalid
+    assert open(MANAGERS_BY_FILE['CAPSHPSD.DAT'](data_path).file_path, "rb").read() == original
+
+
+def test_unknown_files_are_reported(data_path, tmp_path):
+    source = str(tmp_path / 'NOPE.csv')
+    with open(source, "w") as file_obj:
+        file_obj.write('id\n1\n')
+    with pytest.raises(SWRebellionEditorValidationError) as error:
+        import_files(data_path, [source])
+    assert [(issue.source, issue.line, issue.column) for issue in error.value.issues] == [(source, None, None)]
+
+
+def test_derived_fields_are_recomputed(data_path, tmp_path):
+    manager_cls = MANAGERS_BY_FILE['CAPSHPSD.DAT']
+    source = export_path(manager_cls.filename, str(tmp_path), 'jsonl')
+    export_manager(manager_cls(data_path), source, 'jsonl')
+    records = [json.loads(line) for line in open(source)]
+    before = dict(records[3])
+    records[3]['ion_firepower_left'] += 7
+    with open(source, "w") as file_obj:
+        file_obj.write(''.join(json.dumps(record) + '\n' for record in records))
+
+    import_files(data_path, [source])
+    manager = manager_cls(data_path)
+    manager.load()
+    row = manager.data[3]
+    assert row['ion_firepower_sum'] == before['ion_firepower_sum'] + 7
+    assert row['firepower_sum'] == before['firepower_sum'] + 7
+    assert manager.data[4]['firepower_sum'] == records[4]['firepower_sum']
+
+
+def test_read_only_fields_are_checked(data_path, tmp_path):
+    manager_cls = MANAGERS_BY_FILE['CAPSHPSD.DAT']
+    source = export_path(manager_cls.filename, str(tmp_path), 'jsonl')
+    export_manager(manager_cls(data_path), source, 'jsonl')
+    records = [json.loads(line) for line in open(source)]
+    records[2]['family_id'] += 1
+    # Rows are matched by their id, so they can be reordered
+    records.reverse()
+    with open(source, "w") as file_obj:
+        file_obj.write(''.join(json.dumps(record) + '\n' for record in records))
+
+    with pytest.raises(SWRebellionEditorValidationError) as error:
+        import_files(data_path, [source])
+    assert [(issue.line, issue.column) for issue in error.value.issues] == [(len(records) - 2, 'family_id')]
+
+    manager, = import_files(data_path, [source], allow_read_only=True)
+    assert manager.data[-3]['family_id'] == records[-3]['family_id']
+
+
+def test_convert_column():
+    field = MANAGERS_BY_FILE['CAPSHPSD.DAT'].schema['name_id_1']
+    assert convert_column(field, ['1', '2']) == ([1, 2], [])
+    assert convert_column(field, [1, 2]) == ([1, 2], [])
+    values, issues = convert_column(field, [1, True, 1.5, '70000', '3'], lines=[2, 3, 4, 5, 6])
+    assert values[-1] == 3
+    assert [(issue.line, issue.value) for issue in issues] == [(3, True), (4, 1.5), (5, '70000')]
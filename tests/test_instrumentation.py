@@ -0,0 +1,29 @@
+import io
+import json
+import shutil
+
+from swr_ed import MANAGERS_BY_FILE
+from swr_ed.instrumentation import InMemoryAggregator, JSONLinesExporter, MultiSink, set_metrics_sink
+
+
+def test_load_and_save_stages(synthetic_data_path, tmp_path):
+    # Saved to a copy, the session installation is shared by the other tests
+    data_path = shutil.copytree(synthetic_data_path, str(tmp_path / 'install'))
+    aggregator = InMemoryAggregator()
+    output = io.StringIO()
+    set_metrics_sink(MultiSink(aggregator, JSONLinesExporter(output)))
+    try:
+        manager = MANAGERS_BY_FILE['CAPSHPSD.DAT'](data_path)
+        manager.load()
+        manager.save()
+    finally:
+        set_metrics_sink(None)
+
+    stages = {stats['stage']: stats for stats in aggregator.summary()}
+    assert {'load', 'read', 'hash', 'header', 'unpack', 'upgrade', 'text', 'prepare_output_stream', 'pack',
+            'save_stream_to_file', 'write'} <= set(stages)
+    assert stages['read']['bytes'] == stages['write']['bytes']
+    assert all(stats['manager'] == 'CapitalShipsDataDataManager' for stats in stages.values())
+
+    lines = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert len(lines) == sum(stats['count'] for stats in stages.values())
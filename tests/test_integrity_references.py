@@ -0,0 +1,85 @@
+import os
+import shutil
+
+import pytest
+
+from swr_ed.integrity import check_installation, main
+from swr_ed.managers import (
+    DefensiveFacilitiesDataDataManager, EmpireFleetHomeTableDataManager, FightersDataDataManager,
+    SystemFacilityCoreTableDataManager, SystemsDataDataManager,
+)
+
+
+@pytest.fixture
+def data_path(synthetic_data_path, tmp_path):
+    shutil.copytree(synthetic_data_path, str(tmp_path / 'install'))
+    return str(tmp_path / 'install')
+
+
+def edit(manager_cls, data_path, index, **values):
+    manager = manager_cls(data_path)
+    manager.load()
+    if isinstance(manager.data[index], dict):
+        manager.data[index].update(values)
+    else:
+        for name, value in values.items():
+            manager.data[index][manager.schema.names.index(name)] = value
+    manager.save(allow_read_only=True)
+
+
+def test_synthetic_installation_is_clean(synthetic_data_path):
+    # As in the stock tables, a family of 0 seeds no facility
+    seeds = SystemFacilityCoreTableDataManager(synthetic_data_path)
+    seeds.load()
+    assert 0 in {row['family_id'] for row in seeds.data}
+    assert check_installation(synthetic_data_path) == []
+
+
+def test_bad_references_are_reported(data_path):
+    edit(SystemsDataDataManager, data_path, 3, sector_id=9999)
+    edit(FightersDataDataManager, data_path, 1, producing_facility_family_id=41)
+    edit(DefensiveFacilitiesDataDataManager, data_path, 0, family_id=40)
+
+    fleets = EmpireFleetHomeTableDataManager(data_path)
+    fleets.load()
+    unit_row = next(index for index, row in enumerate(fleets.data) if row[1] == 0)
+    edit(EmpireFleetHomeTableDataManager, data_path, unit_row, field_2=9999)
+
+    issues = {(issue.source, issue.line, issue.column, issue.value) for issue in check_installation(data_path)}
+    assert issues == {
+        ('SYSTEMSD.DAT', 3, 'sector_id', 9999),
+        ('FIGHTSD.DAT', 1, 'producing_facility_family_id', 41),
+        ('DEFFACSD.DAT', 0, 'family_id', 40),
+        ('CMUNEFTB.DAT', unit_row, 'field_2', 9999),
+    }
+
+
+def test_units_are_checked_against_their_family(data_path):
+    # A capital ship of the fleet turned into a fighter with an id that no fighter has
+    fleets = EmpireFleetHomeTableDataManager(data_path)
+    fleets.load()
+    unit_row = next(index for index, row in enumerate(fleets.data) if row[1] == 0 and row[4] == 20)
+    edit(EmpireFleetHomeTableDataManager, data_path, unit_row, field_2=1000, field_4=28)
+
+    issues = check_installation(data_path)
+    assert [(issue.line, issue.value) for issue in issues] == [(unit_row, 1000)]
+    assert 'family 28' in issues[0].message
+
+
+def test_missing_files_are_read_from_the_base(synthetic_data_path, tmp_path):
+    mod_path = str(tmp_path / 'mod')
+    os.makedirs(os.path.join(mod_path, 'GDATA'))
+    shutil.copy(SystemsDataDataManager(synthetic_data_path).file_path, os.path.join(mod_path, 'GDATA'))
+    shutil.copy(os.path.join(synthetic_data_path, 'TEXTSTRA.DLL'), mod_path)
+    edit(SystemsDataDataManager, mod_path, 0, sector_id=1)
+
+    assert [issue.column for issue in check_installation(mod_path, base_path=synthetic_data_path)] == ['sector_id']
+    assert {issue.message for issue in check_installation(mod_path) if issue.line is None} == {'is missing'}
+
+
+def test_main_exits_with_the_issues(data_path, capsys):
+    main([data_path])
+    edit(SystemsDataDataManager, data_path, 0, sector_id=1)
+    with pytest.raises(SystemExit):
+        main([data_path])
+    assert 'SYSTEMSD.DAT:0: sector_id' in capsys.readouterr().err
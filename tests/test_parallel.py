@@ -0,0 +1,124 @@
+import operator
+import os
+
+import pytest
+
+from swr_ed import ALL_MANAGERS, MANAGERS_BY_FILE
+from swr_ed.exceptions import SWRebellionEditorValidationError
+from swr_ed.parallel import map_ranges, map_reduce, record_ranges, transform
+
+
+def collect_rows(rows, first_row):
+    return first_row, list(rows)
+
+
+def count_rows(rows, first_row):
+    return sum(1 for _ in rows)
+
+
+def identity(rows, first_row):
+    return list(rows)
+
+
+def keep_even_ids(rows, first_row):
+    return [row for row in rows if not row['id'] % 2]
+
+
+def arm(rows, first_row):
+    rows = list(rows)
+    for row in rows:
+        row['ion_firepower_left'] += 1
+    return rows
+
+
+def renumber(rows, first_row):
+    rows = list(rows)
+    for row in rows:
+        row['id'] += 1000
+    return rows
+
+
+def test_record_ranges():
+    ranges = record_ranges(16 + 10 * 4, 16, 4, 3)
+    assert [(r.start, r.stop, r.first_row) for r in ranges] == [(16, 28, 0), (28, 40, 3), (40, 56, 6)]
+    assert len(record_ranges(16 + 2 * 4, 16, 4, 8)) == 2
+
+
+@pytest.mark.parametrize("manager_cls", ALL_MANAGERS)
+def test_map_ranges_matches_load(manager_cls, synthetic_data_path):
+    manager = manager_cls(synthetic_data_path)
+    manager.load()
+
+    results = map_ranges(manager.file_path, collect_rows, workers=1, parts=3)
+    assert [row for _, rows in results for row in rows] == manager.data
+    assert results[0][0] == 0
+
+
+def test_map_reduce_in_worker_processes(synthetic_data_path):
+    manager = MANAGERS_BY_FILE['SYSTEMSD.DAT'](synthetic_data_path)
+    manager.load()
+    assert map_reduce(manager.file_path, count_rows, operator.add, 0, workers=2) == len(manager.data)
+
+
+def test_parallel_transform(synthetic_data_path, tmp_path):
+    manager_cls = MANAGERS_BY_FILE['CAPSHPSD.DAT']
+    original = manager_cls(synthetic_data_path)
+    original.load()
+    os.mkdir(tmp_path / 'GDATA')
+    dst = str(tmp_path / 'GDATA' / manager_cls.filename)
+
+    count = transform(original.file_path, dst, keep_even_ids, workers=2, parts=5)
+
+    manager = manager_cls(synthetic_data_path)
+    manager.file_path = dst
+    manager.load()
+    assert manager.data == [row for row in original.data if not row['id'] % 2]
+    assert count == manager.header_count == len(manager.data)
+    assert os.listdir(str(tmp_path / 'GDATA')) == [manager_cls.filename]
+
+
+@pytest.mark.parametrize("manager_cls", ALL_MANAGERS)
+def test_identity_transform(manager_cls, synthetic_data_path, tmp_path):
+    src = manager_cls(synthetic_data_path).file_path
+    dst = str(tmp_path / manager_cls.filename)
+
+    transform(src, dst, identity, workers=1, parts=3)
+    assert open(dst, "rb").read() == open(src, "rb").read()
+
+
+def test_transform_recomputes_derived_fields(synthetic_data_path, tmp_path):
+    manager_cls = MANAGERS_BY_FILE['CAPSHPSD.DAT']
+    original = manager_cls(synthetic_data_path)
+    original.load()
+    dst = str(tmp_path / manager_cls.filename)
+
+    transform(original.file_path, dst, arm, workers=2, parts=3)
+    manager = manager_cls(synthetic_data_path)
+    manager.file_path = dst
+    manager.load()
+    assert [row['firepower_sum'] for row in manager.data] == [row['firepower_sum'] + 1 for row in original.data]
+
+
+def test_transform_checks_read_only_fields(synthetic_data_path, tmp_path):
+    src = MANAGERS_BY_FILE['CAPSHPSD.DAT'](synthetic_data_path).file_path
+    dst = str(tmp_path / 'CAPSHPSD.DAT')
+
+    with pytest.raises(SWRebellionEditorValidationError) as error:
+        transform(src, dst, renumber, workers=1, parts=3)
+    assert {issue.column for issue in error.value.issues} == {'id'}
+    assert not os.path.exists(dst)
+
+    transform(src, dst, renumber, workers=1, parts=3, allow_read_only=True)
+    assert os.path.exists(dst)
+
+
+def test_transform_does_not_reuse_a_left_over_temporary_file(synthetic_data_path, tmp_path):
+    src = MANAGERS_BY_FILE['CAPSHPSD.DAT'](synthetic_data_path).file_path
+    dst = str(tmp_path / 'CAPSHPSD.DAT')
+    with open(dst + '.tmp', "wb") as file_obj:
+        file_obj.write(b'left over')
+
+    transform(src, dst, identity, workers=1, parts=3)
+    assert open(dst, "rb").read() == open(src, "rb").read()
+    assert open(dst + '.tmp', "rb").read() == b'left over'
+    assert sorted(os.listdir(str(tmp_path))) == ['CAPSHPSD.DAT', 'CAPSHPSD.DAT.tmp']
@@ -0,0 +1,63 @@
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from swr_ed import ALL_MANAGERS, MANAGERS_BY_FILE
+from swr_ed.exceptions import SWRebellionEditorSchemaMismatchError
+
+
+def first_name(manager):
+    return manager.data[0]['name'], len(manager.data)
+
+
+@pytest.mark.parametrize("manager_cls", ALL_MANAGERS)
+def test_pickle_round_trip(manager_cls, synthetic_data_path):
+    manager = manager_cls(synthetic_data_path)
+    manager.load()
+
+    payload = pickle.dumps(manager)
+    assert len(payload) < os.path.getsize(manager.file_path) + 1024
+
+    restored = pickle.loads(payload)
+    assert restored._pending_rows is not None
+    assert restored.data == manager.data
+    assert restored._pending_rows is None
+    assert restored.header_count == manager.header_count
+    assert restored.md5_checksum == manager.md5_checksum
+
+    # A manager that was never decoded forwards its packed rows as they are
+    assert pickle.dumps(pickle.loads(payload)) == payload
+
+
+def test_pickle_unloaded_manager(synthetic_data_path):
+    manager = pickle.loads(pickle.dumps(MANAGERS_BY_FILE['CAPSHPSD.DAT'](synthetic_data_path)))
+    assert manager.data is None
+    manager.load()
+    assert manager.data
+
+
+def test_unpickled_managers_share_the_text_table(synthetic_data_path):
+    managers = []
+    for filename in ('CAPSHPSD.DAT', 'FIGHTSD.DAT'):
+        manager = MANAGERS_BY_FILE[filename](synthetic_data_path)
+        manager.load()
+        managers.append(pickle.loads(pickle.dumps(manager)))
+    assert managers[0].text_stra is managers[1].text_stra
+
+
+def test_schema_mismatch(synthetic_data_path):
+    manager = MANAGERS_BY_FILE['CAPSHPSD.DAT'](synthetic_data_path)
+    manager.load()
+    state = manager.get_state()
+    state['schema'] = '0' * 16
+    with pytest.raises(SWRebellionEditorSchemaMismatchError):
+        MANAGERS_BY_FILE['CAPSHPSD.DAT'](synthetic_data_path).__setstate__(state)
+
+
+def test_send_to_worker_process(synthetic_data_path):
+    manager = MANAGERS_BY_FILE['CAPSHPSD.DAT'](synthetic_data_path)
+    manager.load()
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        assert executor.submit(first_name, manager).result() == (manager.data[0]['name'], len(manager.data))
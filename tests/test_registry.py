@@ -0,0 +1,37 @@
+import subprocess
+import sys
+
+from swr_ed import ALL_MANAGERS, MANAGERS_BY_FILE, managers, registry
+from swr_ed.base import SWRBaseManager
+from swr_ed.registry import MANAGER_PATHS
+
+
+def test_manager_paths_match_managers_module():
+    manager_paths = {
+        cls.filename: f'{cls.__module__}.{cls.__name__}'
+        for cls in vars(managers).values()
+        if isinstance(cls, type) and issubclass(cls, SWRBaseManager) and cls.filename
+    }
+    assert manager_paths == MANAGER_PATHS
+    assert [m.filename for m in ALL_MANAGERS] == sorted(MANAGER_PATHS)
+    assert all(MANAGERS_BY_FILE[filename].filename == filename for filename in MANAGER_PATHS)
+
+
+def test_sorted_managers_are_kept(monkeypatch):
+    managers_list = ALL_MANAGERS._managers()
+    assert ALL_MANAGERS._managers() is managers_list
+
+    # They are sorted again once another manager is registered
+    monkeypatch.setattr(registry, '_sorted', registry._sorted)
+    monkeypatch.setattr(registry, '_registered', list(registry._registered))
+    monkeypatch.setattr(registry, '_by_file', dict(registry._by_file))
+    manager_cls = type('FirstManager', (), {'filename': 'AAAAAAAA.DAT'})
+    registry.register_manager(manager_cls)
+    assert ALL_MANAGERS[0] is manager_cls
+    assert list(ALL_MANAGERS)[1:] == managers_list
+
+
+def test_import_does_not_load_managers():
+    code = 'import sys, swr_ed; print(sorted(m for m in sys.modules if m.startswith(("swr_ed.", "win32"))))'
+    output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout
+    assert output.strip() == "['swr_ed.registry']"
@@ -0,0 +1,220 @@
+import io
+import json
+import shutil
+
+import pytest
+
+from swr_ed import MANAGERS_BY_FILE, rpc
+from swr_ed.rpc import EditorService, serve
+
+
+@pytest.fixture
+def data_path(synthetic_data_path, tmp_path):
+    shutil.copytree(synthetic_data_path, str(tmp_path / 'install'))
+    return str(tmp_path / 'install')
+
+
+@pytest.fixture
+def notifications():
+    return []
+
+
+@pytest.fixture
+def service(data_path, notifications):
+    return EditorService(data_path, notify=lambda method, params: notifications.append((method, params)))
+
+
+def call(service, method, **params):
+    response = service.handle({'jsonrpc': '2.0', 'id': 1, 'method': method, 'params': params})
+    assert response['id'] == 1
+    return response
+
+
+def result(service, method, **params):
+    response = call(service, method, **params)
+    assert 'error' not in response, response['error']
+    return response['result']
+
+
+def test_subscribers_get_the_changed_fields(service, notifications):
+    full = result(service, 'subscribe', filename='CAPSHPSD.DAT')
+    rows = [dict(zip(full['fields'], values)) for values in full['rows']]
+    ion = rows[3]['ion_firepower_left']
+    maintenance = rows[5]['maintenance'] + 1
+
+    edits = [
+        {'filename': 'CAPSHPSD.DAT', 'index': 3, 'values': {'ion_firepower_left': ion + 7}},
+        {'filename': 'CAPSHPSD.DAT', 'index': 5, 'values': {'maintenance': maintenance}},
+    ]
+    assert result(service, 'edit', edits=edits, versions={'CAPSHPSD.DAT': 0}) == {'versions': {'CAPSHPSD.DAT': 1}}
+
+    (method, delta), = notifications
+    assert method == 'changes'
+    assert (delta['from_version'], delta['version'], delta['count']) == (0, 1, len(rows))
+    # The sums of the firepower are derived from the arcs
+    assert delta['rows'] == [
+        [3, {
+            'ion_firepower_left': ion + 7,
+            'ion_firepower_sum': rows[3]['ion_firepower_sum'] + 7,
+            'firepower_sum': rows[3]['firepower_sum'] + 7,
+        }],
+        [5, {'maintenance': maintenance}],
+    ]
+    assert service.states['CAPSHPSD.DAT'].manager.data[5]['maintenance'] == maintenance
+
+
+def test_batches_are_applied_as_a_whole(service, notifications):
+    result(service, 'subscribe', filename='CAPSHPSD.DAT')
+    before = [dict(row) for row in service.state('CAPSHPSD.DAT').manager.data]
+    edits = [
+        {'filename': 'CAPSHPSD.DAT', 'index': 0, 'values': {'maintenance': 3}},
+        {'filename': 'TROOPSD.DAT', 'index': 1, 'values': {'maintenance': -1}},
+        {'filename': 'TROOPSD.DAT', 'index': 2, 'values': {'id': 999}},
+    ]
+    error = call(service, 'edit', edits=edits)['error']
+    assert error['code'] == rpc.VALIDATION_ERROR
+    assert {(issue['source'], issue['line'], issue['column']) for issue in error['data']} == {
+        ('TROOPSD.DAT', 1, 'maintenance'), ('TROOPSD.DAT', 2, 'id'),
+    }
+    assert service.state('CAPSHPSD.DAT').version == 0
+    assert service.state('CAPSHPSD.DAT').manager.data == before
+    assert notifications == []
+
+    # Read-only fields can be edited on purpose
+    assert result(service, 'edit', edits=edits[2:], allow_read_only=True) == {'versions': {'TROOPSD.DAT': 1}}
+
+
+@pytest.mark.parametrize("edit, code", [
+    ({'filename': 'NOPE.DAT', 'index': 0}, rpc.INVALID_PARAMS),
+    ({'filename': 'CAPSHPSD.DAT', 'index': 10 ** 6, 'values': {}}, rpc.INVALID_PARAMS),
+    ({'filename': 'CAPSHPSD.DAT', 'index': 0, 'values': {'nope': 1}}, rpc.INVALID_PARAMS),
+    ({'filename': 'CAPSHPSD.DAT', 'op': 'append', 'values': {'hull': 1}}, rpc.INVALID_PARAMS),
+    ({'filename': 'CAPSHPSD.DAT', 'op': 'nope'}, rpc.INVALID_PARAMS),
+])
+def test_bad_edits(service, edit, code):
+    assert call(service, 'edit', edits=[edit])['error']['code'] == code
+
+
+@pytest.mark.parametrize("method, params, code", [
+    ('edit', {'edits': 5}, rpc.INVALID_PARAMS),
+    ('edit', {'edits': [5]}, rpc.INVALID_PARAMS),
+    ('edit', {'edits': [{'filename': ['CAPSHPSD.DAT'], 'index': 0}]}, rpc.INVALID_PARAMS),
+    ('edit', {'edits': [{'filename': 'CAPSHPSD.DAT', 'index': 0, 'values': [1]}]}, rpc.INVALID_PARAMS),
+    ('edit', {'edits': [{'filename': 'CAPSHPSD.DAT', 'op': ['set']}]}, rpc.INVALID_PARAMS),
+    ('edit', {'edits': [], 'versions': ['CAPSHPSD.DAT']}, rpc.INVALID_PARAMS),
+    ('edit', {'edits': [{'filename': 'CAPSHPSD.DAT', 'index': 0, 'values': {'ion_firepower_left': 'x'}}]},
+     rpc.VALIDATION_ERROR),
+    ('sync', {'filename': 'CAPSHPSD.DAT', 'version': [1]}, rpc.INVALID_PARAMS),
+    ('subscribe', {'filename': {}}, rpc.INVALID_PARAMS),
+    ('save', {'filenames': 'CAPSHPSD.DAT'}, rpc.INVALID_PARAMS),
+    ('save', {'filenames': [1]}, rpc.INVALID_PARAMS),
+])
+def test_bad_params(service, method, params, code):
+    assert call(service, method, **params)['error']['code'] == code
+
+
+def test_version_conflicts(service):
+    edit = {'filename': 'CAPSHPSD.DAT', 'index': 0, 'values': {'maintenance': 3}}
+    result(service, 'edit', edits=[edit])
+    error = call(service, 'edit', edits=[edit], versions={'CAPSHPSD.DAT': 0})['error']
+    assert (error['code'], error['data']['version']) == (rpc.VERSION_CONFLICT, 1)
+
+
+def test_added_and_removed_rows(service):
+    state = service.state('TROOPSD.DAT')
+    count = len(state.rows)
+    # Rows are compared by position, the row put back in place of a removed one only changed its maintenance
+    new_row = dict(zip(state.schema.names, state.rows[count - 2]))
+    new_row['maintenance'] += 1
+    result(service, 'edit', edits=[
+        {'filename': 'TROOPSD.DAT', 'op': 'pop'},
+        {'filename': 'TROOPSD.DAT', 'op': 'pop'},
+        {'filename': 'TROOPSD.DAT', 'op': 'append', 'values': new_row},
+    ])
+    delta = result(service, 'sync', filename='TROOPSD.DAT', version=0)
+    assert delta['count'] == count - 1 == len(state.manager.data)
+    assert delta['rows'] == [[count - 2, {'maintenance': new_row['maintenance']}]]
+
+
+def test_old_versions_are_resent_whole(service, monkeypatch):
+    monkeypatch.setattr(rpc, 'MAX_VERSIONS', 2)
+    for value in range(3):
+        result(service, 'edit', edits=[{'filename': 'CAPSHPSD.DAT', 'index': 0, 'values': {'maintenance': value}}])
+    assert result(service, 'sync', filename='CAPSHPSD.DAT', version=2)['rows'] == [[0, {'maintenance': 2}]]
+    delta = result(service, 'sync', filename='CAPSHPSD.DAT', version=0)
+    assert delta['reset'] and len(delta['rows']) == len(service.state('CAPSHPSD.DAT').rows)
+
+
+def test_save(service, data_path):
+    maintenance = service.state('CAPSHPSD.DAT').manager.data[2]['maintenance'] + 1
+    edit = {'filename': 'CAPSHPSD.DAT', 'index': 2, 'values': {'maintenance': maintenance}}
+    result(service, 'edit', edits=[edit])
+    saved = result(service, 'save')['saved']
+    assert list(saved) == ['CAPSHPSD.DAT']
+    assert result(service, 'save') == {'saved': {}}
+
+    manager = MANAGERS_BY_FILE['CAPSHPSD.DAT'](data_path)
+    manager.load()
+    assert manager.data[2]['maintenance'] == maintenance
+    assert manager.md5_checksum == saved['CAPSHPSD.DAT']
+
+
+def test_serve(data_path):
+    requests = [
+        {'jsonrpc': '2.0', 'id': 1, 'method': 'subscribe', 'params': ['CMUNEFTB.DAT']},
+        'not json',
+        [
+            {'jsonrpc': '2.0', 'method': 'edit', 'params': {
+                'edits': [{'filename': 'CMUNEFTB.DAT', 'index': 0, 'values': {'field_3': 1}}],
+            }},
+            {'jsonrpc': '2.0', 'id': 2, 'method': 'nope'},
+        ],
+    ]
+    input_file = io.StringIO('\n'.join(
+        request if isinstance(request, str) else json.dumps(request) for request in requests
+    ) + '\n')
+    output_file = io.StringIO()
+    serve(EditorService(data_path), input_file, output_file)
+
+    subscribed, parse_error, changes, batch = map(json.loads, output_file.getvalue().splitlines())
+    assert subscribed['result']['version'] == 0
+    assert parse_error['error']['code'] == rpc.PARSE_ERROR
+    assert (changes['method'], changes['params']['rows']) == ('changes', [[0, {'field_3': 1}]])
+    assert [response['error']['code'] for response in batch] == [rpc.METHOD_NOT_FOUND]
+
+
+def test_empty_batch(service):
+    response = service.handle([])
+    assert (response['id'], response['error']['code']) == (None, rpc.INVALID_REQUEST)
+
+
+def test_errors_do_not_end_the_session(data_path, monkeypatch):
+    service = EditorService(data_path)
+
+    def fail():
+        raise ValueError('nope')
+
+    monkeypatch.setitem(service.methods, 'files', fail)
+    requests = [
+        {'jsonrpc': '2.0', 'id': 1, 'method': 'files'},
+        {'jsonrpc': '2.0', 'id': 2, 'method': 'edit', 'params': {'edits': 5}},
+        {'jsonrpc': '2.0', 'id': 3, 'method': 'subscribe', 'params': ['CMUNEFTB.DAT']},
+    ]
+    output_file = io.StringIO()
+    serve(service, io.StringIO(''.join(json.dumps(request) + '\n' for request in requests)), output_file)
+
+    failed, invalid, subscribed = map(json.loads, output_file.getvalue().splitlines())
+    assert failed['error']['code'] == rpc.INTERNAL_ERROR
+    assert invalid['error']['code'] == rpc.INVALID_PARAMS
+    assert subscribed['result']['version'] == 0
+
+
+def test_main_file_names(data_path, monkeypatch, capsys):
+    services = []
+    monkeypatch.setattr(rpc, 'serve', lambda service, input_file, output_file: services.append(service))
+    rpc.main([data_path, '--file', 'capshpsd.dat'])
+    assert services[0].files() == ['CAPSHPSD.DAT']
+
+    with pytest.raises(SystemExit):
+        rpc.main([data_path, '--file', 'NOPE.DAT'])
+    assert 'NOPE.DAT' in capsys.readouterr().err
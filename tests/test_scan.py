@@ -0,0 +1,98 @@
+import os
+import shutil
+
+import pytest
+
+from swr_ed import ALL_MANAGERS, MANAGERS_BY_FILE
+from swr_ed import scan as scan_module
+from swr_ed.scan import MISSING, MODIFIED, STOCK, DigestCache, file_md5, main, scan
+from swr_ed.utils import list_files_edited_files
+
+
+@pytest.fixture
+def installations(synthetic_data_path, tmp_path):
+    data_paths = []
+    for index in range(3):
+        data_path = str(tmp_path / f'install_{index}')
+        shutil.copytree(synthetic_data_path, data_path)
+        data_paths.append(data_path)
+    return data_paths
+
+
+@pytest.fixture
+def checksums(synthetic_data_path):
+    # The synthetic files stand for the stock ones
+    return {
+        manager_cls.filename: file_md5(manager_cls(synthetic_data_path).file_path) for manager_cls in ALL_MANAGERS
+    }
+
+
+def test_statuses(installations, checksums):
+    os.remove(MANAGERS_BY_FILE['FIGHTSD.DAT'](installations[0]).file_path)
+    with open(MANAGERS_BY_FILE['TROOPSD.DAT'](installations[1]).file_path, "r+b") as file_obj:
+        file_obj.seek(-1, os.SEEK_END)
+        file_obj.write(b'\xff')
+
+    results = list(scan(installations, checksums=checksums, workers=2))
+    assert len(results) == len(installations) * len(ALL_MANAGERS)
+    assert {(result.data_path, result.filename, result.status) for result in results if result.status != STOCK} == {
+        (installations[0], 'FIGHTSD.DAT', MISSING),
+        (installations[1], 'TROOPSD.DAT', MODIFIED),
+    }
+
+
+def test_against_the_expected_checksums(installations):
+    results = list(scan(installations[:1], manager_classes=ALL_MANAGERS[:3]))
+    assert [result.status for result in results] == [MODIFIED] * 3
+    assert results[0].md5_checksum == file_md5(ALL_MANAGERS[0](installations[0]).file_path)
+
+
+def test_missing_installation(tmp_path):
+    results = list(scan([str(tmp_path / 'nowhere')]))
+    assert {result.status for result in results} == {MISSING}
+
+
+def test_cached_digests_are_reused(installations, checksums, tmp_path, monkeypatch):
+    cache_path = str(tmp_path / 'digests.json')
+    cache = DigestCache(cache_path)
+    first = sorted(scan(installations, checksums=checksums, cache=cache))
+    cache.save()
+
+    def fail(file_path):
+        raise AssertionError(f'{file_path} was read')
+
+    monkeypatch.setattr(scan_module, 'file_md5', fail)
+    assert sorted(scan(installations, checksums=checksums, cache=DigestCache(cache_path))) == first
+
+    # A file that changed is read again
+    file_path = MANAGERS_BY_FILE['SECTORSD.DAT'](installations[2]).file_path
+    with open(file_path, "ab") as file_obj:
+        file_obj.write(b'\0')
+    with pytest.raises(AssertionError, match='SECTORSD.DAT'):
+        list(scan(installations, checksums=checksums, cache=DigestCache(cache_path)))
+
+
+def test_in_memory_cache_is_not_saved(installations, checksums, tmp_path, monkeypatch):
+    os.mkdir(str(tmp_path / 'cwd'))
+    monkeypatch.chdir(str(tmp_path / 'cwd'))
+    cache = DigestCache()
+    list(scan(installations, checksums=checksums, cache=cache))
+    assert cache.digests
+    cache.save()
+    assert os.listdir('.') == []
+
+
+def test_list_files_edited_files(installations):
+    edited = list_files_edited_files(installations[0])
+    assert [file_path for file_path, _ in edited] == [
+        os.path.join(installations[0], manager_cls.file_location, manager_cls.filename) for manager_cls in ALL_MANAGERS
+    ]
+
+
+def test_main(installations, tmp_path, capsys):
+    with pytest.raises(SystemExit):
+        main(installations[:2] + ['--changed', '--cache', str(tmp_path / 'digests.json')])
+    lines = capsys.readouterr().out.splitlines()
+    assert len(lines) == 2 * len(ALL_MANAGERS)
+    assert all(line.endswith('\tmodified') for line in lines)
+    assert os.path.exists(tmp_path / 'digests.json')
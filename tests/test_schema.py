@@ -0,0 +1,106 @@
+import pickle
+import shutil
+import struct
+from collections import OrderedDict
+
+import pytest
+
+from swr_ed import ALL_MANAGERS, MANAGERS_BY_FILE
+from swr_ed.base import FieldDef, SWRDataManager
+from swr_ed.constants import FieldType
+from swr_ed.schema import Schema
+
+
+@pytest.mark.parametrize("manager_cls", ALL_MANAGERS)
+def test_schema_matches_struct(manager_cls):
+    schema = manager_cls.schema
+    assert manager_cls.data_struct is schema.struct
+    assert manager_cls.header_struct.format == manager_cls.byte_order + manager_cls.header_struct_format
+    if issubclass(manager_cls, SWRDataManager):
+        assert schema.names == tuple(manager_cls.fields.keys())
+
+    offset = 0
+    for field in schema:
+        assert field.offset == offset
+        assert field.size == struct.calcsize(manager_cls.byte_order + field.format)
+        assert field.signed == (field.format in 'bhilq')
+        offset += field.size
+    assert offset == schema.size
+
+
+def test_schema_is_compiled_once(synthetic_data_path):
+    manager_cls = ALL_MANAGERS[0]
+    first, second = manager_cls(synthetic_data_path), manager_cls(synthetic_data_path)
+    assert first.data_struct is second.data_struct is manager_cls.data_struct
+    assert first.header_struct is second.header_struct is manager_cls.header_struct
+
+
+def test_derived_fields_are_in_order():
+    derived = MANAGERS_BY_FILE['CAPSHPSD.DAT'].schema.derived
+    assert [item.field.name for item in derived] == [
+        'turbolaser_firepower_sum', 'ion_firepower_sum', 'laser_firepower_sum', 'firepower_sum',
+    ]
+    assert derived[-1].sources == tuple(item.field.index for item in derived[:3])
+
+
+def test_derived_fields_must_come_after_their_sources():
+    fields = OrderedDict([
+        ('total', FieldDef('I', FieldType.DENORMALIZED, sources=('subtotal',))),
+        ('subtotal', FieldDef('I', FieldType.DENORMALIZED, sources=('value',))),
+        ('value', FieldDef('I', FieldType.EDITABLE)),
+    ])
+    with pytest.raises(ValueError):
+        Schema.from_fields('<', fields)
+    fields.move_to_end('total')
+    assert [item.field.name for item in Schema.from_fields('<', fields).derived] == ['subtotal', 'total']
+
+    fields['other'] = FieldDef('I', FieldType.DENORMALIZED, sources=('missing',))
+    with pytest.raises(ValueError):
+        Schema.from_fields('<', fields)
+
+
+@pytest.fixture
+def capital_ships(synthetic_data_path, tmp_path):
+    shutil.copytree(synthetic_data_path, str(tmp_path / 'install'))
+    manager = MANAGERS_BY_FILE['CAPSHPSD.DAT'](str(tmp_path / 'install'))
+    manager.load()
+    return manager
+
+
+def test_derived_fields_are_recomputed_on_save(capital_ships):
+    capital_ships.data[3]['ion_firepower_left'] += 7
+    capital_ships.data[5]['turbolaser_firepower_front'] += 1
+    # Not a source, the sums of the row stay as they were
+    capital_ships.data[6]['laser_firepower_sum'] += 1
+    expected = [dict(row) for row in capital_ships.data]
+    expected[3]['ion_firepower_sum'] += 7
+    expected[3]['firepower_sum'] += 7
+    expected[5]['turbolaser_firepower_sum'] += 1
+    expected[5]['firepower_sum'] += 1
+
+    capital_ships.save()
+    assert capital_ships.data == expected
+    reloaded = type(capital_ships)(capital_ships.data_path)
+    reloaded.load()
+    assert reloaded.data == expected
+
+
+def test_only_changed_rows_are_recomputed(capital_ships):
+    data_tuples = [tuple(capital_ships.downgrade_data(row)) for row in capital_ships.data]
+    assert capital_ships.update_derived_fields(data_tuples) == []
+
+    index = capital_ships.schema['laser_firepower_front'].index
+    data_tuples[2] = data_tuples[2][:index] + (data_tuples[2][index] + 1,) + data_tuples[2][index + 1:]
+    # A new row is recomputed, a duplicated one is matched to the row with its id
+    id_index = capital_ships.schema['id'].index
+    data_tuples.append(data_tuples[0][:id_index] + (10 ** 6,) + data_tuples[0][id_index + 1:])
+    data_tuples.append(data_tuples[1])
+    assert capital_ships.update_derived_fields(data_tuples) == [2, len(data_tuples) - 2]
+
+
+def test_derived_fields_of_packed_rows(capital_ships):
+    capital_ships.data[0]['laser_firepower_rear'] += 2
+    manager = pickle.loads(pickle.dumps(capital_ships))
+    firepower_sum = capital_ships.data[0]['firepower_sum']
+    manager.save()
+    assert manager.data[0]['firepower_sum'] == firepower_sum + 2
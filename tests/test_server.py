@@ -0,0 +1,117 @@
+import http.client
+import json
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from swr_ed import MANAGERS_BY_FILE
+from swr_ed import server as server_module
+from swr_ed.server import DataServer, main
+from swr_ed.watcher import Watcher
+
+FILENAMES = ('CAPSHPSD.DAT', 'CMUNEFTB.DAT')
+
+
+@pytest.fixture
+def data_path(synthetic_data_path, tmp_path):
+    shutil.copytree(synthetic_data_path, str(tmp_path / 'install'))
+    return str(tmp_path / 'install')
+
+
+@pytest.fixture
+def watcher(data_path):
+    return Watcher(data_path, [MANAGERS_BY_FILE[filename] for filename in FILENAMES], debounce=1)
+
+
+@pytest.fixture
+def server(watcher):
+    server = DataServer(('127.0.0.1', 0), watcher)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+def get(server, path, headers=None):
+    connection = http.client.HTTPConnection(*server.server_address[:2], timeout=30)
+    try:
+        connection.request('GET', path, headers=headers or {})
+        response = connection.getresponse()
+        return response.status, response.getheader('ETag'), response.read()
+    finally:
+        connection.close()
+
+
+def test_pages_of_records(server, watcher):
+    manager = watcher.managers['CAPSHPSD.DAT']
+    status, _, body = get(server, '/files/capshpsd.dat?offset=2&limit=3&fields=id,name,hull')
+    assert status == 200
+    page = json.loads(body)
+    assert (page['total'], page['offset'], page['limit']) == (len(manager.data), 2, 3)
+    assert page['records'] == [
+        {'id': row['id'], 'name': row['name'], 'hull': row['hull']} for row in manager.data[2:5]
+    ]
+
+    # Rows that are plain lists are served with the column names of export
+    fleets = watcher.managers['CMUNEFTB.DAT']
+    status, _, body = get(server, '/files/CMUNEFTB.DAT?limit=1')
+    assert json.loads(body)['records'] == [dict(zip(fleets.schema.names, fleets.data[0]))]
+
+    status, _, body = get(server, '/files')
+    assert {entry['filename'] for entry in json.loads(body)['files']} == set(FILENAMES)
+
+
+@pytest.mark.parametrize("path, status", [
+    ('/files/NOPE.DAT', 404),
+    ('/nope', 404),
+    ('/files/CAPSHPSD.DAT?fields=nope', 400),
+    ('/files/CAPSHPSD.DAT?limit=-1', 400),
+    ('/files/CAPSHPSD.DAT?offset=x', 400),
+])
+def test_bad_requests(server, path, status):
+    assert get(server, path)[0] == status
+
+
+def test_etag_revalidation(data_path, server, watcher):
+    path = '/files/CAPSHPSD.DAT?limit=5'
+    _, etag, body = get(server, path)
+    assert etag.startswith(f'"{watcher.managers["CAPSHPSD.DAT"].md5_checksum}')
+    assert get(server, path, {'If-None-Match': etag}) == (304, etag, b'')
+
+    manager = MANAGERS_BY_FILE['CAPSHPSD.DAT'](data_path)
+    manager.load()
+    manager.data[1]['hull'] += 1
+    manager.save()
+    watcher.check(now=0)
+    watcher.check(now=2)
+
+    status, new_etag, new_body = get(server, path, {'If-None-Match': etag})
+    assert status == 200
+    assert new_etag != etag
+    assert json.loads(new_body)['records'][1]['hull'] == json.loads(body)['records'][1]['hull'] + 1
+    assert all(key[1] == new_etag for key in server.responses.responses)
+
+
+def test_concurrent_requests_are_served_from_a_single_build(server):
+    paths = ['/files/CAPSHPSD.DAT?limit=50', '/files/CAPSHPSD.DAT?limit=50&fields=name'] * 100
+    with ThreadPoolExecutor(max_workers=100) as executor:
+        responses = list(executor.map(lambda path: get(server, path), paths))
+    assert {status for status, _, _ in responses} == {200}
+    assert len({body for _, _, body in responses}) == 2
+    assert server.responses.builds == 2
+
+
+def test_main_file_names(data_path, monkeypatch, capsys):
+    served = []
+    monkeypatch.setattr(server_module, 'serve', lambda *args: served.append(args))
+    main([data_path, '--file', 'capshpsd.dat'])
+    assert served[0][3] == [MANAGERS_BY_FILE['CAPSHPSD.DAT']]
+
+    with pytest.raises(SystemExit) as error:
+        main([data_path, '--file', 'NOPE.DAT'])
+    assert error.value.code == 2
+    assert 'NOPE.DAT' in capsys.readouterr().err
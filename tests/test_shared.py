@@ -0,0 +1,73 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from swr_ed import ALL_MANAGERS, MANAGERS_BY_FILE
+from swr_ed.exceptions import SWRebellionEditorReadOnlyError
+from swr_ed.shared import SharedInstallation
+
+
+def sum_maintenance(handle):
+    installation = SharedInstallation.attach(handle)
+    try:
+        maintenance = sum(installation.columns('CAPSHPSD.DAT')['maintenance'])
+        return maintenance, dict(installation.manager('CAPSHPSD.DAT').data[0])
+    finally:
+        installation.close()
+
+
+@pytest.fixture(scope='module')
+def installation(synthetic_data_path):
+    with SharedInstallation.create(synthetic_data_path) as shared:
+        yield shared
+
+
+@pytest.mark.parametrize("manager_cls", ALL_MANAGERS)
+def test_shared_manager_matches_load(manager_cls, synthetic_data_path, installation):
+    manager = manager_cls(synthetic_data_path)
+    manager.load()
+
+    shared = installation.manager(manager_cls.filename)
+    assert len(shared.data) == len(manager.data)
+    assert [list(row) if isinstance(row, tuple) else dict(row) for row in shared.data] == manager.data
+    assert shared.header_count == manager.header_count
+    assert shared.md5_checksum == manager.md5_checksum
+    assert bytes(installation.content(manager_cls.filename)) == open(manager.file_path, "rb").read()
+
+    columns = installation.columns(manager_cls.filename)
+    data_tuples = list(manager.data_struct.iter_unpack(manager.prepare_output_stream().read()[
+        manager.header_struct.size:
+    ]))
+    for field in manager.schema:
+        assert list(columns[field.name]) == [row[field.index] for row in data_tuples]
+
+
+def test_shared_manager_is_read_only(installation):
+    manager = installation.manager('CAPSHPSD.DAT')
+    with pytest.raises(TypeError):
+        manager.data[0]['maintenance'] = 1
+    with pytest.raises(SWRebellionEditorReadOnlyError):
+        manager.save()
+
+
+def test_attach_from_worker_processes(synthetic_data_path, installation):
+    manager = MANAGERS_BY_FILE['CAPSHPSD.DAT'](synthetic_data_path)
+    manager.load()
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        results = list(executor.map(sum_maintenance, [installation.handle] * 2))
+    assert results == [(sum(row['maintenance'] for row in manager.data), manager.data[0])] * 2
+
+
+def test_views_are_not_piled_up(installation):
+    for _ in range(3):
+        installation.manager('CAPSHPSD.DAT')
+        installation.columns('CAPSHPSD.DAT')
+    count = len(installation.views)
+    installation.manager('CAPSHPSD.DAT')
+    installation.columns('CAPSHPSD.DAT')
+    assert len(installation.views) == count
+
+    # A view released by a caller is replaced
+    with installation.content('CAPSHPSD.DAT') as content:
+        size = len(content)
+    assert len(installation.content('CAPSHPSD.DAT')) == size
@@ -0,0 +1,75 @@
+import shutil
+import sqlite3
+
+import pytest
+
+from swr_ed import ALL_MANAGERS, MANAGERS_BY_FILE
+from swr_ed.exceptions import SWRebellionEditorValidationError
+from swr_ed.sqlite import export_sqlite, import_sqlite, table_name
+
+
+@pytest.fixture
+def data_path(synthetic_data_path, tmp_path):
+    shutil.copytree(synthetic_data_path, str(tmp_path / 'install'))
+    return str(tmp_path / 'install')
+
+
+def test_export_import_round_trip(data_path, tmp_path):
+    db_path = str(tmp_path / 'game.db')
+    counts = export_sqlite(data_path, db_path)
+    originals = {}
+    for manager_cls in ALL_MANAGERS:
+        manager = manager_cls(data_path)
+        manager.load()
+        assert counts[table_name(manager_cls)] == len(manager.data)
+        originals[manager_cls] = open(manager.file_path, "rb").read()
+
+    managers = import_sqlite(db_path, data_path)
+    assert len(managers) == len(ALL_MANAGERS)
+    for manager_cls, content in originals.items():
+        assert open(manager_cls(data_path).file_path, "rb").read() == content
+
+
+def test_joins_and_indexes(data_path, tmp_path):
+    db_path = str(tmp_path / 'game.db')
+    export_sqlite(data_path, db_path)
+    connection = sqlite3.connect(db_path)
+    indexes = {row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert {'CAPSHPSD_id', 'CAPSHPSD_family_id', 'SYSTEMSD_sector_id'} <= indexes
+
+    joined = connection.execute(
+        'SELECT count(*) FROM SYSTEMSD JOIN SECTORSD ON SYSTEMSD.sector_id = SECTORSD.id'
+    ).fetchone()[0]
+    assert joined == connection.execute('SELECT count(*) FROM SYSTEMSD').fetchone()[0]
+    connection.close()
+
+
+def test_invalid_values_are_reported(data_path, tmp_path):
+    db_path = str(tmp_path / 'game.db')
+    export_sqlite(data_path, db_path)
+    connection = sqlite3.connect(db_path)
+    with connection:
+        connection.execute('UPDATE CAPSHPSD SET maintenance = -1 WHERE rowid = 2')
+        connection.execute("UPDATE FIGHTSD SET shield = 'strong' WHERE rowid = 1")
+    connection.close()
+
+    with pytest.raises(SWRebellionEditorValidationError) as error:
+        import_sqlite(db_path, data_path)
+    assert {(issue.source, issue.line, issue.column) for issue in error.value.issues} == {
+        ('CAPSHPSD', 2, 'maintenance'), ('FIGHTSD', 1, 'shield'),
+    }
+
+
+def test_derived_fields_are_recomputed(data_path, tmp_path):
+    db_path = str(tmp_path / 'game.db')
+    export_sqlite(data_path, db_path)
+    before = MANAGERS_BY_FILE['CAPSHPSD.DAT'](data_path)
+    before.load()
+    connection = sqlite3.connect(db_path)
+    with connection:
+        connection.execute('UPDATE CAPSHPSD SET ion_firepower_left = ion_firepower_left + 5 WHERE rowid = 1')
+    connection.close()
+
+    manager, = import_sqlite(db_path, data_path, [MANAGERS_BY_FILE['CAPSHPSD.DAT']])
+    assert manager.data[0]['firepower_sum'] == before.data[0]['firepower_sum'] + 5
+    assert manager.data[1:] == before.data[1:]
@@ -0,0 +1,147 @@
+import os
+import shutil
+
+import pytest
+
+from swr_ed import ALL_MANAGERS, MANAGERS_BY_FILE
+from swr_ed.exceptions import SWRebellionEditorValidationError
+from swr_ed.streaming import transform
+
+
+@pytest.mark.parametrize("manager_cls", ALL_MANAGERS)
+def test_iter_records_matches_load(manager_cls, synthetic_data_path):
+    manager = manager_cls(synthetic_data_path)
+    manager.load()
+
+    streamed = manager_cls(synthetic_data_path)
+    assert list(streamed.iter_records(chunk_rows=7)) == manager.data
+    assert streamed.md5_checksum == manager.md5_checksum
+
+    raw_rows = list(streamed.iter_records(upgrade=False, chunk_rows=1))
+    assert raw_rows == list(manager.data_struct.iter_unpack(manager.prepare_output_stream().read()[
+        manager.header_struct.size:
+    ]))
+
+
+def copy_file(manager_cls, data_path, tmp_path):
+    src = manager_cls(data_path).file_path
+    dst = tmp_path / 'GDATA' / manager_cls.filename
+    dst.parent.mkdir()
+    dst.write_bytes(open(src, "rb").read())
+    shutil.copy(os.path.join(data_path, 'TEXTSTRA.DLL'), str(tmp_path))
+    return str(dst)
+
+
+@pytest.mark.parametrize("manager_cls", ALL_MANAGERS)
+def test_identity_transform(manager_cls, synthetic_data_path, tmp_path):
+    src = manager_cls(synthetic_data_path).file_path
+    dst = str(tmp_path / manager_cls.filename)
+
+    stats = transform(src, dst, lambda row: row, chunk_rows=5)
+    assert stats.rows_read == stats.rows_written
+    assert open(dst, "rb").read() == open(src, "rb").read()
+
+
+def test_transform_drop_and_duplicate_rows(synthetic_data_path, tmp_path):
+    manager_cls = MANAGERS_BY_FILE['CAPSHPSD.DAT']
+    path = copy_file(manager_cls, synthetic_data_path, tmp_path)
+    original = manager_cls(synthetic_data_path)
+    original.load()
+
+    stats = transform(path, path, lambda row: None if row['id'] % 2 else [row, row], chunk_rows=3)
+    assert stats.rows_read == len(original.data)
+
+    manager = manager_cls(str(tmp_path))
+    manager.load()
+    expected = [row for row in original.data if not row['id'] % 2 for _ in range(2)]
+    assert manager.data == expected
+    assert manager.header_count == stats.header_count == len(expected)
+    assert os.listdir(os.path.dirname(path)) == [manager_cls.filename]
+
+
+def test_batch_transform(synthetic_data_path, tmp_path):
+    manager_cls = MANAGERS_BY_FILE['CAPSHPSD.DAT']
+    path = copy_file(manager_cls, synthetic_data_path, tmp_path)
+    batches = []
+
+    def bump(rows):
+        batches.append(len(rows))
+        for row in rows:
+            row['maintenance'] = 1
+        return rows
+
+    stats = transform(path, path, bump, batch=True, chunk_rows=4)
+    assert sum(batches) == stats.rows_written and max(batches) == 4
+
+    manager = manager_cls(str(tmp_path))
+    manager.load()
+    assert {row['maintenance'] for row in manager.data} == {1}
+
+
+def test_failed_transform_keeps_destination(synthetic_data_path, tmp_path):
+    manager_cls = MANAGERS_BY_FILE['CAPSHPSD.DAT']
+    path = copy_file(manager_cls, synthetic_data_path, tmp_path)
+    before = open(path, "rb").read()
+
+    def fail(row):
+        raise ValueError(row['id'])
+
+    with pytest.raises(ValueError):
+        transform(path, path, fail)
+    assert open(path, "rb").read() == before
+    assert os.listdir(os.path.dirname(path)) == [manager_cls.filename]
+
+
+def test_concurrent_transforms_do_not_share_a_temporary_file(synthetic_data_path, tmp_path):
+    manager_cls = MANAGERS_BY_FILE['CAPSHPSD.DAT']
+    path = copy_file(manager_cls, synthetic_data_path, tmp_path)
+    # A temporary file left by a crashed run is not reused
+    with open(path + '.tmp', "wb") as file_obj:
+        file_obj.write(b'left over')
+    before = open(path, "rb").read()
+
+    def nested(row):
+        if row['id'] == 1:
+            transform(path, path, lambda row: row)
+        return row
+
+    transform(path, path, nested)
+    assert open(path, "rb").read() == before
+    assert open(path + '.tmp', "rb").read() == b'left over'
+    assert sorted(os.listdir(os.path.dirname(path))) == [manager_cls.filename, manager_cls.filename + '.tmp']
+
+
+def test_transform_recomputes_derived_fields(synthetic_data_path, tmp_path):
+    manager_cls = MANAGERS_BY_FILE['CAPSHPSD.DAT']
+    path = copy_file(manager_cls, synthetic_data_path, tmp_path)
+    original = manager_cls(synthetic_data_path)
+    original.load()
+
+    def arm(row):
+        row['ion_firepower_left'] += 1
+        return row
+
+    transform(path, path, arm, chunk_rows=5)
+    manager = manager_cls(str(tmp_path))
+    manager.load()
+    assert [row['firepower_sum'] for row in manager.data] == [row['firepower_sum'] + 1 for row in original.data]
+
+
+def test_transform_checks_read_only_fields(synthetic_data_path, tmp_path):
+    manager_cls = MANAGERS_BY_FILE['CAPSHPSD.DAT']
+    path = copy_file(manager_cls, synthetic_data_path, tmp_path)
+    before = open(path, "rb").read()
+
+    def move(row):
+        if row['id'] in (4, 9):
+            row['family_id'] += 1
+        return row
+
+    with pytest.raises(SWRebellionEditorValidationError) as error:
+        transform(path, path, move, chunk_rows=3)
+    assert [(issue.line, issue.column) for issue in error.value.issues] == [(3, 'family_id'), (8, 'family_id')]
+    assert open(path, "rb").read() == before
+    assert os.listdir(os.path.dirname(path)) == [manager_cls.filename]
+
+    transform(path, path, move, chunk_rows=3, allow_read_only=True)
+    assert open(path, "rb").read() != before
@@ -0,0 +1,25 @@
+import hashlib
+
+import pytest
+
+from swr_ed import ALL_MANAGERS
+from swr_ed.base import SWRDataManager
+from swr_ed.dll_wrappers.resources import build_string_table_dll, parse_string_table
+
+
+@pytest.mark.parametrize("manager_cls", ALL_MANAGERS)
+def test_synthetic_stream_integrity(manager_cls, synthetic_data_path):
+    manager = manager_cls(synthetic_data_path)
+    manager.load()
+
+    composed_stream = manager.prepare_output_stream()
+    composed_checksum = hashlib.md5(composed_stream.read()).hexdigest()
+
+    assert manager.md5_checksum == composed_checksum
+    if issubclass(manager_cls, SWRDataManager) and 'name_id_1' in manager.fields:
+        assert all(row['name'] for row in manager.data)
+
+
+def test_string_table_round_trip():
+    strings = {0: 'first', 9792: 'A-wing', 9793: "Borsk Fey'lya", 65535: 'last'}
+    assert parse_string_table(build_string_table_dll(strings)) == strings
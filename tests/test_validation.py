@@ -0,0 +1,125 @@
+import pickle
+import shutil
+
+import pytest
+
+from swr_ed import ALL_MANAGERS, MANAGERS_BY_FILE
+from swr_ed.exceptions import SWRebellionEditorValidationError
+from swr_ed.validation import check_data_tuples, match_loaded_rows
+
+
+@pytest.fixture
+def data_path(synthetic_data_path, tmp_path):
+    shutil.copytree(synthetic_data_path, str(tmp_path / 'install'))
+    return str(tmp_path / 'install')
+
+
+@pytest.fixture
+def manager(data_path):
+    manager = MANAGERS_BY_FILE['CAPSHPSD.DAT'](data_path)
+    manager.load()
+    return manager
+
+
+@pytest.mark.parametrize("manager_cls", ALL_MANAGERS)
+def test_loaded_data_is_valid(manager_cls, synthetic_data_path):
+    manager = manager_cls(synthetic_data_path)
+    manager.load()
+    assert manager.check_data() == []
+
+
+def test_every_bad_value_is_reported(manager):
+    original = open(manager.file_path, "rb").read()
+    manager.data[1]['maintenance'] = -1
+    manager.data[1]['name_id_2'] = 1 << 16
+    manager.data[3]['shield'] = 'lots'
+
+    with pytest.raises(SWRebellionEditorValidationError) as error:
+        manager.save()
+    assert {(issue.line, issue.column, issue.value) for issue in error.value.issues} == {
+        (1, 'maintenance', -1), (1, 'name_id_2', 1 << 16), (3, 'shield', 'lots'),
+    }
+    assert open(manager.file_path, "rb").read() == original
+
+
+def test_read_only_fields_keep_their_loaded_values(manager):
+    manager.data[2]['id'] += 100
+    manager.data[2]['maintenance'] += 1
+    issues = manager.check_data()
+    assert [(issue.line, issue.column) for issue in issues] == [(2, 'id')]
+    with pytest.raises(SWRebellionEditorValidationError):
+        manager.save()
+
+    manager.save(allow_read_only=True)
+    # The saved values are the new reference
+    manager.save()
+
+
+def test_added_rows_are_not_compared(manager):
+    manager.data.append(dict(manager.data[0]))
+    manager.save()
+
+
+def test_read_only_fields_of_packed_rows(manager):
+    manager.data[0]['family_id'] = 24
+    copy = pickle.loads(pickle.dumps(manager))
+    with pytest.raises(SWRebellionEditorValidationError) as error:
+        copy.save()
+    assert [(issue.line, issue.column, issue.value) for issue in error.value.issues] == [(0, 'family_id', 24)]
+
+
+def test_rows_with_the_wrong_number_of_values(manager):
+    schema = manager.schema
+    rows = [(0,) * len(schema.fields), (0,) * (len(schema.fields) - 1)]
+    issues = check_data_tuples(schema, rows, source=manager.filename)
+    assert [(issue.line, issue.column) for issue in issues] == [(1, None)]
+
+
+def test_deleted_rows(manager):
+    del manager.data[0]
+    del manager.data[5]
+    manager.save()
+
+
+def test_reordered_rows(manager):
+    manager.data.reverse()
+    manager.save()
+
+    # The rows moved are still checked against the rows they were loaded as
+    manager.data.sort(key=lambda row: row['id'])
+    manager.data[0], manager.data[1] = manager.data[1], manager.data[0]
+    manager.data[0]['family_id'] += 1
+    with pytest.raises(SWRebellionEditorValidationError) as error:
+        manager.save()
+    assert [(issue.line, issue.column) for issue in error.value.issues] == [(0, 'family_id')]
+
+
+def test_replaced_rows_are_edited_keys(manager):
+    removed = manager.data.pop()
+    manager.data.append(dict(removed, id=10 ** 6))
+    with pytest.raises(SWRebellionEditorValidationError) as error:
+        manager.save()
+    assert [(issue.line, issue.column) for issue in error.value.issues] == [(len(manager.data) - 1, 'id')]
+
+
+def test_duplicated_keys(manager):
+    manager.data[0]['id'] = manager.data[1]['id']
+    manager.data[0]['family_id'] += 1
+    with pytest.raises(SWRebellionEditorValidationError) as error:
+        manager.save()
+    assert ('family_id', 0) in {(issue.column, issue.line) for issue in error.value.issues}
+
+
+@pytest.mark.parametrize("keys, loaded_keys, matches", [
+    ([1, 2, 3], [1, 2, 3], [0, 1, 2]),
+    ([1, 2, 3, 4], [1, 2, 3], [0, 1, 2, None]),
+    ([2, 3], [1, 2, 3], [1, 2]),
+    ([3, 1, 2], [1, 2, 3], [2, 0, 1]),
+    ([1, 9, 3], [1, 2, 3], [0, 1, 2]),
+    ([9, 1, 5], [1, 2], [None, 0, None]),
+    ([7, 7, 8], [8, 7, 7], [2, 1, 0]),
+    ([2, 2], [1, 2, 3], [1, 1]),
+    ([1, 2, 3, 2], [1, 2, 3], [0, 1, 2, 1]),
+])
+def test_match_loaded_rows(keys, loaded_keys, matches):
+    assert match_loaded_rows(keys, loaded_keys) == matches
@@ -0,0 +1,123 @@
+import os
+import shutil
+import threading
+
+import pytest
+
+from swr_ed import MANAGERS_BY_FILE
+from swr_ed.dll_wrappers.resources import read_string_table, write_string_table_dll
+from swr_ed.watcher import InotifyBackend, Watcher
+
+FILENAMES = ('CAPSHPSD.DAT', 'TROOPSD.DAT', 'CMUNEFTB.DAT')
+
+
+@pytest.fixture
+def data_path(synthetic_data_path, tmp_path):
+    shutil.copytree(synthetic_data_path, str(tmp_path / 'install'))
+    return str(tmp_path / 'install')
+
+
+@pytest.fixture
+def watcher(data_path):
+    return Watcher(data_path, [MANAGERS_BY_FILE[filename] for filename in FILENAMES], debounce=1)
+
+
+def edit(data_path, filename, index, **values):
+    manager = MANAGERS_BY_FILE[filename](data_path)
+    manager.load()
+    manager.data[index].update(values)
+    manager.save()
+    return manager
+
+
+def test_changed_rows_are_notified_once_settled(data_path, watcher):
+    old_manager = watcher.managers['CAPSHPSD.DAT']
+    changes = []
+    watcher.subscribe(changes.append)
+    maintenance = old_manager.data[4]['maintenance']
+    edit(data_path, 'CAPSHPSD.DAT', 4, maintenance=maintenance + 1)
+
+    assert watcher.check(now=100) == []
+    # Another write during the debounce delay postpones the reload
+    edit(data_path, 'CAPSHPSD.DAT', 4, maintenance=maintenance + 2, hull=7)
+    assert watcher.check(now=100.5) == []
+    assert watcher.check(now=101.2) == []
+    change, = watcher.check(now=101.5)
+
+    assert changes == [change]
+    assert change.filename == 'CAPSHPSD.DAT'
+    assert watcher.managers['CAPSHPSD.DAT'] is change.manager is not old_manager
+    row, = change.rows
+    assert row.index == 4
+    assert set(row.fields) == {'maintenance', 'hull'}
+    assert row.old == old_manager.data[4]
+    assert row.new['maintenance'] == maintenance + 2
+    assert watcher.check(now=200) == []
+
+
+def test_added_rows(data_path, watcher):
+    manager = MANAGERS_BY_FILE['TROOPSD.DAT'](data_path)
+    manager.load()
+    manager.data.append(dict(manager.data[0]))
+    manager.save()
+
+    watcher.check(now=0)
+    change, = watcher.check(now=2)
+    row, = change.rows
+    assert (row.index, row.old) == (len(manager.data) - 1, None)
+
+
+def test_texts_changes(data_path, watcher):
+    texts_path = os.path.join(data_path, 'TEXTSTRA.DLL')
+    texts = dict(read_string_table(texts_path))
+    name_id = watcher.managers['TROOPSD.DAT'].data[2]['name_id_1']
+    texts[name_id] = 'Renamed troop'
+    write_string_table_dll(texts_path, texts)
+
+    watcher.check(now=0)
+    change, = watcher.check(now=2)
+    assert change.filename == 'TROOPSD.DAT'
+    row, = change.rows
+    assert (row.index, row.fields, row.new['name']) == (2, ('name',), 'Renamed troop')
+
+
+def test_failing_subscriber_does_not_stop_the_others(data_path, watcher):
+    def fail(change):
+        raise RuntimeError()
+
+    changes = []
+    watcher.subscribe(fail)
+    watcher.subscribe(changes.append)
+    edit(data_path, 'CAPSHPSD.DAT', 0, hull=1)
+    watcher.check(now=0)
+    watcher.check(now=2)
+    assert len(changes) == 1
+
+
+def test_partial_file_keeps_the_old_manager(data_path, watcher):
+    old_manager = watcher.managers['CAPSHPSD.DAT']
+    with open(old_manager.file_path, "ab") as file_obj:
+        file_obj.write(b'\0\0\0')
+    watcher.check(now=0)
+    assert watcher.check(now=2) == []
+    assert watcher.managers['CAPSHPSD.DAT'] is old_manager
+
+
+@pytest.mark.parametrize("backend", ['poll', 'inotify'])
+def test_background_thread(data_path, backend):
+    if backend == 'inotify':
+        try:
+            InotifyBackend([data_path]).close()
+        except (OSError, AttributeError):
+            pytest.skip('inotify is not available')
+
+    received = threading.Event()
+    manager_classes = [MANAGERS_BY_FILE['CMUNEFTB.DAT']]
+    with Watcher(data_path, manager_classes, interval=0.05, debounce=0.05, backend=backend) as watcher:
+        watcher.subscribe(lambda change: received.set())
+        manager = MANAGERS_BY_FILE['CMUNEFTB.DAT'](data_path)
+        manager.load()
+        manager.data[0][3] = 1
+        manager.save()
+        assert received.wait(10)
+    assert watcher.thread is None